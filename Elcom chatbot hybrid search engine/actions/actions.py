@@ -1,165 +1,231 @@
-import json
-import re
+import os
+import time
+import asyncio
 import logging
-from typing import Any, Dict, List, Tuple, Optional
-from datetime import datetime
-from collections import defaultdict
+import threading
+from typing import Any, Dict, List, Tuple, Optional, Union
 from rasa_sdk import Action, Tracker
+from rasa_sdk.events import SlotSet
 from rasa_sdk.executor import CollectingDispatcher
-from rapidfuzz import fuzz, process
-from difflib import get_close_matches
+
+import numpy as np
+
+from .admin_server import start_admin_server
+from .catalog import Catalog, get_catalog, on_catalog_reload, start_catalog_watcher
+from .facet_index import FACET_CERTIFICATION, FACET_IP_RATING, FACET_MOUNTING, FACET_STANDARD
+from . import metrics
+from .metrics import profile_if_slow, timed_stage
+from .phrase_matcher import vocabulary_matcher
+from .popularity import PopularityTracker
+from .product_index import IndexedProduct, ProductIndex, normalize
+from .query_cache import QueryCache
+from .result_set import (RESULT_SET_SLOT, RankedResults, ResultSet, decode_cursor, encode_cursor, from_slot,
+                         to_slot)
+from .search_executor import SearchOverloaded, create_search_executor
+from .shard_index import CategoryShard
+from .spec_index import KIND_AC, KIND_ANY, KIND_DC
+from .spec_parser import (SPEC_CERTIFICATION, SPEC_CURRENT, SPEC_IP_RATING, SPEC_MOUNTING, SPEC_STANDARD,
+                          SPEC_VOLTAGE, first_specs)
+from .vocabulary import STOP_WORDS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Common words to remove from queries
-STOP_WORDS = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"}
-
-# Product attribute synonyms
-ATTRIBUTE_SYNONYMS = {
-    "voltage": ["v", "volt", "volts", "voltage", "rated voltage"],
-    "current": ["a", "amp", "amps", "ampere", "amperes", "current", "rated current"],
-    "switch": ["switches", "switching", "spst", "spdt", "dpst", "dpdt"],
-    "rocker": ["rocker", "toggle", "lever"],
-    "rotary": ["rotary", "rotating", "knob"],
-    "panel": ["panel", "surface", "mount"],
-    "mount": ["mount", "mounting", "installed", "snap-in", "chassis"],
-    "temperature": ["temp", "temperature", "operating temperature"],
-    "compliance": ["standard", "compliance", "certification", "certified"],
-    "function": ["function", "operation", "mode", "state"]
-}
-
-# Product categories with common misspellings
-PRODUCT_CATEGORIES = {
-    "switch": ["switch", "switches", "toggle", "rocker", "rotary", "push button", "spst", "spdt", "dpst", "dpdt"],
-    "ev_connector": ["ev connector", "electric vehicle connector", "charging connector", "ev charging", "ev conector", "ev conectors", "ev conector", "ev conectors"],
-    "industrial_connector": ["industrial connector", "industrial plug", "industrial socket", "ip44", "ip67", "industrial conector", "industrial conectors"],
-    "solar_connector": ["solar connector", "pv connector", "solar panel connector", "y connector", "solar conector", "solar conectors"],
-    "nema_connector": ["nema connector", "nema plug", "nema socket", "twist lock", "nema conector", "nema conectors"],
-    "relay": ["relay", "contactor", "solid state relay"],
-    "sensor": ["sensor", "proximity", "limit", "photoelectric", "motion sensor"],
-    "accessory": ["accessory", "mount", "bracket", "cover", "adapter", "holder", "fuse holder"],
-    "filter": ["filter", "emi filter", "rfi filter", "power filter"],
-    "pdu": ["pdu", "power distribution unit", "power strip", "power distribution"],
-    "breaker": ["breaker", "circuit breaker", "fuse", "protection"],
-    "indicator": ["indicator", "light", "led", "display", "meter"],
-    "power": ["power supply", "power cord", "power cable", "power adapter"],
-    "terminal": ["terminal block", "terminal strip", "terminal connector"],
-    "control": ["control", "controller", "switch", "button", "key"]
-}
+# AC/DC tags of rating queries
+RATING_KINDS = {"ac": KIND_AC, "dc": KIND_DC}
+# Query specs that constrain results to a facet value, e.g. "panel mount" or "IP67"
+SPEC_FACETS = {SPEC_MOUNTING: FACET_MOUNTING, SPEC_IP_RATING: FACET_IP_RATING,
+               SPEC_STANDARD: FACET_STANDARD, SPEC_CERTIFICATION: FACET_CERTIFICATION}
+# Facets offered to narrow down answers listing several products, in order of preference
+NARROWING_FACETS = {FACET_MOUNTING: "a mounting type", FACET_IP_RATING: "a protection degree",
+                    FACET_STANDARD: "a standard"}
+
+# Intents answered with a new search, by filtering the last results ("only the panel mount ones"),
+# and by paging through them ("show more")
+SEARCH_INTENTS = ("product_search", "ask_product_details", "ask_product_info")
+REFINE_INTENT = "refine_search"
+SHOW_MORE_INTENT = "show_more"
 
 # Constants
 FUZZY_MATCH_THRESHOLD = 65
-MAX_RESULTS = 5
 MIN_RELEVANCE_SCORE = 0.3
+# Ranked products kept per search, so follow-ups can refine or page through them without searching
+# again, and products shown per answer or page
+RESULT_SET_SIZE_ENV = "ELCOM_RESULT_SET_SIZE"
+MAX_RESULTS_ENV = "ELCOM_MAX_RESULTS"
+RESULT_SET_SIZE = max(int(os.environ.get(RESULT_SET_SIZE_ENV, "50")), 1)
+MAX_RESULTS = min(max(int(os.environ.get(MAX_RESULTS_ENV, "5")), 1), RESULT_SET_SIZE)
+# Distances to a query rating scoring 1.0 and 0.5, in V and A; refinements keep products within the first
+RATING_TOLERANCES = {"voltage": (10.0, 50.0), "current": (1.0, 5.0)}
+# Candidate pruning: score at most MAX_CANDIDATES products, full scan below MIN_CANDIDATES
+MAX_CANDIDATES = 200
+MIN_CANDIDATES = 20
+# Candidate retrieval: "bm25" (sparse BM25 top-k, n-grams when too few products share a query term) or "ngram"
+CANDIDATE_RETRIEVAL = "bm25"
+# Search queries whose BM25 term weight lies mostly in their category's shard in that shard only
+# (candidates, scoring and rating lookups); the others search every shard, i.e. the whole catalog
+SHARD_ROUTING = True
+# Weight of the BM25 score, scaled to 0-1 per query, in the relevance score
+BM25_SCORE_WEIGHT = 1.0
+# Search mode: "lexical" (BM25, fuzzy and rule scores) or "hybrid" (also fuses dense semantic similarity)
+SEARCH_MODE_ENV = "ELCOM_SEARCH_MODE"
+SEARCH_MODES = ("lexical", "hybrid")
+SEARCH_MODE = os.environ.get(SEARCH_MODE_ENV, "lexical").lower()
+if SEARCH_MODE not in SEARCH_MODES:
+    logger.warning(f"Unknown search mode {SEARCH_MODE!r}; using lexical")
+    SEARCH_MODE = "lexical"
+# Hybrid mode: nearest products added to the lexical candidates, and weight of the cosine similarity
+# above DENSE_MIN_SIMILARITY (below it, character n-gram embeddings are mostly noise), scaled to 0-1
+DENSE_CANDIDATES = 20
+DENSE_SCORE_WEIGHT = 1.0
+DENSE_MIN_SIMILARITY = 0.5
+# Weight of the fuzzy match on each indexed field, and rapidfuzz worker threads (-1 = all cores)
+FUZZY_FIELD_WEIGHTS = {"name": 0.0, "description": 0.0, "search_field": 1.0}
+FUZZY_WORKERS = -1
+# Query result cache: LRU size, entry lifetime in seconds, and whether to also cache rendered responses
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 300.0
+CACHE_RENDERED_RESPONSES = True
+# Answer format: "cards" (full product cards in the text), "summaries" (one-line product summaries
+# in the text when several products match) or "compact" (a short text plus a product_list payload
+# of ids, names and key ratings with a cursor; clients fetch product details on demand)
+RESPONSE_FORMAT_ENV = "ELCOM_RESPONSE_FORMAT"
+RESPONSE_FORMATS = ("cards", "summaries", "compact")
+RESPONSE_FORMAT = os.environ.get(RESPONSE_FORMAT_ENV, "cards").lower()
+if RESPONSE_FORMAT not in RESPONSE_FORMATS:
+    logger.warning(f"Unknown response format {RESPONSE_FORMAT!r}; using cards")
+    RESPONSE_FORMAT = "cards"
+
+# Search counts per top product; in memory until init_services opens the SQLite database
+# shared by every action server process
+popularity = PopularityTracker()
+
+# Caches keyed on the canonicalized query: ranked product ids and rendered responses
+result_cache = QueryCache(max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+response_cache = QueryCache(max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+def clear_query_caches(catalog: Catalog) -> None:
+    """Drop cached results of the previous catalog after a reload."""
+    result_cache.clear()
+    response_cache.clear()
+
+# Bounded thread or process pool running searches off the action server's event loop
+search_executor = create_search_executor()
+
+# Live values on the admin server's /metrics endpoint
+metrics.registry.gauge("elcom_search_pending", "Searches queued or running", lambda: search_executor.pending)
+metrics.registry.gauge("elcom_search_result_cache_size", "Entries in the ranked result cache", lambda: len(result_cache))
+metrics.registry.gauge("elcom_search_response_cache_size", "Entries in the rendered response cache", lambda: len(response_cache))
+
+on_catalog_reload(clear_query_caches)
+
+_services_lock = threading.Lock()
+_services_started = False
+_services_starting: Optional["asyncio.Future[None]"] = None
+
+def init_services(admin_server: bool = True) -> None:
+    """Start the background services of a search server, once; importing this module starts none.
 
-def normalize(text: str) -> str:
-    """Enhanced text normalization with special character handling."""
-    # Remove special characters but keep spaces and numbers
-    text = re.sub(r"[^a-zA-Z0-9\s]", " ", text.lower())
-    # Replace multiple spaces with single space
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
-
-# Load the product catalog
-with open("elcom_product_catalog_cleaned.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# Initialize search history
-search_history = defaultdict(int)
-popular_products = []
-
-# Create a combined search field for each product and categorize
-for product in data:
-    product["search_field"] = f"{product.get('product_name', '')} {product.get('description', '')}".strip()
-    # Add category based on description
-    product["category"] = "other"
-    for category, keywords in PRODUCT_CATEGORIES.items():
-        if any(keyword in normalize(product.get("description", "")) for keyword in keywords):
-            product["category"] = category
-            break
-
-products = [p for p in data if p.get("product_name")]
+    Starts the process search workers, if any, opens the shared popularity
+    database and starts the catalog file watcher and, unless ``admin_server``
+    is False, the admin server (/metrics, POST /reload).
+    """
+    global popularity, _services_started
+    with _services_lock:
+        if _services_started:
+            return
+        _services_started = True
+        # Workers are forked before any background thread exists
+        search_executor.start()
+        popularity = PopularityTracker.from_env()
+        start_catalog_watcher()
+        if admin_server:
+            start_admin_server()
+
+async def start_services() -> None:
+    """init_services from the event loop, without blocking it while the catalog is built or loaded.
+
+    The catalog is loaded on a short-lived thread that has exited by the
+    time init_services runs, so the search workers can still be forked from
+    a single-threaded process and share the catalog's memory.
+    """
+    global _services_starting
+    if _services_started:
+        return
+    if _services_starting is None:
+        _services_starting = asyncio.ensure_future(_start_services())
+    await asyncio.shield(_services_starting)
+
+async def _start_services() -> None:
+    loop = asyncio.get_running_loop()
+    loaded = loop.create_future()
+
+    def load() -> None:
+        try:
+            get_catalog()
+        except BaseException as e:
+            loop.call_soon_threadsafe(loaded.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(loaded.set_result, None)
+
+    thread = threading.Thread(target=load, name="catalog-load", daemon=True)
+    thread.start()
+    await loaded
+    thread.join()
+    init_services()
 
 # --- Utility functions ---
 
 def update_search_history(product_id: str):
     """Update search history and popular products."""
-    search_history[product_id] += 1
-    # Update popular products list
-    global popular_products
-    popular_products = sorted(search_history.items(), key=lambda x: x[1], reverse=True)[:5]
+    popularity.record(product_id)
 
 def get_popular_products() -> List[Dict[str, Any]]:
-    """Get the most popular products based on search history."""
-    return [p for p in products if p["product_name"] in [pid for pid, _ in popular_products]]
-
-def correct_spelling(word: str, word_list: List[str], cutoff: float = 0.8) -> str:
-    """Correct spelling using fuzzy matching."""
-    matches = get_close_matches(word, word_list, n=1, cutoff=cutoff)
-    return matches[0] if matches else word
+    """Get the most popular products based on search history, most popular first."""
+    catalog = get_catalog()
+    return [p for name, _ in popularity.top() for p in catalog.products_named(name)]
 
-def preprocess_query(query: str) -> Tuple[str, Dict[str, Any]]:
+def preprocess_query(query: str, catalog: Optional[Catalog] = None) -> Tuple[str, Dict[str, Any]]:
     """Enhanced query preprocessing with spelling correction."""
     try:
+        catalog = catalog or get_catalog()
+        # Ratings, comparisons and AC/DC tags come from the query as typed, before normalization
+        # drops decimal points ("6.3A") and stop word removal drops "up to" and "at least"
+        specs = first_specs(query)
         query = normalize(query)
         words = query.split()
         
         # Remove stop words
         words = [w for w in words if w not in STOP_WORDS]
         
-        # Extract attributes and category
-        attributes = {}
-        category = None
-        
-        # Create a list of all possible category keywords
-        all_category_keywords = []
-        for keywords in PRODUCT_CATEGORIES.values():
-            all_category_keywords.extend(keywords)
-        
         # Correct spelling in the query
-        corrected_words = []
-        for word in words:
-            corrected_word = correct_spelling(word, all_category_keywords)
-            corrected_words.append(corrected_word)
+        corrected_words = [catalog.spelling.correct(word) for word in words]
         
         # Join corrected words back into query
         corrected_query = " ".join(corrected_words)
         
-        # Check for specific connector types first
-        if "ev" in corrected_query.lower() or "electric vehicle" in corrected_query.lower():
-            category = "ev_connector"
-        elif "industrial" in corrected_query.lower():
-            category = "industrial_connector"
-        elif "solar" in corrected_query.lower() or "pv" in corrected_query.lower():
-            category = "solar_connector"
-        elif "nema" in corrected_query.lower():
-            category = "nema_connector"
-        else:
-            # Check other categories with corrected words
-            for word in corrected_words:
-                for cat, keywords in PRODUCT_CATEGORIES.items():
-                    if word in keywords:
-                        category = cat
-                        break
-                if category:
-                    break
-        
-        # Check for attributes with corrected words
-        for word in corrected_words:
-            for attr, synonyms in ATTRIBUTE_SYNONYMS.items():
-                if word in synonyms:
-                    attributes[attr] = True
+        # Category hints ("ev", "solar", ...), then the earliest and longest category
+        # phrase (e.g. "power distribution unit" before "power"), and attribute synonyms,
+        # all in one pass over the corrected query
+        category, attributes = vocabulary_matcher.tag_query(corrected_query)
         
-        # Extract numeric values with units
-        voltage_matches = re.findall(r"(\d+)\s*(?:v|volt|volts|voltage)", corrected_query)
-        current_matches = re.findall(r"(\d+)\s*(?:a|amp|amps|ampere|amperes|current)", corrected_query)
+        # Ratings with units, comparison operators and AC/DC tags
+        for kind in (SPEC_VOLTAGE, SPEC_CURRENT):
+            spec = specs.get(kind)
+            if not spec:
+                continue
+            attributes[f"{kind}_value"] = spec.value
+            if spec.operator:
+                attributes[f"{kind}_op"] = spec.operator
+            if spec.supply:
+                attributes[f"{kind}_kind"] = spec.supply
         
-        if voltage_matches:
-            attributes["voltage_value"] = float(voltage_matches[0])
-        if current_matches:
-            attributes["current_value"] = float(current_matches[0])
+        # Mounting type, IP rating, standard and certification constraints
+        for kind, facet in SPEC_FACETS.items():
+            spec = specs.get(kind)
+            if spec:
+                attributes[facet] = facet_value(spec)
         
         if category:
             attributes["category"] = category
@@ -169,19 +235,23 @@ def preprocess_query(query: str) -> Tuple[str, Dict[str, Any]]:
         logger.error(f"Error preprocessing query: {str(e)}")
         return query, {}
 
-def calculate_relevance_score(product: Dict[str, Any], query: str, attributes: Dict[str, Any]) -> float:
-    """Enhanced relevance scoring with optimized weights."""
+def facet_value(spec) -> str:
+    """Facet value of a query spec, as stored in the facet index."""
+    return f"ip{spec.value}" if spec.kind == SPEC_IP_RATING else spec.value
+
+def calculate_relevance_score(entry: IndexedProduct, query: str, attributes: Dict[str, Any]) -> float:
+    """Rule-based part of the relevance score; fuzzy matching is batched separately."""
     try:
         score = 0.0
         query = query.lower()
-        product_name = normalize(product.get("product_name", ""))
-        description = normalize(product.get("description", ""))
+        product_name = entry.name
+        description = entry.description
         
         # 1. Category Match (Highest Priority)
         if "category" in attributes:
             if attributes["category"] == "ev_connector" and "ev" in description:
                 score += 3.0
-            elif attributes["category"] == product.get("category"):
+            elif attributes["category"] == entry.category:
                 score += 2.0
         
         # 2. Exact Product Name Match (High Priority)
@@ -196,169 +266,570 @@ def calculate_relevance_score(product: Dict[str, Any], query: str, attributes: D
         if query in description:
             score += 1.5
         
-        # 5. Fuzzy Match in Search Field (Medium Priority)
-        search_field = normalize(product.get("search_field", ""))
-        fuzzy_score = fuzz.token_sort_ratio(query, search_field) / 100
-        score += fuzzy_score * 1.0
+        # 5. Fuzzy Match (Medium Priority) is scored in calculate_relevance_scores
         
-        # 6. Technical Specifications (High Priority)
-        for attr, value in attributes.items():
-            if attr == "voltage_value":
-                try:
-                    product_voltage = float(re.findall(r"\d+", product.get("rated_voltage", "0"))[0])
-                    if abs(product_voltage - value) < 10:  # Within 10V
-                        score += 1.0
-                    elif abs(product_voltage - value) < 50:  # Within 50V
-                        score += 0.5
-                except:
-                    pass
-            elif attr == "current_value":
-                try:
-                    current_str = product.get("rated_current", "")
-                    current_values = [float(re.findall(r"\d+", c)[0]) for c in current_str.split(",")]
-                    if any(abs(c - value) < 1 for c in current_values):  # Within 1A
-                        score += 1.0
-                    elif any(abs(c - value) < 5 for c in current_values):  # Within 5A
-                        score += 0.5
-                except:
-                    pass
+        # 6. Technical Specifications (High Priority) are scored in calculate_relevance_scores
         
         # 7. Feature/Type Matches (Medium Priority)
-        if product.get("other_features"):
-            for feature_list in product["other_features"].values():
-                if isinstance(feature_list, list):
-                    if any(query in normalize(str(f)) for f in feature_list):
-                        score += 0.8
+        for feature_list in entry.feature_lists:
+            if any(query in f for f in feature_list):
+                score += 0.8
         
         # 8. Compliance Match (Low Priority)
-        if product.get("compliance"):
-            compliance_standards = product["compliance"].get("standards", [])
-            if any(query in normalize(str(s)) for s in compliance_standards):
-                score += 0.3
+        if any(query in s for s in entry.standards):
+            score += 0.3
         
         return score
     except Exception as e:
         logger.error(f"Error calculating relevance score: {str(e)}")
         return 0.0
 
-def search_products(query: str) -> List[Dict[str, Any]]:
-    """Enhanced product search with error handling."""
-    try:
-        processed_query, attributes = preprocess_query(query)
-        
-        # If searching for EV connectors, prioritize EV-related products
-        if "ev" in processed_query.lower():
-            attributes["category"] = "ev_connector"
+def search_scope(catalog: Catalog, attributes: Dict[str, Any]) -> Union[ProductIndex, CategoryShard]:
+    """The shard a query was routed to, or the whole catalog index."""
+    shard = attributes.get("shard")
+    return catalog.shards[shard] if shard else catalog.index
+
+def calculate_relevance_scores(catalog: Catalog, product_ids: np.ndarray, query: str, attributes: Dict[str, Any],
+                               fuzzy_scores: Optional[np.ndarray] = None) -> np.ndarray:
+    """Relevance scores of many products: rule scores plus batched fuzzy scores.
+
+    ``fuzzy_scores`` can be passed in when they were computed for several queries at once.
+    """
+    query = query.lower()
+    product_index = catalog.index
+    scope = search_scope(catalog, attributes)
+    scores = np.fromiter(
+        (calculate_relevance_score(product_index[i], query, attributes) for i in product_ids),
+        dtype=np.float64, count=len(product_ids))
+    # One cdist call per weighted field instead of one fuzz call per product
+    if fuzzy_scores is None:
+        fuzzy_scores = product_index.fuzzy_scores(query, product_ids, FUZZY_FIELD_WEIGHTS, workers=FUZZY_WORKERS)
+    scores += fuzzy_scores
+    
+    # Keyword relevance: BM25 over names, descriptions, features and standards
+    if BM25_SCORE_WEIGHT:
+        bm25_scores = scope.bm25.scores(query)
+        best = bm25_scores.max() if len(bm25_scores) else 0.0
+        if best > 0:
+            scores += BM25_SCORE_WEIGHT * bm25_scores[scope.positions(product_ids)] / best
+    
+    # Semantic similarity of the query and product embeddings
+    if attributes.get("search_mode") == "hybrid" and DENSE_SCORE_WEIGHT:
+        similarities = product_index.dense.similarities(product_index.dense.embed(query), product_ids)
+        scores += DENSE_SCORE_WEIGHT * np.maximum(similarities - DENSE_MIN_SIMILARITY, 0.0) / (1 - DENSE_MIN_SIMILARITY)
+    
+    # Technical specifications: distance to each product's closest parsed rating
+    scores += rating_scores(catalog, product_ids, attributes)
+    return scores
+
+def rating_distances(catalog: Catalog, product_ids: np.ndarray, attributes: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Distance of each product's closest voltage and current rating to the ones in the query."""
+    distances = {}
+    scope = search_scope(catalog, attributes)
+    for spec, spec_index in (("voltage", scope.voltage_index), ("current", scope.current_index)):
+        if f"{spec}_value" in attributes:
+            distances[spec] = spec_index.nearest_distance(attributes[f"{spec}_value"])[scope.positions(product_ids)]
+    return distances
+
+def rating_scores(catalog: Catalog, product_ids: np.ndarray, attributes: Dict[str, Any]) -> np.ndarray:
+    """Score of each product for being close to the voltage and current ratings in the query."""
+    scores = np.zeros(len(product_ids), dtype=np.float64)
+    for spec, distance in rating_distances(catalog, product_ids, attributes).items():
+        close, near = RATING_TOLERANCES[spec]
+        scores += np.where(distance < close, 1.0, np.where(distance < near, 0.5, 0.0))
+    return scores
+
+def apply_spec_filters(catalog: Catalog, product_ids: np.ndarray, attributes: Dict[str, Any]) -> np.ndarray:
+    """Drop products whose ratings do not satisfy comparisons like "under 6A"."""
+    scope = search_scope(catalog, attributes)
+    for spec, spec_index in (("voltage", scope.voltage_index), ("current", scope.current_index)):
+        operator = attributes.get(f"{spec}_op")
+        if not operator:
+            continue
+        kind = RATING_KINDS.get(attributes.get(f"{spec}_kind"), KIND_ANY)
+        allowed = scope.global_ids(spec_index.matching(operator, attributes[f"{spec}_value"], kind))
+        product_ids = product_ids[np.isin(product_ids, allowed, assume_unique=True)]
+    return product_ids
+
+def facet_constraints(attributes: Dict[str, Any]) -> Dict[str, str]:
+    """The facet values a query asks for, e.g. {"ip_rating": "ip67"}."""
+    return {facet: attributes[facet] for facet in SPEC_FACETS.values() if facet in attributes}
+
+def facet_label(facet: str, value: str) -> str:
+    """How a facet value reads in a response, e.g. "panel mount" or "IP67"."""
+    return f"{value} mount" if facet == FACET_MOUNTING else value.upper()
+
+def facet_universe(catalog: Catalog, attributes: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Products in the query's search scope with every facet it asks for, with one bitset intersection.
+
+    None when the query asks for no facet. The result is the candidate
+    universe, so selective facets are not lost to candidate pruning.
+    """
+    constraints = facet_constraints(attributes)
+    if not constraints:
+        return None
+    shard = attributes.get("shard")
+    scope_ids = catalog.shards[shard].ids if shard else np.arange(len(catalog.index), dtype=np.intp)
+    return catalog.facets.filter(scope_ids, constraints)
+
+def top_results(catalog: Catalog, product_ids: np.ndarray, scores: np.ndarray, category: Optional[str],
+                limit: int) -> RankedResults:
+    """Pick the ``limit`` best relevant products, ranked by score then category match."""
+    relevant = np.flatnonzero(scores > MIN_RELEVANCE_SCORE)
+    if len(relevant) > limit:
+        # Keep everything tied with the limit-th score so tie-breaking stays deterministic
+        kth_score = -np.partition(-scores[relevant], limit - 1)[limit - 1]
+        relevant = relevant[scores[relevant] >= kth_score]
+    category_match = np.array([catalog.index[i].category == category for i in product_ids[relevant]], dtype=bool)
+    # lexsort uses the last key as the primary one; catalog order breaks ties
+    order = np.lexsort((product_ids[relevant], ~category_match, -scores[relevant]))
+    best = relevant[order[:limit]]
+    return RankedResults(product_ids[best].tolist(), scores[best].tolist())
+
+def prepare_query(catalog: Catalog, query: str, mode: Optional[str] = None) -> Tuple[str, Dict[str, Any], Tuple]:
+    """Preprocess a query and build its cache key."""
+    with timed_stage("preprocess"):
+        processed_query, attributes = preprocess_query(query, catalog)
+    mode = mode or SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+    attributes["search_mode"] = mode
+    
+    # Model codes ("RS-1601", "rs 3 x") are looked up before spelling correction can touch them
+    part_numbers = catalog.part_numbers.find_in_query(normalize(query))
+    if part_numbers:
+        attributes["part_numbers"] = tuple(part_numbers)
+    
+    # If searching for EV connectors, prioritize EV-related products
+    if "ev" in processed_query.lower():
+        attributes["category"] = "ev_connector"
+    
+    if SHARD_ROUTING and not part_numbers:
+        shard, _ = catalog.shards.route(processed_query, attributes.get("category"))
+        if shard:
+            attributes["shard"] = shard
+    
+    cache_key = (catalog.version, processed_query, tuple(sorted(attributes.items())))
+    return processed_query, attributes, cache_key
+
+def candidate_products(catalog: Catalog, processed_query: str,
+                       attributes: Dict[str, Any]) -> Tuple[np.ndarray, Tuple[Tuple[str, str], ...]]:
+    """Ids of the products worth scoring for a preprocessed query, and the facet constraints dropped.
+
+    Candidates are drawn from the products with every facet the query asks
+    for. Facets are parsed from free-form catalog fields and some products
+    leave them blank, so when no product has them all the constraints are
+    dropped rather than answering with nothing, and returned so the answer
+    can say there is no exact match.
+    """
+    shard = attributes.get("shard")
+    with timed_stage("candidates"):
+        universe = facet_universe(catalog, attributes)
+        relaxed: Tuple[Tuple[str, str], ...] = ()
+        if universe is not None and not len(universe):
+            relaxed = tuple(facet_constraints(attributes).items())
+            universe = None
         
-        results = []
-        for product in products:
-            score = calculate_relevance_score(product, processed_query, attributes)
-            if score > MIN_RELEVANCE_SCORE:
-                results.append((score, product))
+        candidate_ids = None
+        if universe is not None and len(universe) <= MAX_CANDIDATES:
+            # Few enough products have the facets to score them all
+            candidate_ids = universe.tolist()
+        elif CANDIDATE_RETRIEVAL == "bm25":
+            candidate_ids = search_scope(catalog, attributes).bm25_candidates(
+                processed_query, attributes.get("category"),
+                max_candidates=MAX_CANDIDATES, min_candidates=MIN_CANDIDATES, product_ids=universe)
+        if candidate_ids is None:
+            candidate_ids = catalog.index.candidates(
+                processed_query, attributes.get("category"),
+                max_candidates=MAX_CANDIDATES, min_candidates=MIN_CANDIDATES, shard=shard, product_ids=universe)
         
-        # Sort by score and category match
-        results.sort(key=lambda x: (x[0], x[1].get("category") == attributes.get("category")), reverse=True)
-        return [p for _, p in results[:MAX_RESULTS]]
+        if candidate_ids is None:
+            if universe is not None:
+                product_ids = universe
+            else:
+                product_ids = catalog.shards[shard].ids if shard else np.arange(len(catalog.index))
+        else:
+            product_ids = np.asarray(candidate_ids, dtype=np.intp)
+            if attributes.get("search_mode") == "hybrid":
+                # Semantic neighbours that share no word or n-gram with the query
+                if universe is not None:
+                    neighbour_scope = universe
+                else:
+                    neighbour_scope = catalog.shards[shard].ids if shard else None
+                dense_index = catalog.index.dense
+                nearest_ids, _ = dense_index.search(dense_index.embed(processed_query), DENSE_CANDIDATES,
+                                                    product_ids=neighbour_scope)
+                product_ids = np.union1d(product_ids, nearest_ids).astype(np.intp)
+        return apply_spec_filters(catalog, product_ids, attributes), relaxed
+
+def rank_candidates(catalog: Catalog, product_ids: np.ndarray, processed_query: str, attributes: Dict[str, Any],
+                    fuzzy_scores: Optional[np.ndarray] = None) -> RankedResults:
+    """Score the candidate products of a preprocessed query and return the top RESULT_SET_SIZE products."""
+    metrics.CANDIDATES_SCORED.inc(len(product_ids))
+    metrics.SHARD_SEARCHES.inc(routing="shard" if attributes.get("shard") else "all")
+    
+    with timed_stage("scoring"):
+        scores = calculate_relevance_scores(catalog, product_ids, processed_query, attributes, fuzzy_scores)
+    
+    # Partial selection of the top results by score and category match
+    with timed_stage("sort"):
+        return top_results(catalog, product_ids, scores, attributes.get("category"), RESULT_SET_SIZE)
+
+def part_number_matches(catalog: Catalog, attributes: Dict[str, Any]) -> Optional[RankedResults]:
+    """Products with a part number named in the query, in query order, without any scoring.
+
+    Comparisons ("RS-1601 under 6A") and facets ("IP67") in the query are
+    strict, as in refinements; None when no named product meets them, so
+    the query is searched like any other.
+    """
+    ranked_ids: List[int] = []
+    for key in attributes.get("part_numbers", ()):
+        ranked_ids.extend(i for i in catalog.part_numbers.products_by_code[key] if i not in ranked_ids)
+    product_ids = apply_spec_filters(catalog, np.asarray(ranked_ids, dtype=np.intp), attributes)
+    product_ids = catalog.facets.filter(product_ids, facet_constraints(attributes))
+    if not len(product_ids):
+        return None
+    # Exact matches all rank equally; their order is the query's
+    ranked_ids = product_ids[:RESULT_SET_SIZE].tolist()
+    return RankedResults(ranked_ids, [1.0] * len(ranked_ids))
+
+def rank_products(catalog: Catalog, processed_query: str, attributes: Dict[str, Any]) -> RankedResults:
+    """Rank the catalog for a preprocessed query and return the top products."""
+    if attributes.get("part_numbers"):
+        results = part_number_matches(catalog, attributes)
+        if results is not None:
+            metrics.PART_NUMBER_HITS.inc()
+            return results
+    product_ids, relaxed = candidate_products(catalog, processed_query, attributes)
+    return rank_candidates(catalog, product_ids, processed_query, attributes)._replace(relaxed_facets=relaxed)
+
+def rank_cached(catalog: Catalog, processed_query: str, attributes: Dict[str, Any], cache_key: Tuple) -> RankedResults:
+    """Ranked products for a query from prepare_query, going through the result cache."""
+    results = result_cache.get(cache_key)
+    if results is None:
+        results = rank_products(catalog, processed_query, attributes)
+        result_cache.put(cache_key, results)
+    else:
+        metrics.CACHE_HITS.inc(cache="result")
+    return results
+
+def rank_batch(catalog: Catalog, prepared: List[Tuple[str, Dict[str, Any], Tuple]]) -> List[RankedResults]:
+    """Rank many queries from prepare_query, fuzzy matching all uncached ones in one pass."""
+    ranked = [result_cache.get(cache_key) for _, _, cache_key in prepared]
+    misses = [i for i, results in enumerate(ranked) if results is None]
+    metrics.CACHE_HITS.inc(len(prepared) - len(misses), cache="result")
+    # Exact part numbers need no fuzzy matching
+    for i in [i for i in misses if prepared[i][1].get("part_numbers")]:
+        results = part_number_matches(catalog, prepared[i][1])
+        if results is not None:
+            metrics.PART_NUMBER_HITS.inc()
+            ranked[i] = results
+            result_cache.put(prepared[i][2], results)
+            misses.remove(i)
+    if not misses:
+        return ranked
+    
+    candidates = {i: candidate_products(catalog, prepared[i][0], prepared[i][1]) for i in misses}
+    # One cdist per field over the union of all candidate sets
+    union = np.unique(np.concatenate([product_ids for product_ids, _ in candidates.values()]))
+    with timed_stage("fuzzy"):
+        fuzzy = catalog.index.fuzzy_score_matrix(
+            [prepared[i][0].lower() for i in misses], union, FUZZY_FIELD_WEIGHTS, workers=FUZZY_WORKERS)
+    for row, i in enumerate(misses):
+        processed_query, attributes, cache_key = prepared[i]
+        product_ids, relaxed = candidates[i]
+        fuzzy_scores = fuzzy[row, np.searchsorted(union, product_ids)]
+        ranked[i] = rank_candidates(catalog, product_ids, processed_query, attributes,
+                                    fuzzy_scores)._replace(relaxed_facets=relaxed)
+        result_cache.put(cache_key, ranked[i])
+    return ranked
+
+def search_prepared(catalog: Catalog, processed_query: str, attributes: Dict[str, Any],
+                    cache_key: Tuple) -> List[Dict[str, Any]]:
+    """Search with a query from prepare_query, going through the result cache."""
+    return [catalog.products[i] for i in rank_cached(catalog, processed_query, attributes, cache_key).ids[:MAX_RESULTS]]
+
+def search_products(query: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Enhanced product search with error handling.
+
+    ``mode`` is one of SEARCH_MODES, SEARCH_MODE by default.
+    """
+    try:
+        catalog = get_catalog()
+        return search_prepared(catalog, *prepare_query(catalog, query, mode))
     except Exception as e:
         logger.error(f"Error in search_products: {str(e)}")
         return []
 
-def format_product_info(product: Dict[str, Any], query: str = "") -> str:
-    """Format product information using proper Markdown syntax."""
-    try:
-        sections = []
-        
-        # Product Name and Description
-        sections.append(f"{product['product_name']}")
-        sections.append("")
-        sections.append("Product Description:")
-        sections.append(product.get('description', 'N/A'))
-        sections.append("")
-        
-        # Technical Specifications
-        sections.append("Technical Specifications:")
-        sections.append(f"• Rated Voltage: {product.get('rated_voltage', 'N/A')}")
-        sections.append(f"• Rated Current: {product.get('rated_current', 'N/A')}")
-        sections.append(f"• Mounting Type: {product.get('mounting_type', 'N/A')}")
-        sections.append(f"• Temperature Range: {product.get('operating_temperature', 'N/A')}")
-        sections.append("")
-        
-        # Standards & Compliance
-        sections.append("Standards & Compliance")
-        if product.get('reference_standard'):
-            sections.append(f"• Reference Standards: {product.get('reference_standard', 'N/A')}")
-        sections.append("")
+def render_search_response(catalog: Catalog, ranked_ids: List[int], user_query: str, offset: int = 0) -> str:
+    """Render the chat response for ranked search results from the pre-rendered product cards.
+
+    ``ranked_ids`` is the whole result set; the MAX_RESULTS products from ``offset`` on are shown.
+    """
+    if not ranked_ids:
+        return (
+            "I couldn't find any products matching your query. "
+            "Try being more specific with product names or key features like:\n"
+            "- Voltage rating (e.g., '250V')\n"
+            "- Current rating (e.g., '16A')\n"
+            "- Mounting type (e.g., 'panel mount')\n"
+            "- Protection degree (e.g., 'IP67')\n"
+        )
+    
+    # Format the results
+    total_results = len(ranked_ids)
+    page = ranked_ids[offset:offset + MAX_RESULTS]
+    if not page:
+        return (f"That's all {total_results} matching products. "
+                "Try narrowing them down with a rating or mounting type, or start a new search.")
+    if total_results == 1:
+        return "Found 1 matching product:\n\n" + catalog.cards.full[page[0]]
+    
+    # Add introduction with count information
+    if RESPONSE_FORMAT == "compact":
+        # The products themselves go in the product_list payload
+        intro = (f"Showing products {offset + 1}-{offset + len(page)} of {total_results}." if offset
+                 else f"Found {total_results} matching products (showing top {len(page)}).")
+        return intro + narrowing_hint(catalog, ranked_ids)
+    if offset:
+        intro = f"Showing products {offset + 1}-{offset + len(page)} of {total_results}:\n\n"
+    else:
+        intro = f"Found {total_results} matching products (showing top {len(page)}):\n\n"
+    if RESPONSE_FORMAT == "summaries":
+        cards = "\n".join(catalog.cards.compact[i] for i in page)
+    else:
+        cards = "\n\n---\n\n".join(catalog.cards.full[i] for i in page)
+    more = "\n\nSay \"show more\" to see the next ones." if offset + len(page) < total_results else ""
+    return intro + cards + narrowing_hint(catalog, ranked_ids) + more
+
+def product_list_payload(catalog: Catalog, result_set: ResultSet, offset: int) -> Optional[Dict[str, Any]]:
+    """Compact ranked list of a page of results with the cursor of the next page, or None for a single product."""
+    ranked_ids = result_set.results.ids
+    page = ranked_ids[offset:offset + MAX_RESULTS]
+    if len(ranked_ids) < 2 or not page:
+        return None
+    end = offset + len(page)
+    return {
+        "type": "product_list",
+        "catalog_version": result_set.catalog_version,
+        "total": len(ranked_ids),
+        "offset": offset,
+        "products": [dict(catalog.cards.summaries[i], id=i) for i in page],
+        "next_cursor": encode_cursor(result_set.catalog_version, end) if end < len(ranked_ids) else None,
+    }
+
+def narrowing_hint(catalog: Catalog, ranked_ids: List[int]) -> str:
+    """Suggest a facet that splits the results, e.g. "panel mount (3), screw mount (2)"."""
+    counts = catalog.facets.counts(ranked_ids, list(NARROWING_FACETS))
+    for facet, label in NARROWING_FACETS.items():
+        # Only values some but not all of the results have actually narrow them down
+        options = [(value, n) for value, n in counts[facet].items() if n < len(ranked_ids)]
+        if not options:
+            continue
+        suggestions = ", ".join(f"{facet_label(facet, value)} ({n})" for value, n in options[:3])
+        return f"\n\nTo narrow these down, try adding {label}: {suggestions}."
+    return ""
+
+DEGRADED_RESPONSE = (
+    "Sorry, our product search is busy right now and couldn't finish in time. "
+    "Please try again in a moment, or search for a specific product name (e.g., 'RS-601')."
+)
+NO_PREVIOUS_SEARCH_RESPONSE = "There are no earlier results to show more of. What kind of product are you looking for?"
+
+def record_results(result_count: int) -> None:
+    """Count a finished search and the number of products it returned."""
+    metrics.SEARCHES.inc()
+    metrics.RESULTS_RETURNED.inc(result_count)
+    if not result_count:
+        metrics.EMPTY_SEARCHES.inc()
+
+def render_results(catalog: Catalog, results: RankedResults, user_query: str) -> Tuple[str, Optional[str]]:
+    """Render the first page of search results; returns (response, top product name)."""
+    with timed_stage("format"):
+        response = render_search_response(catalog, results.ids, user_query)
+        if results.relaxed_facets and results.ids:
+            wanted = ", ".join(facet_label(facet, value) for facet, value in results.relaxed_facets)
+            response = f"No product is listed with {wanted}, so these are the closest matches instead.\n\n" + response
+    record_results(min(len(results.ids), MAX_RESULTS))
+    return response, (catalog.products[results.ids[0]]['product_name'] if results.ids else None)
+
+def new_result_set(catalog: Catalog, user_query: str, results: RankedResults) -> ResultSet:
+    """Result set of a search whose first page was just shown."""
+    return ResultSet(user_query, results, min(len(results.ids), MAX_RESULTS), catalog.version)
+
+def answer_query(user_query: str, catalog: Optional[Catalog] = None) -> Tuple[str, Optional[str], ResultSet]:
+    """Search and render the response for a query; returns (response, top product name, result set)."""
+    with profile_if_slow(user_query):
+        catalog = catalog or get_catalog()
+        processed_query, attributes, cache_key = prepare_query(catalog, user_query)
         
-        # Additional Features
-        if product.get('other_features'):
-            sections.append("Additional Features:")
-            for key, value in product['other_features'].items():
-                if isinstance(value, list):
-                    value_str = []
-                    for item in value:
-                        item_str = str(item).strip("[]'\"")
-                        if item_str and item_str.lower() != 'nan':
-                            item_str = item_str.replace(" : ", ": ")
-                            value_str.append(item_str)
-                    if value_str:
-                        sections.append(f"• {key}: {', '.join(value_str)}")
-                elif value and str(value).lower() != 'nan':
-                    sections.append(f"• {key}: {value}")
+        cached = response_cache.get(cache_key) if CACHE_RENDERED_RESPONSES else None
+        if cached is not None:
+            response, top_product, results = cached
+            metrics.CACHE_HITS.inc(cache="response")
+            record_results(min(len(results.ids), MAX_RESULTS))
+            return response, top_product, new_result_set(catalog, user_query, results)
         
-        return "\n".join(sections).strip()
-    except Exception as e:
-        logger.error(f"Error formatting product info: {str(e)}")
-        return f"Error displaying product information for {product.get('product_name', 'Unknown')}"
+        results = rank_cached(catalog, processed_query, attributes, cache_key)
+        response, top_product = render_results(catalog, results, user_query)
+        if CACHE_RENDERED_RESPONSES:
+            response_cache.put(cache_key, (response, top_product, results))
+        return response, top_product, new_result_set(catalog, user_query, results)
+
+def rank_query(user_query: str) -> Tuple[str, RankedResults, List[Tuple]]:
+    """Search worker entry point: the catalog version, ranked products and metric samples."""
+    with metrics.deferred_metrics() as samples, profile_if_slow(user_query):
+        catalog = get_catalog()
+        results = rank_cached(catalog, *prepare_query(catalog, user_query))
+    return catalog.version, results, samples
+
+def rank_queries(user_queries: List[str]) -> Tuple[str, List[RankedResults], List[Tuple]]:
+    """Batch search worker entry point: the catalog version, ranked products per query and metric samples."""
+    with metrics.deferred_metrics() as samples:
+        catalog = get_catalog()
+        ranked = rank_batch(catalog, [prepare_query(catalog, query) for query in user_queries])
+    return catalog.version, ranked, samples
+
+async def search_and_render(user_query: str, catalog: Optional[Catalog] = None) -> Tuple[str, Optional[str], ResultSet]:
+    """Answer a query on the search executor; returns (response, top product name, result set).
+
+    The answer comes from ``catalog`` (by default the current one), even if it is reloaded meanwhile.
+    """
+    catalog = catalog or get_catalog()
+    if not search_executor.uses_processes:
+        return await search_executor.run(answer_query, user_query, catalog)
+    
+    # Worker processes only send back ranked ids and their metrics; rendering happens here
+    version, results, samples = await search_executor.run(rank_query, user_query)
+    metrics.registry.replay(samples)
+    if catalog.version != version:
+        # The worker searched another catalog than this answer is for
+        return answer_query(user_query, catalog)
+    return render_results(catalog, results, user_query) + (new_result_set(catalog, user_query, results),)
+
+def refine_results(catalog: Catalog, previous: RankedResults, refinement: str) -> RankedResults:
+    """Filter and re-rank earlier results with a follow-up like "only the panel mount ones" or "which are 16A"."""
+    processed_query, attributes = preprocess_query(refinement, catalog)
+    product_ids = np.asarray(previous.ids, dtype=np.intp)
+    scores = np.asarray(previous.scores, dtype=np.float64)
+    
+    # The user asked for a subset, so comparisons ("under 6A") and facets ("IP67") are strict here;
+    # category hints are not, "mount" alone already hints at accessories
+    constraints = facet_constraints(attributes)
+    keep = np.isin(product_ids, apply_spec_filters(catalog, product_ids, attributes))
+    keep &= np.isin(product_ids, catalog.facets.filter(product_ids, constraints))
+    # Plain ratings ("which of those are 16A") keep the products rated close to them
+    distances = rating_distances(catalog, product_ids, attributes)
+    for spec, distance in distances.items():
+        if not attributes.get(f"{spec}_op"):
+            keep &= distance < RATING_TOLERANCES[spec][0]
+    
+    if constraints or distances or any(f"{spec}_op" in attributes for spec in RATING_TOLERANCES):
+        scores += rating_scores(catalog, product_ids, attributes)
+    else:
+        # Nothing recognizable to filter on ("the waterproof ones"): keep what is relevant to the follow-up
+        relevance = calculate_relevance_scores(catalog, product_ids, processed_query, attributes)
+        keep &= relevance > MIN_RELEVANCE_SCORE
+        scores += relevance
+    
+    # Best refined score first; the earlier ranking breaks ties
+    kept = np.flatnonzero(keep)
+    order = kept[np.lexsort((kept, -scores[kept]))]
+    return RankedResults(product_ids[order].tolist(), scores[order].tolist())
+
+def refine_and_render(catalog: Catalog, previous: ResultSet, refinement: str) -> Tuple[str, Optional[str], Optional[ResultSet]]:
+    """Answer a refinement of a stored result set; returns (response, top product name, refined result set)."""
+    with timed_stage("refine"):
+        results = refine_results(catalog, previous.results, refinement)
+    if not results.ids:
+        # Keep the earlier results, so the user can refine them differently
+        return (f"None of the {len(previous.results.ids)} products I found match that. "
+                "Try another rating or mounting type, or start a new search."), None, None
+    response, top_product = render_results(catalog, results, refinement)
+    # The combined query is searched again if the catalog is reloaded before the next follow-up
+    return response, top_product, new_result_set(catalog, f"{previous.query} {refinement}", results)
+
+def next_page(catalog: Catalog, previous: ResultSet) -> Tuple[str, ResultSet]:
+    """The next page of a stored result set; returns (response, result set with the new offset)."""
+    response = render_search_response(catalog, previous.results.ids, previous.query, previous.offset)
+    return response, previous._replace(offset=min(previous.offset + MAX_RESULTS, len(previous.results.ids)))
 
 class ActionSearchProduct(Action):
     def name(self) -> str:
         return "action_search_product"
 
-    def run(self, dispatcher: CollectingDispatcher,
-            tracker: Tracker,
-            domain: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def search(self, catalog: Catalog, user_query: str) -> Tuple[str, Optional[str], Optional[ResultSet]]:
+        """Search on the search executor, answering with DEGRADED_RESPONSE when it is busy."""
+        # CPU-bound search runs on the pool so other conversations keep flowing
+        started = time.perf_counter()
         try:
+            answer = await search_and_render(user_query, catalog)
+            metrics.SEARCH_SECONDS.observe(time.perf_counter() - started)
+            return answer
+        except asyncio.TimeoutError:
+            logger.warning(f"Search timed out after {search_executor.timeout}s: {user_query!r}")
+            metrics.REJECTED_SEARCHES.inc(reason="timeout")
+        except SearchOverloaded as e:
+            logger.warning(f"Search rejected, queue full ({str(e)}): {user_query!r}")
+            metrics.REJECTED_SEARCHES.inc(reason="overloaded")
+        return DEGRADED_RESPONSE, None, None
+
+    async def run(self, dispatcher: CollectingDispatcher,
+                  tracker: Tracker,
+                  domain: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # The action server has no startup hook; the first action starts the services
+        await start_services()
+        try:
+            # One catalog for the whole action, so a reload meanwhile cannot mix ids of two catalogs
+            catalog = get_catalog()
             intent = tracker.latest_message.get("intent", {}).get("name")
             
-            if intent not in ["product_search", "ask_product_details", "ask_product_info"]:
+            if intent not in SEARCH_INTENTS + (REFINE_INTENT, SHOW_MORE_INTENT):
                 dispatcher.utter_message(
                     text="Hmm, I'm not sure what you meant. Could you rephrase?")
                 return []
 
             user_query = tracker.latest_message.get("text")
             
-            results = search_products(user_query)
-            if not results:
-                response = (
-                    "I couldn't find any products matching your query. "
-                    "Try being more specific with product names or key features like:\n"
-                    "- Voltage rating (e.g., '250V')\n"
-                    "- Current rating (e.g., '16A')\n"
-                    "- Mounting type (e.g., 'panel mount')\n"
-                    "- Protection degree (e.g., 'IP67')\n"
-                )
-            else:
-                # Format the results
-                if len(results) == 1:
-                    response = "Found 1 matching product:\n\n" + format_product_info(results[0], user_query)
+            previous = from_slot(tracker.get_slot(RESULT_SET_SLOT))
+            if previous is not None and previous.catalog_version != catalog.version:
+                # The stored ids belong to the catalog before a reload; search for the same query again
+                _, _, fresh = await self.search(catalog, previous.query)
+                previous = fresh._replace(offset=previous.offset) if fresh else None
+            
+            # Follow-ups only filter or page through the last results; at most RESULT_SET_SIZE
+            # products, so they run right here instead of on the search pool
+            page_offset = 0
+            if intent == SHOW_MORE_INTENT:
+                if previous is None:
+                    response, top_product, result_set = NO_PREVIOUS_SEARCH_RESPONSE, None, None
                 else:
-                    # Add introduction with count information
-                    total_results = len(results)
-                    intro = f"Found {total_results} matching products (showing top {min(total_results, MAX_RESULTS)}):\n\n"
-                    formatted_results = []
-                    for product in results:
-                        formatted_results.append(format_product_info(product, user_query))
-                    response = intro + "\n\n---\n\n".join(formatted_results)
-        
-            dispatcher.utter_message(text=response, parse_mode="markdown")
+                    # "Show more" buttons of product lists send the cursor of the page they ask for
+                    cursor = decode_cursor(next(tracker.get_latest_entity_values("cursor"), None) or "")
+                    if cursor and cursor[0] == previous.catalog_version:
+                        previous = previous._replace(offset=cursor[1])
+                    page_offset = previous.offset
+                    response, result_set = next_page(catalog, previous)
+                    top_product = None
+            elif intent == REFINE_INTENT and previous is not None:
+                response, top_product, result_set = refine_and_render(catalog, previous, user_query)
+            else:
+                response, top_product, result_set = await self.search(catalog, user_query)
             
-            if results:
-                update_search_history(results[0]['product_name'])
+            payload = None
+            if RESPONSE_FORMAT == "compact" and result_set is not None:
+                payload = product_list_payload(catalog, result_set, page_offset)
+            dispatcher.utter_message(text=response, json_message=payload, parse_mode="markdown")
             
-            return []
+            if top_product:
+                update_search_history(top_product)
+            
+            if result_set is None:
+                return []
+            # An empty result set leaves nothing to refine; the next follow-up searches anew
+            return [SlotSet(RESULT_SET_SLOT, to_slot(result_set) if result_set.results.ids else None)]
         except Exception as e:
             logger.error(f"Error in ActionSearchProduct: {str(e)}")
             dispatcher.utter_message(
                 text="Sorry, I encountered an error while processing your query. Please try again.")
             return []
-
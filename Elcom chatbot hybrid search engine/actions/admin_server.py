@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from .catalog import get_catalog, is_disabled, is_reloading, reload_catalog_async
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Admin HTTP server next to the action server (port 5055); "off" disables it
+ADMIN_HOST_ENV = "ELCOM_ADMIN_HOST"
+ADMIN_PORT_ENV = "ELCOM_ADMIN_PORT"
+DEFAULT_ADMIN_HOST = "127.0.0.1"
+DEFAULT_ADMIN_PORT = 5056
+
+class AdminRequestHandler(BaseHTTPRequestHandler):
+    """Serves the catalog admin endpoints.
+
+    - ``GET /catalog`` returns the version and size of the live catalog
+    - ``POST /reload`` rebuilds the catalog in the background and swaps it in
+    - ``GET /metrics`` returns the search metrics in the Prometheus text format
+    """
+
+    def _send_text(self, status: int, text: str, content_type: str) -> None:
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send_text(status, json.dumps(payload), "application/json")
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            self._send_text(200, registry.render(), "text/plain; version=0.0.4; charset=utf-8")
+        elif self.path == "/catalog":
+            catalog = get_catalog()
+            self._send_json(200, {
+                "version": catalog.version,
+                "products": len(catalog),
+                "reloading": is_reloading(),
+            })
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path == "/reload":
+            reload_catalog_async()
+            self._send_json(202, {"status": "reloading"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+_server: Optional[ThreadingHTTPServer] = None
+
+def start_admin_server() -> Optional[ThreadingHTTPServer]:
+    """Start the admin server on a daemon thread once, unless disabled by configuration."""
+    global _server
+    port = os.environ.get(ADMIN_PORT_ENV, str(DEFAULT_ADMIN_PORT))
+    if _server is not None or is_disabled(port):
+        return _server
+    host = os.environ.get(ADMIN_HOST_ENV, DEFAULT_ADMIN_HOST)
+    try:
+        _server = ThreadingHTTPServer((host, int(port)), AdminRequestHandler)
+    except OSError as e:
+        logger.warning(f"Could not start admin server on {host}:{port}: {str(e)}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="admin-server", daemon=True).start()
+    logger.info(f"Admin server listening on http://{host}:{port}")
+    return _server
@@ -0,0 +1,94 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Normalized text is already lowercase and space-separated; keep one-character tokens like "x"
+TOKEN_PATTERN = r"(?u)\b\w+\b"
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Ids of the ``k`` best positive scores, in id order."""
+    matching = np.flatnonzero(scores > 0)
+    if len(matching) > k:
+        matching = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+    return sorted(matching.tolist())
+
+def restrict_scores(scores: np.ndarray, positions: Optional[np.ndarray]) -> np.ndarray:
+    """Scores with everything but ``positions`` zeroed, so only those can be top-k; all of them for None."""
+    if positions is None:
+        return scores
+    restricted = np.zeros_like(scores)
+    restricted[positions] = scores[positions]
+    return restricted
+
+class BM25Index:
+    """Sparse BM25 index over several weighted text fields of every product.
+
+    Per-field term counts are combined into one weighted term frequency
+    (BM25F-style), and the BM25 weight of every (product, term) pair is
+    precomputed into a CSC matrix. Scoring a query is then one sparse
+    mat-vec over the columns of the query terms, touching only the
+    products that contain them.
+    """
+
+    def __init__(self, fields: Mapping[str, Sequence[str]], field_weights: Mapping[str, float],
+                 k1: float = BM25_K1, b: float = BM25_B):
+        vectorizer = CountVectorizer(token_pattern=TOKEN_PATTERN, lowercase=False, dtype=np.float32)
+        vectorizer.fit(text for values in fields.values() for text in values)
+        self.vocabulary: Dict[str, int] = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+
+        term_frequency = None
+        for field, values in fields.items():
+            counts = vectorizer.transform(values) * np.float32(field_weights.get(field, 1.0))
+            term_frequency = counts if term_frequency is None else term_frequency + counts
+        term_frequency = sparse.csr_matrix(term_frequency, dtype=np.float32)
+        n_products = term_frequency.shape[0]
+
+        document_frequency = np.bincount(term_frequency.indices, minlength=len(self.vocabulary))
+        idf = np.log1p((n_products - document_frequency + 0.5) / (document_frequency + 0.5))
+        lengths = np.asarray(term_frequency.sum(axis=1)).ravel()
+        length_norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1e-9)) if n_products else lengths
+
+        # BM25 weight of every stored term count, row by row
+        weights = term_frequency.copy()
+        rows = np.repeat(np.arange(n_products), np.diff(weights.indptr))
+        tf = weights.data
+        weights.data = (idf[weights.indices] * tf * (k1 + 1) / (tf + length_norm[rows])).astype(np.float32)
+        # Column-major, so a query only reads the postings of its own terms
+        self.weights = weights.tocsc()
+
+    def __len__(self) -> int:
+        return self.weights.shape[0]
+
+    def query_terms(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Vocabulary columns of the indexed terms of a normalized query and how often each occurs."""
+        term_ids: Dict[int, float] = {}
+        for token in query.split():
+            term_id = self.vocabulary.get(token)
+            if term_id is not None:
+                term_ids[term_id] = term_ids.get(term_id, 0.0) + 1.0
+        columns = np.fromiter(term_ids, dtype=np.intp, count=len(term_ids))
+        query_counts = np.fromiter(term_ids.values(), dtype=np.float32, count=len(term_ids))
+        return columns, query_counts
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every product for a normalized query (zero for products sharing no term)."""
+        columns, query_counts = self.query_terms(query)
+        if not len(columns):
+            return np.zeros(len(self), dtype=np.float32)
+        return self.weights[:, columns] @ query_counts
+
+    def rows(self, product_ids: np.ndarray) -> "BM25Index":
+        """Index over a subset of the products, with this index's vocabulary and weights.
+
+        Idf and length normalization stay those of the whole catalog, so the
+        scores of different subsets can be merged as if scored together.
+        """
+        subset = BM25Index.__new__(BM25Index)
+        subset.vocabulary = self.vocabulary
+        subset.weights = self.weights[product_ids]
+        return subset
@@ -0,0 +1,82 @@
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+def format_product_info(product: Dict[str, Any], query: str = "") -> str:
+    """Format product information using proper Markdown syntax."""
+    try:
+        sections = []
+
+        # Product Name and Description
+        sections.append(f"{product['product_name']}")
+        sections.append("")
+        sections.append("Product Description:")
+        sections.append(product.get('description', 'N/A'))
+        sections.append("")
+
+        # Technical Specifications
+        sections.append("Technical Specifications:")
+        sections.append(f"• Rated Voltage: {product.get('rated_voltage', 'N/A')}")
+        sections.append(f"• Rated Current: {product.get('rated_current', 'N/A')}")
+        sections.append(f"• Mounting Type: {product.get('mounting_type', 'N/A')}")
+        sections.append(f"• Temperature Range: {product.get('operating_temperature', 'N/A')}")
+        sections.append("")
+
+        # Standards & Compliance
+        sections.append("Standards & Compliance")
+        if product.get('reference_standard'):
+            sections.append(f"• Reference Standards: {product.get('reference_standard', 'N/A')}")
+        sections.append("")
+
+        # Additional Features
+        if product.get('other_features'):
+            sections.append("Additional Features:")
+            for key, value in product['other_features'].items():
+                if isinstance(value, list):
+                    value_str = []
+                    for item in value:
+                        item_str = str(item).strip("[]'\"")
+                        if item_str and item_str.lower() != 'nan':
+                            item_str = item_str.replace(" : ", ": ")
+                            value_str.append(item_str)
+                    if value_str:
+                        sections.append(f"• {key}: {', '.join(value_str)}")
+                elif value and str(value).lower() != 'nan':
+                    sections.append(f"• {key}: {value}")
+
+        return "\n".join(sections).strip()
+    except Exception as e:
+        logger.error(f"Error formatting product info: {str(e)}")
+        return f"Error displaying product information for {product.get('product_name', 'Unknown')}"
+
+def key_ratings(product: Dict[str, Any]) -> List[str]:
+    """Voltage, current and mounting type of a product, skipping missing ones."""
+    return [str(product[field]) for field in ("rated_voltage", "rated_current", "mounting_type")
+            if product.get(field) and str(product[field]).lower() not in ("nan", "n/a")]
+
+def format_compact_product_info(product: Dict[str, Any]) -> str:
+    """One-line product summary for answers listing several products."""
+    try:
+        ratings = key_ratings(product)
+        summary = f"• {product['product_name']}"
+        if product.get('description'):
+            summary += f" - {product['description']}"
+        if ratings:
+            summary += f" ({', '.join(ratings)})"
+        return summary
+    except Exception as e:
+        logger.error(f"Error formatting compact product info: {str(e)}")
+        return f"• {product.get('product_name', 'Unknown')}"
+
+def product_summary(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Name and key ratings of a product, for compact product list payloads."""
+    return {"name": product.get("product_name", "Unknown"), "ratings": key_ratings(product)}
+
+class ProductCards:
+    """Full and compact response cards of every product, rendered once at catalog load."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.full = [format_product_info(product) for product in products]
+        self.compact = [format_compact_product_info(product) for product in products]
+        self.summaries = [product_summary(product) for product in products]
@@ -0,0 +1,325 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .cards import ProductCards
+from .facet_index import FacetIndex, product_facets
+from .part_number_index import PartNumberIndex
+from .phrase_matcher import vocabulary_matcher
+from .product_index import ProductIndex, normalize
+from .shard_index import ShardedIndex
+from .spelling import SpellingCorrector, count_words
+from .vocabulary import ATTRIBUTE_SYNONYMS, PRODUCT_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# Catalog location: ELCOM_CATALOG_PATH, else the cleaned catalog next to the actions package
+CATALOG_PATH_ENV = "ELCOM_CATALOG_PATH"
+DEFAULT_CATALOG_FILE = "elcom_product_catalog_cleaned.json"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Values of a path or port setting that turn its feature off
+DISABLED_SETTING_VALUES = ("off", "none", "false", "0")
+
+# Binary snapshot of the enriched and indexed catalog: ELCOM_CATALOG_SNAPSHOT, else
+# "<catalog>.snapshot.pkl"; set ELCOM_CATALOG_SNAPSHOT=off to disable it
+SNAPSHOT_PATH_ENV = "ELCOM_CATALOG_SNAPSHOT"
+SNAPSHOT_SUFFIX = ".snapshot.pkl"
+# Bump whenever the snapshot file layout changes; changes to Catalog, the indexes or the vocabulary
+# are caught by the fingerprint of the actions package sources stored in every snapshot
+SNAPSHOT_FORMAT_VERSION = 11
+
+# Seconds between checks of the catalog file for changes (0 disables the watcher)
+WATCH_INTERVAL_ENV = "ELCOM_CATALOG_WATCH_INTERVAL"
+DEFAULT_WATCH_INTERVAL = 10.0
+
+def is_disabled(value: Optional[str]) -> bool:
+    """Whether an environment setting is one of DISABLED_SETTING_VALUES."""
+    return bool(value) and value.strip().lower() in DISABLED_SETTING_VALUES
+
+def resolve_catalog_path() -> str:
+    """Return the catalog JSON path from the environment or the project directory."""
+    return os.environ.get(CATALOG_PATH_ENV) or os.path.join(PROJECT_DIR, DEFAULT_CATALOG_FILE)
+
+def resolve_snapshot_path(catalog_path: str) -> Optional[str]:
+    """Return the snapshot path for a catalog, or ``None`` if snapshots are disabled."""
+    snapshot_path = os.environ.get(SNAPSHOT_PATH_ENV)
+    if is_disabled(snapshot_path):
+        return None
+    return snapshot_path or catalog_path + SNAPSHOT_SUFFIX
+
+_code_fingerprint: Optional[str] = None
+
+def code_fingerprint() -> str:
+    """Content hash of the actions package sources, which build and define the indexed catalog."""
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        digest = hashlib.sha1()
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _code_fingerprint = digest.hexdigest()
+    return _code_fingerprint
+
+def categorize(product: Dict[str, Any]) -> str:
+    """Return the first category with a keyword in the product description."""
+    return vocabulary_matcher.categorize(normalize(product.get("description", ""))) or "other"
+
+def enrich_products(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Add the search field and category to every product and drop unnamed entries."""
+    for product in data:
+        # Create a combined search field for each product and categorize
+        product["search_field"] = f"{product.get('product_name', '')} {product.get('description', '')}".strip()
+        product["category"] = categorize(product)
+    return [p for p in data if p.get("product_name")]
+
+class Catalog:
+    """The enriched product list together with every search structure built from it."""
+
+    def __init__(self, products: List[Dict[str, Any]], version: str):
+        self.products = products
+        # Part of every cache key, so cached results never outlive the catalog they came from
+        self.version = version
+        
+        # Product ids by exact name, for O(1) lookups (a few names are shared by several products)
+        self.ids_by_name: Dict[str, List[int]] = {}
+        self.ids_by_normalized_name: Dict[str, List[int]] = {}
+        for product_id, product in enumerate(products):
+            self.ids_by_name.setdefault(product["product_name"], []).append(product_id)
+            self.ids_by_normalized_name.setdefault(normalize(product["product_name"]), []).append(product_id)
+
+        # Build the search index once so queries never re-normalize catalog fields
+        self.index = ProductIndex(products)
+        
+        # Per-category shards, so queries with a clear category only search their own
+        self.shards = ShardedIndex(self.index)
+        
+        # Model codes from names and ratings, for exact lookups and completion
+        self.part_numbers = PartNumberIndex(products)
+        
+        # Bitsets of the products with each category, mounting type, IP rating and standard
+        self.facets = FacetIndex([product_facets(entry) for entry in self.index])
+        
+        # Response cards, so answers are assembled from pre-rendered text
+        self.cards = ProductCards(products)
+
+        # Spelling correction dictionary: domain keywords plus the catalog vocabulary
+        self.spelling = SpellingCorrector.from_sources(
+            [k for keywords in PRODUCT_CATEGORIES.values() for k in keywords]
+            + [s for synonyms in ATTRIBUTE_SYNONYMS.values() for s in synonyms]
+            + list(ATTRIBUTE_SYNONYMS),
+            count_words(
+                [entry.name for entry in self.index]
+                + [entry.description for entry in self.index]
+                + [f for entry in self.index for feature_list in entry.feature_lists for f in feature_list]))
+
+    @classmethod
+    def from_json_bytes(cls, raw_catalog: bytes) -> "Catalog":
+        """Parse, enrich and index a catalog from the raw JSON file contents."""
+        data = json.loads(raw_catalog.decode("utf-8"))
+        return cls(enrich_products(data), hashlib.sha1(raw_catalog).hexdigest())
+
+    def products_named(self, product_name: str, exact: bool = True) -> List[Dict[str, Any]]:
+        """All products with this name; ``exact=False`` ignores case and punctuation."""
+        if exact:
+            product_ids = self.ids_by_name.get(product_name, ())
+        else:
+            product_ids = self.ids_by_normalized_name.get(normalize(product_name), ())
+        return [self.products[i] for i in product_ids]
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+def _read_snapshot(snapshot_path: str) -> Optional[Dict[str, Any]]:
+    """Return the snapshot stored at ``snapshot_path``, if it is readable and current.
+
+    A snapshot is a header pickle followed by the catalog pickle; the catalog
+    is only unpickled when the header shows it was built by the same code.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+            if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            if snapshot.get("code") != code_fingerprint():
+                logger.info(f"Ignoring catalog snapshot {snapshot_path} built by other code")
+                return None
+            snapshot["catalog"] = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable catalog snapshot {snapshot_path}: {str(e)}")
+        return None
+    return snapshot
+
+def _write_snapshot(snapshot_path: str, stat: os.stat_result, catalog: Catalog) -> None:
+    """Atomically write a snapshot; failures only cost the next start its warm path."""
+    header = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "code": code_fingerprint(),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+    }
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(snapshot_path) or ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(catalog, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        logger.warning(f"Could not write catalog snapshot {snapshot_path}: {str(e)}")
+
+def load_catalog(catalog_path: Optional[str] = None, snapshot_path: Optional[str] = None,
+                 use_snapshot: bool = True) -> Catalog:
+    """Load the catalog, preferring a snapshot that matches the source JSON and the current code."""
+    catalog_path = catalog_path or resolve_catalog_path()
+    if use_snapshot and snapshot_path is None:
+        snapshot_path = resolve_snapshot_path(catalog_path)
+    use_snapshot = use_snapshot and bool(snapshot_path)
+    stat = os.stat(catalog_path)
+
+    snapshot = _read_snapshot(snapshot_path) if use_snapshot else None
+    # Same mtime and size: trust the snapshot without even reading the source
+    if snapshot and snapshot["source_mtime_ns"] == stat.st_mtime_ns and snapshot["source_size"] == stat.st_size:
+        logger.info(f"Loaded {len(snapshot['catalog'])} products from snapshot {snapshot_path}")
+        return snapshot["catalog"]
+
+    with open(catalog_path, "rb") as f:
+        raw_catalog = f.read()
+
+    # Touched but unchanged: the content hash still matches
+    if snapshot and snapshot["catalog"].version == hashlib.sha1(raw_catalog).hexdigest():
+        catalog = snapshot["catalog"]
+        logger.info(f"Loaded {len(catalog)} products from snapshot {snapshot_path}")
+    else:
+        catalog = Catalog.from_json_bytes(raw_catalog)
+        logger.info(f"Loaded {len(catalog)} products from {catalog_path}")
+
+    if use_snapshot:
+        _write_snapshot(snapshot_path, stat, catalog)
+    return catalog
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_reload_listeners: List[Callable[[Catalog], None]] = []
+
+def get_catalog() -> Catalog:
+    """Return the shared catalog, loading it on first use.
+
+    Callers should fetch the catalog once per request and pass it along, so a
+    request started before a reload finishes against the catalog it started with.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_catalog()
+    return _catalog
+
+def set_catalog(catalog: Catalog) -> None:
+    """Atomically replace the shared catalog and notify the reload listeners."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+    for listener in list(_reload_listeners):
+        try:
+            listener(catalog)
+        except Exception as e:
+            logger.error(f"Error in catalog reload listener: {str(e)}")
+
+def on_catalog_reload(listener: Callable[[Catalog], None]) -> None:
+    """Register a callback run with the new catalog after every swap."""
+    _reload_listeners.append(listener)
+
+def reload_catalog(catalog_path: Optional[str] = None) -> Optional[Catalog]:
+    """Rebuild the catalog and its indexes, then swap it in.
+
+    The shared catalog keeps serving requests while the new one is built.
+    Returns ``None`` if another reload is already running.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        logger.info("Catalog reload already in progress")
+        return None
+    try:
+        started = time.monotonic()
+        catalog = load_catalog(catalog_path)
+        if _catalog is not None and catalog.version == _catalog.version:
+            logger.info("Catalog unchanged, keeping the current one")
+            return _catalog
+        set_catalog(catalog)
+        logger.info(f"Reloaded catalog version {catalog.version[:12]} "
+                    f"({len(catalog)} products) in {time.monotonic() - started:.2f}s")
+        return catalog
+    except Exception as e:
+        logger.error(f"Error reloading catalog, keeping the current one: {str(e)}")
+        return None
+    finally:
+        _reload_lock.release()
+
+def is_reloading() -> bool:
+    """Whether a catalog reload is currently running."""
+    return _reload_lock.locked()
+
+def reload_catalog_async(catalog_path: Optional[str] = None) -> threading.Thread:
+    """Run reload_catalog on a background thread."""
+    thread = threading.Thread(target=reload_catalog, args=(catalog_path,),
+                              name="catalog-reload", daemon=True)
+    thread.start()
+    return thread
+
+class CatalogWatcher(threading.Thread):
+    """Polls the catalog file and reloads the catalog when it changes."""
+
+    def __init__(self, catalog_path: Optional[str] = None, interval: float = DEFAULT_WATCH_INTERVAL):
+        super().__init__(name="catalog-watcher", daemon=True)
+        self.catalog_path = catalog_path or resolve_catalog_path()
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def _signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.catalog_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def run(self) -> None:
+        last_seen = self._signature()
+        while not self._stop_event.wait(self.interval):
+            signature = self._signature()
+            if signature is None or signature == last_seen:
+                continue
+            # Wait for the file to stop changing before reloading a half-written catalog
+            if self._stop_event.wait(1.0) or self._signature() != signature:
+                continue
+            last_seen = signature
+            if _catalog is not None:
+                logger.info(f"Catalog file {self.catalog_path} changed, reloading")
+                reload_catalog(self.catalog_path)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+_watcher: Optional[CatalogWatcher] = None
+
+def start_catalog_watcher() -> Optional[CatalogWatcher]:
+    """Start the catalog file watcher once, unless disabled by configuration."""
+    global _watcher
+    interval = float(os.environ.get(WATCH_INTERVAL_ENV, DEFAULT_WATCH_INTERVAL))
+    if _watcher is None and interval > 0:
+        _watcher = CatalogWatcher(interval=interval)
+        _watcher.start()
+    return _watcher
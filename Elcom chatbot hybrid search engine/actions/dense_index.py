@@ -0,0 +1,139 @@
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# LSA embedding: character n-gram range, vocabulary size and embedding dimensions
+LSA_NGRAM_RANGE = (3, 5)
+LSA_MAX_FEATURES = 50000
+LSA_DIMENSIONS = 128
+# IVF index: catalogs smaller than this are searched exhaustively; otherwise about
+# sqrt(n) k-means clusters, of which the closest IVF_PROBES are searched per query
+IVF_MIN_PRODUCTS = 2000
+IVF_PROBES = 8
+KMEANS_ITERATIONS = 10
+RANDOM_SEED = 0
+
+def unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale every row to unit length, so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+class LSAEmbedder:
+    """Latent semantic embedding: character n-gram TF-IDF reduced with a truncated SVD.
+
+    Character n-grams make the embedding robust to typos and word forms
+    ("charging" / "charger"), and the SVD maps words that co-occur in
+    product texts close together. Any object with the same ``fit_transform``
+    and ``transform`` methods, e.g. a wrapper around a local sentence
+    embedding model, can be used by DenseIndex instead.
+    """
+
+    def __init__(self, dimensions: int = LSA_DIMENSIONS):
+        self.dimensions = dimensions
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=LSA_NGRAM_RANGE,
+                                          max_features=LSA_MAX_FEATURES, sublinear_tf=True, dtype=np.float32)
+        self.vocabulary = {}
+        # Embedding contribution of each n-gram: its idf times its SVD component
+        self.term_vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def fit_transform(self, texts: Sequence[str]) -> np.ndarray:
+        tfidf = self.vectorizer.fit_transform(texts)
+        self.vocabulary = self.vectorizer.vocabulary_
+        idf = self.vectorizer.idf_.astype(np.float32)
+        # Only needed for introspection, and it can be larger than the model itself
+        self.vectorizer.stop_words_ = None
+        dimensions = min(self.dimensions, tfidf.shape[0] - 1, tfidf.shape[1] - 1)
+        if dimensions < 1:
+            self.term_vectors = np.diag(idf)
+            return unit_rows(tfidf.toarray())
+        svd = TruncatedSVD(n_components=dimensions, random_state=RANDOM_SEED)
+        vectors = svd.fit_transform(tfidf)
+        self.term_vectors = np.ascontiguousarray((svd.components_ * idf).T, dtype=np.float32)
+        return unit_rows(vectors)
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        # Same as the TF-IDF transform followed by the SVD projection, up to a scale
+        # that unit_rows removes, but without building a sparse matrix per query
+        analyze = self.vectorizer.build_analyzer()
+        vectors = np.zeros((len(texts), self.term_vectors.shape[1]), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(self.vocabulary[ngram] for ngram in analyze(text) if ngram in self.vocabulary)
+            if counts:
+                term_ids = np.fromiter(counts, dtype=np.intp, count=len(counts))
+                tf = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                vectors[row] = tf @ self.term_vectors[term_ids]
+        return unit_rows(vectors)
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = KMEANS_ITERATIONS) -> np.ndarray:
+    """Unit-length centroids of ``n_clusters`` clusters of unit vectors, by cosine similarity."""
+    rng = np.random.RandomState(RANDOM_SEED)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)]
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        # Empty clusters keep their previous centroid
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = unit_rows(sums)
+    return centroids
+
+class DenseIndex:
+    """Dense product embeddings with an inverted-file (IVF) approximate nearest neighbour index.
+
+    Embeddings are unit-length float32 rows, so similarity is a dot product.
+    Products are clustered with spherical k-means and stored grouped by
+    cluster; a query is compared to the centroids first and then only to
+    the products of its closest clusters.
+    """
+
+    def __init__(self, texts: Sequence[str], embedder=None):
+        self.embedder = embedder if embedder is not None else LSAEmbedder()
+        # Variants of a series often share their whole text; embed each distinct text once
+        unique_texts: Dict[str, int] = {}
+        rows = [unique_texts.setdefault(text, len(unique_texts)) for text in texts]
+        vectors = self.embedder.fit_transform(list(unique_texts))
+        self.vectors: np.ndarray = np.ascontiguousarray(vectors[rows], dtype=np.float32)
+
+        self.centroids: Optional[np.ndarray] = None
+        n_products = len(self.vectors)
+        if n_products >= IVF_MIN_PRODUCTS:
+            self.centroids = spherical_kmeans(self.vectors, int(np.sqrt(n_products)))
+            assignment = np.argmax(self.vectors @ self.centroids.T, axis=1)
+            # Product ids grouped by cluster; cluster c holds list_ids[offsets[c]:offsets[c + 1]]
+            self.list_ids = np.argsort(assignment, kind="stable")
+            self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=len(self.centroids)))))
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def embed(self, query: str) -> np.ndarray:
+        """Unit-length embedding of a query."""
+        return self.embedder.transform([query])[0]
+
+    def similarities(self, query_vector: np.ndarray, product_ids: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a query embedding to the given products."""
+        return self.vectors[product_ids] @ query_vector
+
+    def search(self, query_vector: np.ndarray, k: int, probes: int = IVF_PROBES,
+               product_ids: Optional[np.ndarray] = None) -> Tuple[List[int], np.ndarray]:
+        """Ids and similarities of the ``k`` (approximately) nearest products, best first.
+
+        When ``product_ids`` is given, the nearest of those products are found exactly.
+        """
+        if product_ids is not None:
+            product_ids = np.asarray(product_ids, dtype=np.intp)
+        elif self.centroids is None:
+            product_ids = np.arange(len(self))
+        else:
+            closest = np.argsort(-(self.centroids @ query_vector))[:probes]
+            product_ids = np.concatenate([self.list_ids[self.offsets[c]:self.offsets[c + 1]] for c in closest])
+        similarities = self.similarities(query_vector, product_ids)
+        if len(product_ids) > k:
+            best = np.argpartition(-similarities, k - 1)[:k]
+            product_ids, similarities = product_ids[best], similarities[best]
+        order = np.lexsort((product_ids, -similarities))
+        return product_ids[order].tolist(), similarities[order]
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+
+from .product_index import IndexedProduct, normalize
+from .spec_parser import MOUNTING_TYPES, SPEC_IP_RATING, SPEC_MOUNTING, SPEC_STANDARD, parse_specs
+
+# Facets of every product
+FACET_CATEGORY = "category"
+FACET_MOUNTING = "mounting"
+FACET_IP_RATING = "ip_rating"
+FACET_STANDARD = "standard"
+FACET_CERTIFICATION = "certification"
+FACETS = (FACET_CATEGORY, FACET_MOUNTING, FACET_IP_RATING, FACET_STANDARD, FACET_CERTIFICATION)
+
+# "RoHS ( On Request )" -> "RoHS"; placeholders that are not certifications
+_ON_REQUEST_RE = re.compile(r"\(\s*on\s+request\s*\)", re.IGNORECASE)
+_MISSING_VALUES = {"", "n/a", "nan", "none"}
+
+def bitset(product_ids: Iterable[int]) -> int:
+    """Bitset with the bit of every product id set."""
+    ids = np.fromiter(product_ids, dtype=np.intp)
+    if not len(ids):
+        return 0
+    mask = np.zeros(int(ids.max()) + 1, dtype=bool)
+    mask[ids] = True
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+def bitset_ids(bits: int) -> np.ndarray:
+    """Product ids of the bits set in a bitset, ascending."""
+    if not bits:
+        return np.zeros(0, dtype=np.intp)
+    raw = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")).astype(np.intp)
+
+def popcount(bits: int) -> int:
+    """Number of bits set (int.bit_count needs Python 3.10)."""
+    return bin(bits).count("1")
+
+def product_facets(entry: IndexedProduct) -> Dict[str, Set[str]]:
+    """Facet values of one indexed product."""
+    product = entry.product
+    facets: Dict[str, Set[str]] = {facet: set() for facet in FACETS}
+    if entry.category:
+        facets[FACET_CATEGORY].add(entry.category)
+
+    mounting_words = set(normalize(str(product.get("mounting_type") or "")).split())
+    facets[FACET_MOUNTING].update(m for m in MOUNTING_TYPES if m in mounting_words)
+
+    # IP ratings, and mounting types missing from mounting_type ("Panel Mount Socket"), from the texts
+    for text in [entry.description] + [f for feature_list in entry.feature_lists for f in feature_list]:
+        for spec in parse_specs(text):
+            if spec.kind == SPEC_IP_RATING:
+                facets[FACET_IP_RATING].add(f"ip{spec.value}")
+            elif spec.kind == SPEC_MOUNTING:
+                facets[FACET_MOUNTING].add(spec.value)
+    reference = normalize(str(product.get("reference_standard") or ""))
+    facets[FACET_STANDARD].update(spec.value for spec in parse_specs(reference) if spec.kind == SPEC_STANDARD)
+
+    for certification in (product.get("compliance") or {}).get("standards", []):
+        certification = _ON_REQUEST_RE.sub("", str(certification)).strip().lower()
+        if certification not in _MISSING_VALUES:
+            facets[FACET_CERTIFICATION].add(certification)
+    return facets
+
+class FacetIndex:
+    """One bitset of product ids per facet value, built once at catalog load.
+
+    Bitsets are Python integers with bit ``i`` set for product ``i``, so
+    several constraints combine with ``&`` before any scoring, and the facet
+    counts of a result set are popcounts of its bitset ANDed with each value.
+    """
+
+    def __init__(self, facets_per_product: Sequence[Mapping[str, Iterable[str]]]):
+        self.size = len(facets_per_product)
+        postings: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        for product_id, facets in enumerate(facets_per_product):
+            for facet, values in facets.items():
+                for value in values:
+                    postings[facet].setdefault(value, []).append(product_id)
+        self.bitsets: Dict[str, Dict[str, int]] = {
+            facet: {value: bitset(ids) for value, ids in sorted(values.items())}
+            for facet, values in postings.items()
+        }
+        self.all = (1 << self.size) - 1
+
+    def values(self, facet: str) -> List[str]:
+        """Known values of a facet."""
+        return list(self.bitsets.get(facet, {}))
+
+    def matching(self, constraints: Mapping[str, str]) -> int:
+        """Bitset of the products having every ``facet: value`` constraint."""
+        bits = self.all
+        for facet, value in constraints.items():
+            bits &= self.bitsets.get(facet, {}).get(value, 0)
+        return bits
+
+    def filter(self, product_ids: np.ndarray, constraints: Mapping[str, str]) -> np.ndarray:
+        """The given products that have every constraint, in the same order."""
+        if not constraints:
+            return product_ids
+        allowed = bitset_ids(self.matching(constraints))
+        return product_ids[np.isin(product_ids, allowed, assume_unique=True)]
+
+    def counts(self, product_ids: Iterable[int], facets: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Number of the given products with each facet value, most common first, omitting zeros."""
+        bits = bitset(product_ids)
+        result: Dict[str, Dict[str, int]] = {}
+        for facet in facets or FACETS:
+            counts = [(value, popcount(bits & value_bits)) for value, value_bits in self.bitsets.get(facet, {}).items()]
+            result[facet] = {value: n for value, n in sorted(counts, key=lambda c: -c[1]) if n}
+        return result
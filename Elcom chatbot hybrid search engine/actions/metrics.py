@@ -0,0 +1,267 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Profile every search and keep the profile of those slower than this many
+# milliseconds (unset or 0 disables profiling); profiles are logged, or written
+# as .prof files to ELCOM_PROFILE_DIR when it is set
+PROFILE_SLOW_MS_ENV = "ELCOM_PROFILE_SLOW_MS"
+PROFILE_DIR_ENV = "ELCOM_PROFILE_DIR"
+PROFILE_TOP_FUNCTIONS = 25
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+# Samples recorded while deferring, e.g. in a search worker process: (metric name, labels, value)
+_local = threading.local()
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """Base class of the metrics, with optional labels and deferred recording."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _record(self, value: float, labels: Dict[str, Any]) -> None:
+        label_values = self._label_values(labels)
+        deferred = getattr(_local, "deferred", None)
+        if deferred is not None:
+            deferred.append((self.name, label_values, value))
+        else:
+            self._apply(label_values, value)
+
+    def _apply(self, label_values: LabelValues, value: float) -> None:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        self._record(amount, labels)
+
+    def _apply(self, label_values: LabelValues, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + value
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value:g}")
+        return lines
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last one is +Inf), sum and count
+        self._series: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        self._record(value, labels)
+
+    def _apply(self, label_values: LabelValues, value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for label_values, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {total:.6f}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Gauge(Metric):
+    """Value read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        try:
+            lines.append(f"{self.name} {float(self.read()):g}")
+        except Exception as e:
+            logger.error(f"Error reading gauge {self.name}: {str(e)}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            # Re-registering (e.g. on module reload) keeps the existing series
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        with self._lock:
+            # Gauges always read from the latest callback
+            gauge = self._metrics[name] = Gauge(name, help_text, read)
+        return gauge
+
+    def replay(self, samples: List[Tuple[str, LabelValues, float]]) -> None:
+        """Apply samples recorded under ``deferred_metrics``, e.g. by a worker process."""
+        for name, label_values, value in samples:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._apply(tuple(label_values), value)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# Search pipeline metrics
+SEARCH_SECONDS = registry.histogram(
+    "elcom_search_seconds", "End-to-end latency of product searches in the action")
+STAGE_SECONDS = registry.histogram(
+    "elcom_search_stage_seconds", "Latency of each search pipeline stage", labels=("stage",))
+SEARCHES = registry.counter("elcom_searches_total", "Product searches answered")
+EMPTY_SEARCHES = registry.counter("elcom_search_empty_results_total", "Product searches with no results")
+RESULTS_RETURNED = registry.counter("elcom_search_results_returned_total", "Products returned by searches")
+CANDIDATES_SCORED = registry.counter("elcom_search_candidates_scored_total", "Products scored by searches")
+CACHE_HITS = registry.counter("elcom_search_cache_hits_total", "Query cache hits", labels=("cache",))
+PART_NUMBER_HITS = registry.counter(
+    "elcom_search_part_number_hits_total", "Searches answered by exact part number lookup without scoring")
+SHARD_SEARCHES = registry.counter(
+    "elcom_search_shard_searches_total", "Scored searches by catalog shard routing", labels=("routing",))
+REJECTED_SEARCHES = registry.counter(
+    "elcom_search_rejected_total", "Searches answered with the busy response", labels=("reason",))
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Record the duration of a search pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+@contextmanager
+def deferred_metrics() -> Iterator[List[Tuple[str, LabelValues, float]]]:
+    """Collect this thread's samples instead of applying them, to replay them in another process."""
+    previous = getattr(_local, "deferred", None)
+    samples: List[Tuple[str, LabelValues, float]] = []
+    _local.deferred = samples
+    try:
+        yield samples
+    finally:
+        _local.deferred = previous
+
+def _profile_threshold() -> float:
+    try:
+        return float(os.environ.get(PROFILE_SLOW_MS_ENV) or 0) / 1000.0
+    except ValueError:
+        return 0.0
+
+@contextmanager
+def profile_if_slow(label: str) -> Iterator[None]:
+    """Profile the block and report the profile if it took longer than the threshold."""
+    threshold = _profile_threshold()
+    if threshold <= 0:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (e.g. in a concurrent search)
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        if elapsed >= threshold:
+            _report_profile(profiler, label, elapsed)
+
+def _report_profile(profiler: cProfile.Profile, label: str, elapsed: float) -> None:
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    try:
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f"search-{int(time.time() * 1000)}-{threading.get_ident()}.prof")
+            profiler.dump_stats(path)
+            logger.warning(f"Slow search ({elapsed * 1000:.1f} ms) {label!r}, profile written to {path}")
+        else:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            logger.warning(f"Slow search ({elapsed * 1000:.1f} ms) {label!r}:\n{output.getvalue()}")
+    except Exception as e:
+        logger.error(f"Error reporting search profile: {str(e)}")
@@ -0,0 +1,104 @@
+import re
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Words naming a product family rather than part of its code, e.g. "RS-1601 Series"
+_FAMILY_WORDS_RE = re.compile(r"\b(?:series|package)\b", re.IGNORECASE)
+# Separators between the codes of one product name, e.g. "RS-6/IRS-16 Series" or "MC -2/X-MT & MCE -2/X-MT"
+_CODE_SEPARATORS_RE = re.compile(r"[/&,;()\n]")
+# Hyphenated codes inside rating strings, e.g. "RS-6-5/ IRS-6-5 : 6A"
+_RATING_CODE_RE = re.compile(r"\b[A-Za-z][A-Za-z0-9]*(?:\s?-[A-Za-z0-9]+)+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]")
+# Longest code looked for in a query, in normalized words ("e 1ra 02ab 1hc1l" is four)
+MAX_CODE_WORDS = 6
+# Marks a trie node where a code ends; never a character of a code key
+_END = ""
+
+def code_key(code: str) -> str:
+    """Lookup key of a part number: lowercase letters and digits only, so "RS-1601" == "rs 1601"."""
+    return _NON_ALNUM_RE.sub("", code.lower())
+
+def is_part_number(key: str) -> bool:
+    """Whether a key looks like a model code (a letter first and at least one digit), not a word or a rating."""
+    return bool(key) and key[0].isalpha() and any(c.isdigit() for c in key)
+
+def product_codes(product: Dict[str, Any]) -> Iterator[str]:
+    """Part numbers of a product: its name, the codes embedded in it, and codes in its current rating."""
+    name = str(product.get("product_name", ""))
+    family = _FAMILY_WORDS_RE.sub(" ", name)
+    # The name up to any parenthesized or second-line note, e.g. "ERS-20 Series (ERS-2013, ERS-2015)"
+    yield re.split(r"[(\n]", family)[0].strip()
+    for chunk in _CODE_SEPARATORS_RE.split(family):
+        chunk = chunk.strip()
+        if chunk and (any(c.isdigit() for c in chunk) or "-" in chunk):
+            yield chunk
+    yield from _RATING_CODE_RE.findall(str(product.get("rated_current", "")))
+
+class PartNumberIndex:
+    """Exact part-number lookup (hash map) and prefix completion (trie) over normalized code keys."""
+
+    def __init__(self, products: Sequence[Dict[str, Any]]):
+        # Code key -> product ids, and the code as first written in the catalog
+        self.products_by_code: Dict[str, List[int]] = {}
+        self.labels: Dict[str, str] = {}
+        for product_id, product in enumerate(products):
+            for code in product_codes(product):
+                key = code_key(code)
+                if not key:
+                    continue
+                product_ids = self.products_by_code.setdefault(key, [])
+                if product_id not in product_ids:
+                    product_ids.append(product_id)
+                self.labels.setdefault(key, " ".join(code.split()).strip(" -."))
+
+        # Character trie over the keys: nested dicts, with _END holding the key that ends there
+        self.trie: Dict[str, Any] = {}
+        for key in self.products_by_code:
+            node = self.trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[_END] = key
+
+    def __len__(self) -> int:
+        return len(self.products_by_code)
+
+    def lookup(self, code: str) -> List[int]:
+        """Ids of the products with this exact part number, in catalog order."""
+        return self.products_by_code.get(code_key(code), [])
+
+    def find_in_query(self, query: str) -> List[str]:
+        """Keys of the part numbers in a normalized query, longest match first at each word, in query order."""
+        words = query.split()
+        keys = []
+        start = 0
+        while start < len(words):
+            for end in range(min(len(words), start + MAX_CODE_WORDS), start, -1):
+                key = "".join(words[start:end])
+                if key in self.products_by_code and is_part_number(key):
+                    keys.append(key)
+                    start = end
+                    break
+            else:
+                start += 1
+        return keys
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, List[int]]]:
+        """Up to ``limit`` part numbers starting with ``prefix``, shortest then alphabetical, with their product ids."""
+        node = self.trie
+        for char in code_key(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        # Breadth-first, so exact and shorter codes come before their longer extensions
+        completions = []
+        level = [node]
+        while level and len(completions) < limit:
+            next_level = []
+            for current in level:
+                for char in sorted(current):
+                    if char == _END:
+                        key = current[_END]
+                        completions.append((self.labels[key], self.products_by_code[key]))
+                    else:
+                        next_level.append(current[char])
+            level = next_level
+        return completions[:limit]
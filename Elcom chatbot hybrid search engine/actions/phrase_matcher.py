@@ -0,0 +1,144 @@
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .vocabulary import ATTRIBUTE_SYNONYMS, PRODUCT_CATEGORIES
+
+# Query substrings that decide the category before any keyword, in priority order
+# (e.g. "ev" anywhere in the query means an EV connector)
+CATEGORY_HINTS = [
+    ("ev_connector", ["ev", "electric vehicle"]),
+    ("industrial_connector", ["industrial"]),
+    ("solar_connector", ["solar", "pv"]),
+    ("nema_connector", ["nema"]),
+]
+
+class AhoCorasick:
+    """Aho-Corasick automaton finding every occurrence of many patterns in one pass."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+        # Trie transitions, failure links and the patterns ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (pattern_id,)
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                # A state also reports every pattern ending at its longest proper suffix
+                self._output[next_state] += self._output[fail]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield ``(start, end, pattern)`` for every, possibly overlapping, occurrence."""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                pattern = patterns[pattern_id]
+                yield end - len(pattern), end, pattern
+
+class VocabularyMatcher:
+    """Tags normalized text with categories and attributes using one automaton.
+
+    Every category keyword, attribute synonym and category hint is compiled
+    into a single Aho-Corasick automaton, so a description or query is
+    scanned once instead of once per keyword.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], synonyms: Dict[str, List[str]],
+                 hints: List[Tuple[str, List[str]]]):
+        self.category_order = {category: i for i, category in enumerate(categories)}
+        # Pattern -> categories in priority order / attributes / (hint priority, category)
+        self.keyword_categories: Dict[str, List[str]] = {}
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                if category not in self.keyword_categories.setdefault(keyword, []):
+                    self.keyword_categories[keyword].append(category)
+        self.synonym_attributes: Dict[str, List[str]] = {}
+        for attribute, words in synonyms.items():
+            for word in words:
+                self.synonym_attributes.setdefault(word, []).append(attribute)
+        self.hint_categories: Dict[str, Tuple[int, str]] = {}
+        for priority, (category, words) in enumerate(hints):
+            for word in words:
+                self.hint_categories.setdefault(word, (priority, category))
+        self.automaton = AhoCorasick(
+            list(self.keyword_categories) + list(self.synonym_attributes) + list(self.hint_categories))
+
+    @classmethod
+    def from_vocabulary(cls) -> "VocabularyMatcher":
+        return cls(PRODUCT_CATEGORIES, ATTRIBUTE_SYNONYMS, CATEGORY_HINTS)
+
+    def categorize(self, text: str) -> Optional[str]:
+        """First category, in priority order, with a keyword anywhere in ``text``."""
+        best = None
+        for _, _, pattern in self.automaton.find_all(text):
+            for category in self.keyword_categories.get(pattern, ()):
+                if best is None or self.category_order[category] < self.category_order[best]:
+                    best = category
+        return best
+
+    def tag_query(self, query: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Category and attributes of a normalized, space-separated query.
+
+        A category hint anywhere in the query wins. Otherwise the category
+        keyword phrase starting at the earliest word wins, longest phrase
+        first. Attributes come from whole-word synonym matches.
+        """
+        # Word number at each character, to locate whole-word matches
+        word_at = []
+        word = 0
+        for char in query:
+            word_at.append(word)
+            if char == " ":
+                word += 1
+
+        hint = None
+        keyword_match = None  # (start word, -phrase length, category priority, category)
+        attributes: Dict[str, Any] = {}
+        for start, end, pattern in self.automaton.find_all(query):
+            hint_category = self.hint_categories.get(pattern)
+            if hint_category and (hint is None or hint_category < hint):
+                hint = hint_category
+            whole_word = (start == 0 or query[start - 1] == " ") and (end == len(query) or query[end] == " ")
+            if not whole_word:
+                continue
+            for attribute in self.synonym_attributes.get(pattern, ()):
+                attributes[attribute] = True
+            categories = self.keyword_categories.get(pattern)
+            if categories:
+                category = categories[0]
+                key = (word_at[start], -(pattern.count(" ") + 1), self.category_order[category], category)
+                if keyword_match is None or key < keyword_match:
+                    keyword_match = key
+
+        if hint:
+            return hint[1], attributes
+        return (keyword_match[3] if keyword_match else None), attributes
+
+# Shared matcher for the built-in vocabulary
+vocabulary_matcher = VocabularyMatcher.from_vocabulary()
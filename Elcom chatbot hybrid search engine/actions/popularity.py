@@ -0,0 +1,183 @@
+import atexit
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import PROJECT_DIR, is_disabled
+
+logger = logging.getLogger(__name__)
+
+# SQLite file shared by every action server process ("off" keeps counts in memory only)
+POPULARITY_DB_ENV = "ELCOM_POPULARITY_DB"
+DEFAULT_POPULARITY_DB = os.path.join(PROJECT_DIR, "search_popularity.sqlite3")
+# Seconds between batched writes of new counts to the database
+FLUSH_INTERVAL_ENV = "ELCOM_POPULARITY_FLUSH_INTERVAL"
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Number of popular products tracked
+TOP_K = 5
+# Rebuild the heap from the counts once stale entries make up this many times the live ones
+HEAP_COMPACT_RATIO = 4
+
+class PopularityTracker:
+    """Counts searched products and keeps the most popular ones.
+
+    Every count change pushes a new entry onto a max-heap in O(log n) and
+    leaves the old one behind; ``top`` skips entries that no longer match the
+    current count, and the heap is rebuilt once stale entries pile up. Counts
+    are written to SQLite in batches on a background thread, as increments,
+    so several action server processes can share one database. The table is
+    read whole once at start; each flush then re-reads the shared top
+    ``top_k`` and the totals of the products it wrote, so the most popular
+    products include every process's searches.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, top_k: int = TOP_K,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.top_k = top_k
+        self.flush_interval = flush_interval
+        self._counts: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        # (-count, name) entries, including stale ones of products counted again since
+        self._heap: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if db_path:
+            try:
+                self._init_db()
+                self._load()
+            except sqlite3.Error as e:
+                logger.error(f"Error opening popularity database {db_path}, counting in memory: {str(e)}")
+                self.db_path = None
+
+    @classmethod
+    def from_env(cls) -> "PopularityTracker":
+        """Build a tracker configured from environment variables."""
+        db_path = os.environ.get(POPULARITY_DB_ENV, DEFAULT_POPULARITY_DB)
+        if is_disabled(db_path):
+            db_path = None
+        return cls(db_path=db_path,
+                   flush_interval=float(os.environ.get(FLUSH_INTERVAL_ENV, DEFAULT_FLUSH_INTERVAL)))
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=10.0)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _init_db(self) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS search_popularity ("
+                "product_name TEXT PRIMARY KEY, search_count INTEGER NOT NULL)")
+
+    def _load(self) -> None:
+        """Start counting from the database totals."""
+        connection = self._connect()
+        try:
+            rows = connection.execute("SELECT product_name, search_count FROM search_popularity").fetchall()
+        finally:
+            connection.close()
+        with self._lock:
+            self._counts = dict(rows)
+            self._rebuild_heap()
+
+    def record(self, product_name: str) -> None:
+        """Count one search that returned ``product_name`` first."""
+        with self._lock:
+            count = self._counts.get(product_name, 0) + 1
+            self._counts[product_name] = count
+            if self.db_path:
+                self._pending[product_name] = self._pending.get(product_name, 0) + 1
+            self._push(product_name, count)
+        self._start_flusher()
+
+    def _push(self, product_name: str, count: int) -> None:
+        heapq.heappush(self._heap, (-count, product_name))
+        if len(self._heap) > HEAP_COMPACT_RATIO * max(len(self._counts), self.top_k):
+            self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(-count, name) for name, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def top(self) -> List[Tuple[str, int]]:
+        """The most popular product names and their counts, most popular first."""
+        with self._lock:
+            top: List[Tuple[str, int]] = []
+            while self._heap and len(top) < self.top_k:
+                negative_count, name = heapq.heappop(self._heap)
+                # Counts only grow, so an entry below the current count is stale for good
+                if -negative_count == self._counts.get(name) and (not top or top[-1][0] != name):
+                    top.append((name, -negative_count))
+            for name, count in top:
+                heapq.heappush(self._heap, (-count, name))
+            return top
+
+    def flush(self) -> None:
+        """Write the pending increments in one transaction and refresh the shared totals.
+
+        The refreshed totals are those of the most searched products across
+        all processes, and of the products just written.
+        """
+        if not self.db_path:
+            return
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            try:
+                connection = self._connect()
+                try:
+                    with connection:
+                        if pending:
+                            connection.executemany(
+                                "INSERT OR IGNORE INTO search_popularity (product_name, search_count) VALUES (?, 0)",
+                                [(name,) for name in pending])
+                            connection.executemany(
+                                "UPDATE search_popularity SET search_count = search_count + ? WHERE product_name = ?",
+                                [(delta, name) for name, delta in pending.items()])
+                        totals = dict(connection.execute(
+                            "SELECT product_name, search_count FROM search_popularity "
+                            "ORDER BY search_count DESC LIMIT ?", (self.top_k,)).fetchall())
+                        for name in pending:
+                            totals[name] = connection.execute(
+                                "SELECT search_count FROM search_popularity WHERE product_name = ?",
+                                (name,)).fetchone()[0]
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error saving search popularity: {str(e)}")
+                # Keep the increments for the next attempt
+                with self._lock:
+                    for name, delta in pending.items():
+                        self._pending[name] = self._pending.get(name, 0) + delta
+                return
+            with self._lock:
+                for name, total in totals.items():
+                    # Searches recorded during the write are still pending on top of the total
+                    count = total + self._pending.get(name, 0)
+                    if count > self._counts.get(name, 0):
+                        self._counts[name] = count
+                        self._push(name, count)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None or not self.db_path:
+            return
+        with self._flush_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="popularity-flush", daemon=True)
+                self._flusher.start()
+                atexit.register(self.close)
+
+    def _flush_loop(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the background writer and write the remaining increments."""
+        self._stop_event.set()
+        self.flush()
@@ -0,0 +1,237 @@
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from .bm25_index import BM25Index, restrict_scores, top_k
+from .dense_index import DenseIndex
+from .spec_index import Rating, SpecIndex, parse_current_ratings, parse_voltage_ratings
+from .vocabulary import PRODUCT_CATEGORIES
+
+_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Character n-gram size used by the inverted index
+NGRAM_SIZE = 3
+# A whole-token hit counts this many times more than a single n-gram hit
+TOKEN_HIT_WEIGHT = 3
+# Fields that can be fuzzy matched against a query
+FUZZY_FIELDS = ("name", "description", "search_field")
+# Weight of each field's term counts in the BM25 index
+BM25_FIELD_WEIGHTS = {"name": 2.0, "description": 1.0, "features": 1.0, "standards": 0.5}
+# BM25 score given to products of the query's category, so they fill candidate slots after text matches
+CATEGORY_CANDIDATE_SCORE = 1e-3
+
+def normalize(text: str) -> str:
+    """Enhanced text normalization with special character handling."""
+    # Remove special characters but keep spaces and numbers
+    text = _NON_ALNUM_RE.sub(" ", text.lower())
+    # Replace multiple spaces with single space
+    text = _WHITESPACE_RE.sub(" ", text)
+    return text.strip()
+
+def char_ngrams(token: str, n: int = NGRAM_SIZE) -> Set[str]:
+    """Return the character n-grams of a token (the token itself if shorter)."""
+    if len(token) <= n:
+        return {token}
+    return {token[i:i + n] for i in range(len(token) - n + 1)}
+
+def weighted_fuzzy_scores(queries: Sequence[str], fields: Mapping[str, Sequence[str]],
+                          weights: Mapping[str, float], workers: int = -1) -> np.ndarray:
+    """Score every query against every product with one cdist call per field.
+
+    ``fields`` maps a field name to the normalized value of that field for
+    each product. Returns a ``(len(queries), n_products)`` array holding the
+    weighted sum of ``token_sort_ratio / 100`` over the weighted fields.
+    """
+    n_products = len(next(iter(fields.values()))) if fields else 0
+    scores = np.zeros((len(queries), n_products))
+    for field, weight in weights.items():
+        if not weight:
+            continue
+        matrix = process.cdist(queries, fields[field], scorer=fuzz.token_sort_ratio,
+                               dtype=np.float64, workers=workers)
+        scores += matrix * (weight / 100)
+    return scores
+
+class IndexedProduct:
+    """Pre-normalized, pre-parsed view of a single catalog product."""
+
+    __slots__ = (
+        "product_id", "product", "category", "name", "description", "search_field",
+        "name_tokens", "description_tokens", "search_tokens",
+        "feature_lists", "standards", "voltage_ratings", "current_ratings",
+    )
+
+    def __init__(self, product_id: int, product: Dict[str, Any]):
+        self.product_id = product_id
+        self.product = product
+        self.category = product.get("category")
+
+        # Text fields, normalized once
+        self.name = normalize(product.get("product_name", ""))
+        self.description = normalize(product.get("description", ""))
+        self.search_field = normalize(product.get("search_field", ""))
+
+        # Per-field token sets
+        self.name_tokens: Set[str] = set(self.name.split())
+        self.description_tokens: Set[str] = set(self.description.split())
+        self.search_tokens: Set[str] = set(self.search_field.split())
+
+        # Feature values and compliance standards
+        self.feature_lists: List[List[str]] = []
+        for feature_list in (product.get("other_features") or {}).values():
+            if isinstance(feature_list, list):
+                self.feature_lists.append([normalize(str(f)) for f in feature_list])
+        compliance = product.get("compliance") or {}
+        self.standards: List[str] = [normalize(str(s)) for s in compliance.get("standards", [])]
+
+        # Numeric ratings
+        self.voltage_ratings: List[Rating] = parse_voltage_ratings(product.get("rated_voltage", ""))
+        self.current_ratings: List[Rating] = parse_current_ratings(product.get("rated_current", ""))
+
+    def all_tokens(self) -> Set[str]:
+        """Every token that can make this product a search candidate."""
+        tokens = self.name_tokens | self.description_tokens | self.search_tokens
+        for feature_list in self.feature_lists:
+            for feature in feature_list:
+                tokens.update(feature.split())
+        for standard in self.standards:
+            tokens.update(standard.split())
+        return tokens
+
+class ProductIndex:
+    """Search index built once from the product catalog."""
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.entries: List[IndexedProduct] = [
+            IndexedProduct(product_id, product) for product_id, product in enumerate(products)
+        ]
+
+        # Inverted indexes: token / character n-gram / category -> product ids
+        self.token_postings: Dict[str, List[int]] = defaultdict(list)
+        self.ngram_postings: Dict[str, List[int]] = defaultdict(list)
+        self.category_postings: Dict[str, List[int]] = defaultdict(list)
+        for entry in self.entries:
+            tokens = entry.all_tokens()
+            ngrams = set()
+            for token in tokens:
+                self.token_postings[token].append(entry.product_id)
+                ngrams.update(char_ngrams(token))
+            for ngram in ngrams:
+                self.ngram_postings[ngram].append(entry.product_id)
+            if entry.category:
+                self.category_postings[entry.category].append(entry.product_id)
+        self.token_postings = dict(self.token_postings)
+        self.ngram_postings = dict(self.ngram_postings)
+        self.category_postings = dict(self.category_postings)
+
+        # Numeric rating indexes for range filters and proximity scoring
+        self.voltage_index = SpecIndex([entry.voltage_ratings for entry in self.entries])
+        self.current_index = SpecIndex([entry.current_ratings for entry in self.entries])
+
+        # Sparse BM25 retrieval over names, descriptions, feature values and standards
+        self.bm25 = BM25Index({
+            "name": [entry.name for entry in self.entries],
+            "description": [entry.description for entry in self.entries],
+            "features": [" ".join(f for feature_list in entry.feature_lists for f in feature_list)
+                         for entry in self.entries],
+            "standards": [" ".join(entry.standards) for entry in self.entries],
+        }, BM25_FIELD_WEIGHTS)
+
+        # Dense semantic embeddings of what a product is, not its part number (left to
+        # BM25 and fuzzy matching); the category keywords let descriptive queries
+        # ("charging connector") reach products whose texts never use those words
+        self.dense = DenseIndex([
+            " ".join([entry.description] + PRODUCT_CATEGORIES.get(entry.category, [])
+                     + [f for feature_list in entry.feature_lists for f in feature_list])
+            for entry in self.entries
+        ])
+
+        # Column-wise field values for batched fuzzy scoring
+        self.field_values: Dict[str, np.ndarray] = {
+            field: np.array([getattr(entry, field) for entry in self.entries], dtype=object)
+            for field in FUZZY_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[IndexedProduct]:
+        return iter(self.entries)
+
+    def __getitem__(self, product_id: int) -> IndexedProduct:
+        return self.entries[product_id]
+
+    def positions(self, product_ids: np.ndarray) -> np.ndarray:
+        """Rows of the given products in this index's BM25 and rating indexes (their ids)."""
+        return product_ids
+
+    def global_ids(self, positions: np.ndarray) -> np.ndarray:
+        """Product ids of rows of this index's BM25 and rating indexes (the rows themselves)."""
+        return positions
+
+    def candidates(self, query: str, category: Optional[str] = None,
+                   max_candidates: int = 200, min_candidates: int = 20,
+                   shard: Optional[str] = None, product_ids: Optional[np.ndarray] = None) -> Optional[List[int]]:
+        """Return the ids of the products worth scoring for a normalized query.
+
+        Products are ranked by how many query tokens and character n-grams
+        they share with the query, and only the best ``max_candidates`` are
+        kept, in catalog order. ``shard`` limits them to the products of one
+        category, and ``product_ids`` to the given products. Returns ``None``
+        when fewer than ``min_candidates`` products match, in which case the
+        caller should fall back to a full scan.
+        """
+        hits: Counter = Counter()
+        for token in set(query.split()):
+            for _ in range(TOKEN_HIT_WEIGHT):
+                hits.update(self.token_postings.get(token, ()))
+            for ngram in char_ngrams(token):
+                hits.update(self.ngram_postings.get(ngram, ()))
+        if category:
+            # Category matches score well even without any shared token
+            hits.update(self.category_postings.get(category, ()))
+        if shard is not None:
+            hits = Counter({i: n for i, n in hits.items() if self.entries[i].category == shard})
+        if product_ids is not None:
+            allowed = set(product_ids.tolist())
+            hits = Counter({i: n for i, n in hits.items() if i in allowed})
+
+        if len(hits) < min_candidates:
+            return None
+        # Keep catalog order so ties rank the same as in a full scan
+        return sorted(product_id for product_id, _ in hits.most_common(max_candidates))
+
+    def bm25_candidates(self, query: str, category: Optional[str] = None,
+                        max_candidates: int = 200, min_candidates: int = 20,
+                        product_ids: Optional[np.ndarray] = None) -> Optional[List[int]]:
+        """Return the ids of the ``max_candidates`` best BM25 matches of a normalized query, in catalog order.
+
+        Products of ``category`` rank right after products sharing a query term,
+        and ``product_ids`` limits the candidates to the given products.
+        Returns ``None`` when fewer than ``min_candidates`` products share a term,
+        e.g. for misspelled part numbers, so the caller can fall back to n-grams.
+        """
+        scores = restrict_scores(self.bm25.scores(query), product_ids)
+        if np.count_nonzero(scores) < min_candidates:
+            return None
+        if category:
+            boosted = self.category_postings.get(category, [])
+            if product_ids is not None:
+                boosted = np.intersect1d(boosted, product_ids)
+            scores[boosted] += CATEGORY_CANDIDATE_SCORE
+        return top_k(scores, max_candidates)
+
+    def fuzzy_scores(self, query: str, product_ids: np.ndarray,
+                     weights: Mapping[str, float], workers: int = -1) -> np.ndarray:
+        """Weighted fuzzy scores of ``query`` against the given products."""
+        return self.fuzzy_score_matrix([query], product_ids, weights, workers=workers)[0]
+
+    def fuzzy_score_matrix(self, queries: Sequence[str], product_ids: np.ndarray,
+                           weights: Mapping[str, float], workers: int = -1) -> np.ndarray:
+        """Weighted fuzzy scores of many queries against the given products, one row per query."""
+        fields = {field: values[product_ids] for field, values in self.field_values.items()}
+        return weighted_fuzzy_scores(queries, fields, weights, workers=workers)
@@ -0,0 +1,62 @@
+import base64
+import binascii
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Tracker slot holding the ranked result set of the conversation's last search
+RESULT_SET_SLOT = "search_results"
+# Decimals kept of each score in the slot; enough to preserve the ranking order
+SCORE_DECIMALS = 4
+
+class RankedResults(NamedTuple):
+    """Product ids of a search, best first, with their relevance scores.
+
+    ``relaxed_facets`` are the (facet, value) constraints of the query that no
+    product met, which the search then had to drop to answer at all.
+    """
+    ids: List[int]
+    scores: List[float]
+    relaxed_facets: Tuple[Tuple[str, str], ...] = ()
+
+class ResultSet(NamedTuple):
+    """A conversation's last result set: the query it answered and how many products were shown."""
+    query: str
+    results: RankedResults
+    offset: int
+    catalog_version: str
+
+def to_slot(result_set: ResultSet) -> Dict[str, Any]:
+    """Compact, JSON-serializable slot value of a result set."""
+    return {
+        "query": result_set.query,
+        "ids": [int(i) for i in result_set.results.ids],
+        "scores": [round(float(s), SCORE_DECIMALS) for s in result_set.results.scores],
+        "offset": result_set.offset,
+        "catalog_version": result_set.catalog_version,
+    }
+
+def from_slot(value: Any) -> Optional[ResultSet]:
+    """Result set stored by to_slot, or None when the slot is empty or malformed."""
+    if not isinstance(value, dict):
+        return None
+    try:
+        ids = [int(i) for i in value["ids"]]
+        scores = [float(s) for s in value["scores"]]
+        if len(ids) != len(scores):
+            return None
+        return ResultSet(str(value["query"]), RankedResults(ids, scores),
+                         int(value.get("offset", 0)), str(value["catalog_version"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def encode_cursor(catalog_version: str, offset: int) -> str:
+    """Opaque cursor of the page of results starting at ``offset``."""
+    return base64.urlsafe_b64encode(f"{catalog_version}:{offset}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """Catalog version and offset of a cursor from encode_cursor, or None when it is malformed."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        catalog_version, offset = decoded.rsplit(":", 1)
+        return catalog_version, max(int(offset), 0)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
@@ -0,0 +1,194 @@
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .catalog import get_catalog
+
+logger = logging.getLogger(__name__)
+
+# Search backend: "thread" (default) or "process" (forked workers, one per core by default)
+BACKEND_ENV = "ELCOM_SEARCH_BACKEND"
+PROCESSES_ENV = "ELCOM_SEARCH_PROCESSES"
+
+# Worker threads, maximum searches queued or running, and per-search timeout in seconds
+POOL_SIZE_ENV = "ELCOM_SEARCH_POOL_SIZE"
+QUEUE_LIMIT_ENV = "ELCOM_SEARCH_QUEUE_LIMIT"
+TIMEOUT_ENV = "ELCOM_SEARCH_TIMEOUT"
+DEFAULT_POOL_SIZE = 4
+DEFAULT_QUEUE_LIMIT = 32
+DEFAULT_TIMEOUT = 5.0
+
+class SearchOverloaded(Exception):
+    """Raised when too many searches are already queued or running."""
+
+class SearchExecutor:
+    """Runs CPU-bound searches off the event loop with backpressure and a timeout.
+
+    A search that times out keeps its worker busy until it finishes, so it
+    still counts against the queue limit; this keeps a burst of slow queries
+    from piling up unbounded work behind the pool.
+    """
+
+    uses_processes = False
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, queue_limit: int = DEFAULT_QUEUE_LIMIT,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.pool_size = pool_size
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._executor: Optional[Executor] = self._create_executor()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _create_executor(self) -> Optional[Executor]:
+        return ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="search")
+
+    @classmethod
+    def from_env(cls) -> "SearchExecutor":
+        """Build an executor configured from environment variables."""
+        return cls(
+            pool_size=int(os.environ.get(POOL_SIZE_ENV, DEFAULT_POOL_SIZE)),
+            queue_limit=int(os.environ.get(QUEUE_LIMIT_ENV, DEFAULT_QUEUE_LIMIT)),
+            timeout=float(os.environ.get(TIMEOUT_ENV, DEFAULT_TIMEOUT)),
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of searches queued or running."""
+        return self._pending
+
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def start(self) -> None:
+        """Create the workers now rather than on the first search."""
+
+    async def _get_executor(self) -> Executor:
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run ``fn(*args)`` on the pool.
+
+        Raises ``SearchOverloaded`` when the queue is full and
+        ``asyncio.TimeoutError`` when the search takes longer than the timeout.
+        """
+        executor = await self._get_executor()
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                raise SearchOverloaded(f"{self._pending} searches already pending")
+            self._pending += 1
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+def _load_catalog() -> None:
+    """Worker initializer of pools started from the fork server: load the catalog before the first search."""
+    get_catalog()
+
+def _ready() -> None:
+    """No-op task that makes a pool start its workers."""
+
+class ProcessSearchExecutor(SearchExecutor):
+    """Runs searches on worker processes forked after the catalog is built.
+
+    The workers inherit the parent's catalog and indexes as copy-on-write
+    memory pages (``gc.freeze`` keeps the garbage collector from touching
+    them), so scoring scales across cores without the GIL and without
+    copying the catalog. Only the query and the ranked product ids cross the
+    process boundary.
+
+    Forking is only safe while no other thread exists, since a child would
+    inherit any lock another thread holds, so ``start`` is called before the
+    server starts its background threads. The pool is replaced when the
+    catalog is reloaded; by then threads are running, so the new workers
+    come from a fork server and load the catalog themselves.
+    """
+
+    uses_processes = True
+
+    def __init__(self, processes: Optional[int] = None, queue_limit: int = DEFAULT_QUEUE_LIMIT,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self._catalog_version: Optional[str] = None
+        self._fork_lock = threading.Lock()
+        super().__init__(pool_size=processes or os.cpu_count() or 1, queue_limit=queue_limit, timeout=timeout)
+
+    @classmethod
+    def from_env(cls) -> "ProcessSearchExecutor":
+        processes = os.environ.get(PROCESSES_ENV)
+        return cls(
+            processes=int(processes) if processes else None,
+            queue_limit=int(os.environ.get(QUEUE_LIMIT_ENV, DEFAULT_QUEUE_LIMIT)),
+            timeout=float(os.environ.get(TIMEOUT_ENV, DEFAULT_TIMEOUT)),
+        )
+
+    def _create_executor(self) -> Optional[Executor]:
+        # Forked lazily, once the catalog exists
+        return None
+
+    def _fork_pool(self) -> Executor:
+        catalog = get_catalog()
+        with self._fork_lock:
+            if self._executor is None or self._catalog_version != catalog.version:
+                old_executor = self._executor
+                # Objects frozen for an earlier pool, e.g. the previous catalog, become collectable again
+                gc.unfreeze()
+                if threading.active_count() == 1:
+                    gc.collect()
+                    # Keep the collector from dirtying shared pages in the children
+                    gc.freeze()
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size, mp_context=multiprocessing.get_context("fork"))
+                    # Fork every worker now, while this is still the only thread
+                    executor.submit(_ready).result()
+                    start_method = "fork"
+                else:
+                    threads = ", ".join(t.name for t in threading.enumerate() if t is not threading.main_thread())
+                    # Expected on catalog reloads; on the first pool it costs the shared catalog memory
+                    log = logger.info if old_executor is not None else logger.warning
+                    log(f"Threads are running ({threads}), so search workers come from a fork server "
+                        f"and each loads its own copy of the catalog")
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.pool_size, mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=_load_catalog)
+                    start_method = "fork server"
+                self._executor = executor
+                self._catalog_version = catalog.version
+                if old_executor is not None:
+                    old_executor.shutdown(wait=False)
+                logger.info(f"Search worker pool of {self.pool_size} processes ({start_method}) ready "
+                            f"for catalog version {catalog.version[:12]}")
+            return self._executor
+
+    def start(self) -> None:
+        self._fork_pool()
+
+    async def _get_executor(self) -> Executor:
+        if self._executor is not None and self._catalog_version == get_catalog().version:
+            return self._executor
+        # Loading the catalog and forking can be slow; keep the event loop free
+        return await asyncio.get_running_loop().run_in_executor(None, self._fork_pool)
+
+def create_search_executor() -> SearchExecutor:
+    """Create the search executor selected by ELCOM_SEARCH_BACKEND."""
+    backend = os.environ.get(BACKEND_ENV, "thread").lower()
+    if backend == "process":
+        if {"fork", "forkserver"} <= set(multiprocessing.get_all_start_methods()):
+            return ProcessSearchExecutor.from_env()
+        logger.warning("Process search backend needs fork(); falling back to threads")
+    elif backend != "thread":
+        logger.warning(f"Unknown search backend {backend!r}; using threads")
+    return SearchExecutor.from_env()
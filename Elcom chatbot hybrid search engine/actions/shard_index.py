@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .bm25_index import restrict_scores, top_k
+from .product_index import CATEGORY_CANDIDATE_SCORE, ProductIndex
+from .spec_index import SpecIndex
+
+# Search only the detected category's shard when it holds at least this share of the query's BM25 term weight
+ROUTING_CONFIDENCE = 0.8
+
+class CategoryShard:
+    """The products of one category, with their own BM25 rows and rating indexes.
+
+    Shard indexes are addressed by position in ``ids`` (ascending product
+    ids); ``positions`` and ``global_ids`` convert between the two, so a
+    shard can stand in for the whole ProductIndex when scoring.
+    """
+
+    def __init__(self, category: str, product_ids: np.ndarray, index: ProductIndex):
+        self.category = category
+        self.ids = product_ids
+        self.bm25 = index.bm25.rows(product_ids)
+        self.voltage_index = SpecIndex([index[i].voltage_ratings for i in product_ids])
+        self.current_index = SpecIndex([index[i].current_ratings for i in product_ids])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def positions(self, product_ids: np.ndarray) -> np.ndarray:
+        """Positions of products of this shard in its indexes."""
+        return np.searchsorted(self.ids, product_ids)
+
+    def global_ids(self, positions: np.ndarray) -> np.ndarray:
+        """Product ids of positions in this shard's indexes."""
+        return self.ids[positions]
+
+    def bm25_candidates(self, query: str, category: Optional[str] = None,
+                        max_candidates: int = 200, min_candidates: int = 20,
+                        product_ids: Optional[np.ndarray] = None) -> Optional[List[int]]:
+        """ProductIndex.bm25_candidates within this shard, as product ids in catalog order."""
+        positions = None if product_ids is None else self.positions(product_ids)
+        scores = restrict_scores(self.bm25.scores(query), positions)
+        if np.count_nonzero(scores) < min_candidates:
+            return None
+        if category == self.category:
+            scores = restrict_scores(scores + CATEGORY_CANDIDATE_SCORE, positions)
+        return self.ids[top_k(scores, max_candidates)].tolist()
+
+class ShardedIndex:
+    """The catalog partitioned into one shard per category, with query routing.
+
+    A query is routed to the shard of its detected category when most of
+    its BM25 term weight falls in that shard. Other queries fan out to every
+    shard, which is the catalog-wide ProductIndex: shard BM25 rows keep the
+    catalog's idf, so merging every shard's top candidates would give exactly
+    the catalog-wide top candidates, only with one mat-vec per shard.
+    """
+
+    def __init__(self, index: ProductIndex):
+        self.bm25 = index.bm25
+        categories = np.array([entry.category for entry in index], dtype=object)
+        self.shards: Dict[str, CategoryShard] = {
+            category: CategoryShard(category, np.flatnonzero(categories == category).astype(np.intp), index)
+            for category in sorted(set(categories))
+        }
+        self.names = list(self.shards)
+        # Total BM25 weight of every term in every shard (terms x shards), for routing
+        self.term_weights = np.zeros((len(self.bm25.vocabulary), len(self.shards)), dtype=np.float32)
+        for column, shard in enumerate(self.shards.values()):
+            self.term_weights[:, column] = np.asarray(shard.bm25.weights.sum(axis=0)).ravel()
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def __getitem__(self, category: str) -> CategoryShard:
+        return self.shards[category]
+
+    def shares(self, query: str) -> Dict[str, float]:
+        """Share of a normalized query's BM25 term weight in each shard holding any of it."""
+        columns, query_counts = self.bm25.query_terms(query)
+        if not len(columns):
+            return {}
+        weights = query_counts @ self.term_weights[columns]
+        total = weights.sum()
+        return {name: float(w / total) for name, w in zip(self.names, weights) if w > 0}
+
+    def route(self, query: str, category: Optional[str] = None) -> Tuple[Optional[str], float]:
+        """The shard to search a normalized query in, or None to fan out, and the routing confidence.
+
+        The confidence is the share of the query's term weight in the shard of
+        its detected category; queries without a category always fan out.
+        """
+        if category not in self.shards:
+            return None, 0.0
+        confidence = self.shares(query).get(category, 0.0)
+        return (category if confidence >= ROUTING_CONFIDENCE else None), confidence
@@ -0,0 +1,121 @@
+import re
+from typing import List, NamedTuple
+
+import numpy as np
+
+# A number (or a "/" separated list of numbers) followed by a unit and an optional AC/DC tag
+_VOLTAGE_RE = re.compile(
+    r"(?P<values>\d+(?:\.\d+)?(?:\s*/\s*\d+(?:\.\d+)?)*)\s*(?P<unit>KV|V)(?:OLTS?)?"
+    r"\s*(?P<kind>AC\s*/\s*DC|AC|DC)?(?![A-Z])",
+    re.IGNORECASE)
+_CURRENT_RE = re.compile(
+    r"(?P<values>\d+(?:\.\d+)?(?:\s*/\s*\d+(?:\.\d+)?)*)\s*(?P<unit>MA|A)(?:MPS?)?"
+    r"\s*(?P<kind>AC\s*/\s*DC|AC|DC)?(?![A-Z])",
+    re.IGNORECASE)
+_UNIT_SCALE = {"V": 1.0, "KV": 1000.0, "A": 1.0, "MA": 0.001}
+
+# AC/DC tags, stored as small integers in the numeric arrays
+KIND_ANY = 0
+KIND_AC = 1
+KIND_DC = 2
+KIND_AC_DC = 3
+_KIND_CODES = {"AC": KIND_AC, "DC": KIND_DC, "AC/DC": KIND_AC_DC}
+
+# Comparison operators understood by SpecIndex.matching
+COMPARISON_OPERATORS = ("lt", "le", "gt", "ge", "eq")
+
+class Rating(NamedTuple):
+    """One numeric rating of a product, e.g. 250V AC or 16A."""
+    value: float
+    kind: int = KIND_ANY
+
+def _parse_ratings(text: str, pattern) -> List[Rating]:
+    """Parse every rating matched by ``pattern`` in a catalog string."""
+    ratings = []
+    for match in pattern.finditer(text or ""):
+        scale = _UNIT_SCALE[match.group("unit").upper()]
+        kind = match.group("kind")
+        kind_code = _KIND_CODES[re.sub(r"\s+", "", kind.upper())] if kind else KIND_ANY
+        for value in match.group("values").split("/"):
+            ratings.append(Rating(float(value) * scale, kind_code))
+
+    # "120V / 250V AC": untagged ratings inherit a single explicit tag
+    kinds = {r.kind for r in ratings if r.kind != KIND_ANY}
+    if len(kinds) == 1:
+        kind_code = kinds.pop()
+        ratings = [Rating(r.value, kind_code) for r in ratings]
+    return ratings
+
+def parse_voltage_ratings(voltage_str: str) -> List[Rating]:
+    """Parse a rated voltage string such as "50V AC/ 28V DC" or "120/250VAC"."""
+    return _parse_ratings(voltage_str, _VOLTAGE_RE)
+
+def parse_current_ratings(current_str: str) -> List[Rating]:
+    """Parse a rated current string such as "RS-6-5/ IRS-6-5 : 6A, RS-16/IRS-16 : 16A"."""
+    return _parse_ratings(current_str, _CURRENT_RE)
+
+class SpecIndex:
+    """Typed numeric index of one rating kind (voltage or current) over the catalog.
+
+    Ratings are kept twice: sorted by value for range lookups with
+    ``np.searchsorted``, and grouped by product for vectorized distance
+    computations.
+    """
+
+    def __init__(self, ratings_per_product: List[List[Rating]]):
+        self.n_products = len(ratings_per_product)
+        product_ids = np.repeat(np.arange(self.n_products), [len(r) for r in ratings_per_product])
+        values = np.array([r.value for ratings in ratings_per_product for r in ratings], dtype=np.float64)
+        kinds = np.array([r.kind for ratings in ratings_per_product for r in ratings], dtype=np.int8)
+
+        # Grouped by product (product ids are non-decreasing)
+        self.product_ids = product_ids
+        self.values = values
+        self.kinds = kinds
+        self.has_rating = np.zeros(self.n_products, dtype=bool)
+        self.has_rating[product_ids] = True
+        self.min_values = np.full(self.n_products, np.nan)
+        self.max_values = np.full(self.n_products, np.nan)
+        if len(values):
+            self._group_starts = np.flatnonzero(np.r_[True, product_ids[1:] != product_ids[:-1]])
+            rated = product_ids[self._group_starts]
+            self.min_values[rated] = np.minimum.reduceat(values, self._group_starts)
+            self.max_values[rated] = np.maximum.reduceat(values, self._group_starts)
+        else:
+            self._group_starts = np.zeros(0, dtype=np.intp)
+
+        # Sorted by value
+        order = np.argsort(values, kind="stable")
+        self.sorted_values = values[order]
+        self.sorted_product_ids = product_ids[order]
+        self.sorted_kinds = kinds[order]
+
+    def matching(self, operator: str, value: float, kind: int = KIND_ANY) -> np.ndarray:
+        """Ids of products with at least one rating satisfying ``rating <operator> value``."""
+        if operator == "lt":
+            lo, hi = 0, np.searchsorted(self.sorted_values, value, side="left")
+        elif operator == "le":
+            lo, hi = 0, np.searchsorted(self.sorted_values, value, side="right")
+        elif operator == "gt":
+            lo, hi = np.searchsorted(self.sorted_values, value, side="right"), len(self.sorted_values)
+        elif operator == "ge":
+            lo, hi = np.searchsorted(self.sorted_values, value, side="left"), len(self.sorted_values)
+        elif operator == "eq":
+            lo = np.searchsorted(self.sorted_values, value, side="left")
+            hi = np.searchsorted(self.sorted_values, value, side="right")
+        else:
+            raise ValueError(f"Unknown comparison operator: {operator}")
+
+        product_ids = self.sorted_product_ids[lo:hi]
+        if kind != KIND_ANY:
+            kinds = self.sorted_kinds[lo:hi]
+            product_ids = product_ids[(kinds == KIND_ANY) | (kinds == kind) | (kinds == KIND_AC_DC)]
+        return np.unique(product_ids)
+
+    def nearest_distance(self, value: float) -> np.ndarray:
+        """Distance from ``value`` to each product's closest rating (inf if unrated)."""
+        distances = np.full(self.n_products, np.inf)
+        if len(self.values):
+            closest = np.minimum.reduceat(np.abs(self.values - value), self._group_starts)
+            distances[self.product_ids[self._group_starts]] = closest
+        return distances
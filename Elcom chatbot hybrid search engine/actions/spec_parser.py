@@ -0,0 +1,108 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Spec kinds extracted from queries
+SPEC_VOLTAGE = "voltage"
+SPEC_CURRENT = "current"
+SPEC_IP_RATING = "ip_rating"
+SPEC_MOUNTING = "mounting"
+SPEC_POLES = "poles"
+SPEC_STANDARD = "standard"
+SPEC_CERTIFICATION = "certification"
+
+# Comparison words in front of a rating, e.g. "under 6a" or "less than 250v"
+COMPARISON_OPERATORS = {
+    "under": "lt", "below": "lt", "less than": "lt", "lower than": "lt", "smaller than": "lt",
+    "up to": "le", "upto": "le", "at most": "le", "max": "le", "maximum": "le",
+    "above": "gt", "over": "gt", "more than": "gt", "greater than": "gt", "higher than": "gt",
+    "at least": "ge", "min": "ge", "minimum": "ge",
+}
+
+# Rating units and their scale to volts / amperes
+VOLTAGE_UNITS = {"kv": 1000.0, "v": 1.0, "volt": 1.0, "volts": 1.0, "voltage": 1.0}
+CURRENT_UNITS = {"ma": 0.001, "a": 1.0, "amp": 1.0, "amps": 1.0, "ampere": 1.0, "amperes": 1.0, "current": 1.0}
+# Mounting types in priority order, when a query names several
+MOUNTING_TYPES = ("panel", "chassis", "pcb", "screw")
+POLE_CONFIGS = ("spst", "spdt", "dpst", "dpdt")
+# Standards bodies whose numbered standards are recognized, e.g. "UL-1054" or "IEC 60320"
+STANDARD_BODIES = ("ul", "iec", "en", "din", "iso")
+# Certification marks, as in the compliance standards of the catalog
+CERTIFICATIONS = ("rohs", "culus", "curus", "isi", "ce")
+
+# Punctuation, except decimal points, is a separator: "IP-67", "panel-mount", "2.5A"
+_SEPARATOR_RE = re.compile(r"[^a-z0-9.\s]|(?<!\d)\.|\.(?!\d)")
+
+def _alternation(words) -> str:
+    # Longest first, so "volts" is tried before "v"
+    return "|".join(sorted(map(re.escape, words), key=len, reverse=True))
+
+# One pattern for every spec kind, scanned once from left to right. A lone "a" after a
+# number is the article ("2 a switch"), so amperes abbreviated to "a" must follow the digits
+SPEC_PATTERN = re.compile(
+    rf"(?:\b(?P<op>{_alternation(COMPARISON_OPERATORS)})\s+)?(?P<value>\b\d+(?:\.\d+)?)(?!\s+a\b)\s*"
+    rf"(?:(?P<voltage_unit>{_alternation(VOLTAGE_UNITS)})|(?P<current_unit>{_alternation(CURRENT_UNITS)}))"
+    rf"(?:\s*(?P<supply>ac|dc))?\b"
+    rf"|\bip\s*(?P<ip>\d+)"
+    rf"|(?P<mounting>{_alternation(MOUNTING_TYPES)})\s*mount"
+    rf"|\b(?P<poles>{_alternation(POLE_CONFIGS)})\b"
+    rf"|\b(?P<standard_body>{_alternation(STANDARD_BODIES)})\s*(?P<standard_number>\d{{3,}})\b"
+    rf"|\b(?P<certification>{_alternation(CERTIFICATIONS)})\b")
+
+class Spec(NamedTuple):
+    """A specification found in a query."""
+    kind: str
+    # Volts or amperes for ratings, the IP code, the mounting type, the pole configuration,
+    # the standard as "<body> <number>" or the certification mark
+    value: Any
+    # The value as written in the query: rating digits, IP digits or the mounting phrase
+    text: str
+    # "lt", "le", "gt" or "ge" for ratings preceded by a comparison, e.g. "under 6a"
+    operator: Optional[str] = None
+    # "ac" or "dc" for ratings followed by one
+    supply: Optional[str] = None
+
+def parse_specs(query: str) -> List[Spec]:
+    """Every specification in a query, in query order.
+
+    Pass the query as typed rather than normalized, which drops the decimal
+    point of ratings like "6.3A".
+    """
+    specs = []
+    for match in SPEC_PATTERN.finditer(_SEPARATOR_RE.sub(" ", query.lower())):
+        if match.group("value"):
+            op = match.group("op")
+            voltage_unit = match.group("voltage_unit")
+            if voltage_unit:
+                kind, value = SPEC_VOLTAGE, float(match.group("value")) * VOLTAGE_UNITS[voltage_unit]
+            else:
+                kind, value = SPEC_CURRENT, float(match.group("value")) * CURRENT_UNITS[match.group("current_unit")]
+            specs.append(Spec(kind, value, match.group("value"),
+                              COMPARISON_OPERATORS[op] if op else None, match.group("supply")))
+        elif match.group("ip"):
+            specs.append(Spec(SPEC_IP_RATING, int(match.group("ip")), match.group("ip")))
+        elif match.group("mounting"):
+            specs.append(Spec(SPEC_MOUNTING, match.group("mounting"), match.group(0)))
+        elif match.group("poles"):
+            specs.append(Spec(SPEC_POLES, match.group("poles"), match.group("poles")))
+        elif match.group("standard_body"):
+            specs.append(Spec(SPEC_STANDARD, f"{match.group('standard_body')} {match.group('standard_number')}",
+                              match.group(0)))
+        else:
+            specs.append(Spec(SPEC_CERTIFICATION, match.group("certification"), match.group("certification")))
+    return specs
+
+def first_specs(query: str) -> Dict[str, Spec]:
+    """The first specification of each kind in a query, and its preferred mounting type."""
+    all_specs = parse_specs(query)
+    specs: Dict[str, Spec] = {}
+    for spec in all_specs:
+        specs.setdefault(spec.kind, spec)
+    mounting = preferred_mounting(all_specs)
+    if mounting:
+        specs[SPEC_MOUNTING] = mounting
+    return specs
+
+def preferred_mounting(specs: List[Spec]) -> Optional[Spec]:
+    """The mounting spec that comes first in MOUNTING_TYPES, when a query names several."""
+    mountings = [spec for spec in specs if spec.kind == SPEC_MOUNTING]
+    return min(mountings, key=lambda spec: MOUNTING_TYPES.index(spec.value)) if mountings else None
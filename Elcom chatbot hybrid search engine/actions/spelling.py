@@ -0,0 +1,130 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from rapidfuzz.distance import OSA
+
+# Common misspellings and variations
+SPELLING_VARIATIONS = {
+    "connector": ["conector", "conecter", "connecter"],
+    "industrial": ["industrail", "industriel"],
+    "voltage": ["volt", "volts"],
+    "current": ["amp", "amps", "ampere"],
+    "panel": ["pannel"],
+    "mount": ["mounted", "mounting"],
+    "solar": ["soler", "solr"],
+    "electric": ["electic", "elektric"],
+    "vehicle": ["vehical", "vehicel"],
+    "nema": ["nema", "nema"],
+    "twist": ["twisted", "twisting"],
+    "lock": ["locked", "locking"]
+}
+
+# Largest edit distance ever corrected; dictionary deletions are generated up to it
+MAX_EDIT_DISTANCE = 2
+# Frequency bonus of domain keywords over plain catalog words
+DOMAIN_WORD_BOOST = 100
+# Maximum number of memoized corrections
+MEMO_SIZE = 10000
+
+def max_edit_distance(word: str) -> int:
+    """Allowed edit distance for a word; short words are never corrected."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return 1
+    return MAX_EDIT_DISTANCE
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """All strings reachable from ``word`` by deleting up to ``distance`` characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+def count_words(texts: Iterable[str]) -> Counter:
+    """Count the alphabetic words (3+ letters) of already normalized texts."""
+    counts: Counter = Counter()
+    for text in texts:
+        counts.update(w for w in text.split() if len(w) >= 3 and w.isalpha())
+    return counts
+
+class SpellingCorrector:
+    """Symmetric-delete (SymSpell style) spelling corrector built once at startup.
+
+    Every dictionary word is stored under all of its deletion variants, so a
+    lookup only has to generate the deletions of the query word and verify
+    the few dictionary words they point to, instead of comparing the word
+    against the whole vocabulary.
+    """
+
+    def __init__(self, word_counts: Dict[str, int], misspellings: Optional[Dict[str, str]] = None):
+        self.word_counts = dict(word_counts)
+        self.misspellings = dict(misspellings or {})
+        self.deletes: Dict[str, List[str]] = defaultdict(list)
+        for word in self.word_counts:
+            for variant in _deletes(word, MAX_EDIT_DISTANCE):
+                self.deletes[variant].append(word)
+        self.deletes = dict(self.deletes)
+        self._memo: Dict[str, str] = {}
+
+    @classmethod
+    def from_sources(cls, domain_words: Iterable[str], catalog_counts: Counter,
+                     variations: Dict[str, List[str]] = SPELLING_VARIATIONS) -> "SpellingCorrector":
+        """Build the dictionary from domain keywords, catalog words and known variations.
+
+        Listed variations are always rewritten to their correct form, the
+        same way ``main.normalize`` applies them.
+        """
+        misspellings = {}
+        for correct, misspelled in variations.items():
+            for variation in misspelled:
+                if variation != correct:
+                    misspellings[variation] = correct
+
+        word_counts = Counter({w: c for w, c in catalog_counts.items() if w not in misspellings})
+        domain_words = {w for phrase in domain_words for w in phrase.split() if w.isalpha()}
+        for word in (domain_words | set(variations)) - set(misspellings):
+            word_counts[word] += DOMAIN_WORD_BOOST
+        return cls(word_counts, misspellings)
+
+    def correct(self, word: str) -> str:
+        """Return the most likely correct spelling of a normalized word."""
+        corrected = self._memo.get(word)
+        if corrected is None:
+            corrected = self._lookup(word)
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[word] = corrected
+        return corrected
+
+    def _lookup(self, word: str) -> str:
+        if word in self.misspellings:
+            return self.misspellings[word]
+        if word in self.word_counts or not word.isalpha():
+            return word
+        distance = max_edit_distance(word)
+        if distance == 0:
+            return word
+
+        best_word, best_key = word, None
+        seen = set()
+        for variant in _deletes(word, distance):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                edit_distance = OSA.distance(word, candidate, score_cutoff=distance)
+                if edit_distance > distance:
+                    continue
+                # Closest first, then most frequent, then alphabetical for stability
+                key = (edit_distance, -self.word_counts[candidate], candidate)
+                if best_key is None or key < best_key:
+                    best_word, best_key = candidate, key
+        return best_word
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_memo"] = {}
+        return state
@@ -0,0 +1,35 @@
+# Common words to remove from queries
+STOP_WORDS = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by"}
+
+# Product attribute synonyms
+ATTRIBUTE_SYNONYMS = {
+    "voltage": ["v", "volt", "volts", "voltage", "rated voltage"],
+    "current": ["a", "amp", "amps", "ampere", "amperes", "current", "rated current"],
+    "switch": ["switches", "switching", "spst", "spdt", "dpst", "dpdt"],
+    "rocker": ["rocker", "toggle", "lever"],
+    "rotary": ["rotary", "rotating", "knob"],
+    "panel": ["panel", "surface", "mount"],
+    "mount": ["mount", "mounting", "installed", "snap-in", "chassis"],
+    "temperature": ["temp", "temperature", "operating temperature"],
+    "compliance": ["standard", "compliance", "certification", "certified"],
+    "function": ["function", "operation", "mode", "state"]
+}
+
+# Product categories with common misspellings
+PRODUCT_CATEGORIES = {
+    "switch": ["switch", "switches", "toggle", "rocker", "rotary", "push button", "spst", "spdt", "dpst", "dpdt"],
+    "ev_connector": ["ev connector", "electric vehicle connector", "charging connector", "ev charging", "ev conector", "ev conectors", "ev conector", "ev conectors"],
+    "industrial_connector": ["industrial connector", "industrial plug", "industrial socket", "ip44", "ip67", "industrial conector", "industrial conectors"],
+    "solar_connector": ["solar connector", "pv connector", "solar panel connector", "y connector", "solar conector", "solar conectors"],
+    "nema_connector": ["nema connector", "nema plug", "nema socket", "twist lock", "nema conector", "nema conectors"],
+    "relay": ["relay", "contactor", "solid state relay"],
+    "sensor": ["sensor", "proximity", "limit", "photoelectric", "motion sensor"],
+    "accessory": ["accessory", "mount", "bracket", "cover", "adapter", "holder", "fuse holder"],
+    "filter": ["filter", "emi filter", "rfi filter", "power filter"],
+    "pdu": ["pdu", "power distribution unit", "power strip", "power distribution"],
+    "breaker": ["breaker", "circuit breaker", "fuse", "protection"],
+    "indicator": ["indicator", "light", "led", "display", "meter"],
+    "power": ["power supply", "power cord", "power cable", "power adapter"],
+    "terminal": ["terminal block", "terminal strip", "terminal connector"],
+    "control": ["control", "controller", "switch", "button", "key"]
+}
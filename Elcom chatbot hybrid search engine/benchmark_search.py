@@ -0,0 +1,178 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+# Leave no catalog snapshot behind in the project directory
+os.environ.setdefault("ELCOM_CATALOG_SNAPSHOT", "off")
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_FILE = os.path.join(PROJECT_DIR, "elcom_product_catalog_cleaned.json")
+QUERY_SOURCES = [
+    os.path.join(PROJECT_DIR, "tests", "test_product_queries.yml"),
+    os.path.join(PROJECT_DIR, "data", "nlu.yml"),
+]
+# NLU intents whose examples are product queries
+SEARCH_INTENTS = ("product_search", "ask_product_details", "ask_product_info")
+DEFAULT_SIZES = [1000, 10000, 100000]
+ENGINES = ("actions", "main")
+
+ENTITY_ANNOTATION = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+
+def load_queries() -> List[str]:
+    """Collect the product queries from the Rasa test stories and NLU examples."""
+    queries = []
+    with open(QUERY_SOURCES[0], "r", encoding="utf-8") as f:
+        for story in yaml.safe_load(f).get("stories", []):
+            queries.extend(step["user"].strip() for step in story.get("steps", []) if "user" in step)
+    with open(QUERY_SOURCES[1], "r", encoding="utf-8") as f:
+        for block in yaml.safe_load(f).get("nlu", []):
+            if block.get("intent") in SEARCH_INTENTS:
+                for line in block.get("examples", "").splitlines():
+                    line = line.strip()
+                    if line.startswith("- "):
+                        queries.append(ENTITY_ANNOTATION.sub(r"\1", line[2:]).strip())
+    # Unique, in source order
+    return list(dict.fromkeys(q for q in queries if q))
+
+def synthetic_products(products: List[Dict[str, Any]], size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Scale the real catalog to ``size`` products with renamed, re-rated copies."""
+    rng = random.Random(seed)
+    ratings = [(p.get("rated_voltage"), p.get("rated_current"), p.get("mounting_type")) for p in products]
+    synthetic = []
+    for i in range(size):
+        product = copy.deepcopy(products[i % len(products)])
+        generation = i // len(products)
+        if generation:
+            # Unique model codes and a different product's ratings, so indexes grow realistically
+            product["product_name"] = f"{product['product_name']} X{generation}"
+            voltage, current, mounting = rng.choice(ratings)
+            product["rated_voltage"], product["rated_current"], product["mounting_type"] = voltage, current, mounting
+        product.pop("search_field", None)
+        product.pop("category", None)
+        synthetic.append(product)
+    return synthetic
+
+def percentile_ms(latencies: np.ndarray, q: float) -> float:
+    return round(float(np.percentile(latencies, q)) * 1000, 3)
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def time_queries(search: Callable[[str], Any], queries: List[str], iterations: int) -> Dict[str, Any]:
+    """Run every query ``iterations`` times and summarize the per-query latencies."""
+    for query in queries:
+        search(query)  # warm up lazy structures
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            query_started = time.perf_counter()
+            search(query)
+            latencies.append(time.perf_counter() - query_started)
+    elapsed = time.perf_counter() - started
+    latencies = np.array(latencies)
+    return {
+        "queries": len(latencies),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+        "p99_ms": percentile_ms(latencies, 99),
+        "mean_ms": round(float(latencies.mean()) * 1000, 3),
+        "qps": round(len(latencies) / elapsed, 1),
+    }
+
+def run_benchmark(size: Optional[int], queries: List[str], iterations: int, engines: List[str]) -> Dict[str, Any]:
+    """Benchmark one catalog, either the real one (``size=None``) or a synthetic one."""
+    sys.path.insert(0, PROJECT_DIR)
+    from actions import actions
+    from actions.catalog import Catalog, enrich_products, load_catalog, set_catalog
+    import main as cli
+
+    started = time.perf_counter()
+    catalog = load_catalog(CATALOG_FILE, use_snapshot=False)
+    if size is not None:
+        catalog = Catalog(enrich_products(synthetic_products(catalog.products, size)), f"synthetic-{size}")
+    set_catalog(catalog)
+    build_seconds = time.perf_counter() - started
+
+    # Measure the search itself, not the query caches
+    actions.result_cache.max_size = 0
+    actions.response_cache.max_size = 0
+
+    searches = {"actions": actions.search_products, "main": cli.search_by_fields}
+    result = {
+        "catalog": "real" if size is None else f"synthetic-{size}",
+        "products": len(catalog),
+        "build_seconds": round(build_seconds, 3),
+        "engines": {},
+    }
+    for engine in engines:
+        result["engines"][engine] = time_queries(searches[engine], queries, iterations)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark product search latency and memory.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                        help="Synthetic catalog sizes to benchmark besides the real catalog")
+    parser.add_argument("--iterations", type=int, default=3, help="Passes over the query set per catalog")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    queries = load_queries()
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "query_count": len(queries),
+        "iterations": args.iterations,
+        "results": [],
+    }
+    # A fresh process per catalog, so peak RSS belongs to that catalog alone
+    for size in [None] + args.sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(run_benchmark, size, queries, args.iterations, args.engines).result()
+        report["results"].append(result)
+        print(f"{result['catalog']}: " + ", ".join(
+            f"{engine} p50 {stats['p50_ms']}ms p99 {stats['p99_ms']}ms {stats['qps']} qps"
+            for engine, stats in result["engines"].items()), file=sys.stderr)
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,35 @@
+import argparse
+import hashlib
 import json
 import re
-import pandas as pd
-from typing import Dict, Any, List
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import logging
 import os
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Incremental cleaning: the manifest records a content hash per source product, and a hash of
+# this script so a change to the cleaning code cleans every product again
+MANIFEST_SUFFIX = ".manifest.json"
+DELTA_SUFFIX = ".delta.json"
+MANIFEST_FORMAT_VERSION = 1
+# Products read and cleaned per batch, and fewest products to clean worth a process pool
+BATCH_SIZE = 2000
+MIN_PARALLEL_PRODUCTS = 500
+
+def is_missing(value: Any) -> bool:
+    """True for None and NaN, like pandas.isna on a single value."""
+    return value is None or (isinstance(value, float) and value != value)
+
 def standardize_field_names(product: Dict[str, Any]) -> Dict[str, Any]:
     """Convert field names to lowercase with underscores."""
     field_mapping = {
@@ -111,7 +132,7 @@ def standardize_other_features(features: Any) -> Dict[str, List[str]]:
             # Clean each value
             cleaned_values = []
             for value in values:
-                if pd.isna(value):
+                if is_missing(value):
                     continue
                 value = str(value).strip()
                 value = re.sub(r'\s+', ' ', value)
@@ -129,7 +150,7 @@ def standardize_other_features(features: Any) -> Dict[str, List[str]]:
 
 def clean_voltage(voltage: str) -> str:
     """Clean and standardize voltage values."""
-    if pd.isna(voltage):
+    if is_missing(voltage):
         return "N/A"
     
     # Remove extra spaces and standardize units
@@ -144,7 +165,7 @@ def clean_voltage(voltage: str) -> str:
 
 def clean_current(current: str) -> str:
     """Clean and standardize current values."""
-    if pd.isna(current):
+    if is_missing(current):
         return "N/A"
     
     # Remove extra spaces and standardize units
@@ -159,7 +180,7 @@ def clean_current(current: str) -> str:
 
 def clean_compliance(compliance: Any) -> Dict[str, Any]:
     """Clean and standardize compliance information."""
-    if pd.isna(compliance):
+    if is_missing(compliance):
         return {"standards": ["N/A"], "on_request": False}
     
     if isinstance(compliance, str):
@@ -180,13 +201,13 @@ def clean_compliance(compliance: Any) -> Dict[str, Any]:
 def clean_features(features: Any) -> Dict[str, List[str]]:
     """Clean and standardize product features while preserving all categories and their values."""
     try:
-        if pd.isna(features):
+        if is_missing(features):
             return {}
         
         if isinstance(features, dict):
             cleaned_features = {}
             for category, items in features.items():
-                if pd.isna(items):
+                if is_missing(items):
                     continue
                     
                 # Clean the category name
@@ -197,7 +218,7 @@ def clean_features(features: Any) -> Dict[str, List[str]]:
                     # Clean each item in the list
                     cleaned_items = []
                     for item in items:
-                        if pd.isna(item):
+                        if is_missing(item):
                             continue
                         # Clean and standardize the item
                         item = str(item).strip()
@@ -315,47 +336,232 @@ def clean_product(product: Dict[str, Any]) -> Dict[str, Any]:
         except:
             return None
 
-def clean_catalog(input_file: str, output_file: str):
-    """Clean the entire product catalog."""
+class StreamingUnsupported(Exception):
+    """Raised when the source cannot be streamed, e.g. it contains NaN literals."""
+
+def iter_source_products(input_file: str, stream: bool = True) -> Iterator[Dict[str, Any]]:
+    """Yield the raw products of the source catalog one at a time.
+
+    With ijson installed the file is streamed, so the whole source never has
+    to be in memory; otherwise it is loaded with the json module.
+    """
+    if stream and ijson is not None:
+        with open(input_file, 'rb') as f:
+            try:
+                yield from ijson.items(f, "item", use_float=True)
+            except ijson.JSONError as e:
+                # Pandas exports write NaN, which is not valid JSON for ijson
+                raise StreamingUnsupported(str(e))
+        return
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    if not isinstance(catalog, list):
+        raise ValueError("Input catalog is not a list")
+    yield from catalog
+
+def product_hash(product: Any) -> str:
+    """Content hash of a raw source product."""
+    canonical = json.dumps(product, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+def cleaner_hash() -> str:
+    """Content hash of the cleaning code, i.e. the source of this script."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def product_key(product: Any, seen: Dict[str, int]) -> str:
+    """Stable identity of a source product: its name plus its occurrence among products of that name."""
+    name = str(product.get("Product Name", "")) if isinstance(product, dict) else ""
+    seen[name] = seen.get(name, 0) + 1
+    return f"{name}#{seen[name]}"
+
+def load_manifest(output_file: str) -> Dict[str, Tuple[str, Optional[int]]]:
+    """Map product keys to their source hash and position in the output of the previous run.
+
+    Products cleaned by another version of this script map to an empty hash,
+    so they are cleaned again but still count as changed, not added.
+    """
     try:
-        # Read the input JSON file
-        with open(input_file, 'r', encoding='utf-8') as f:
-            catalog = json.load(f)
-        
-        if not isinstance(catalog, list):
-            logger.error("Input catalog is not a list")
-            return False
-            
-        total_products = len(catalog)
-        logger.info(f"Processing {total_products} products")
-        
-        # Clean each product
-        cleaned_products = []
-        skipped_products = []
-        
-        for i, product in enumerate(catalog, 1):
+        with open(output_file + MANIFEST_SUFFIX, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("format") != MANIFEST_FORMAT_VERSION:
+        return {}
+    stale = manifest.get("cleaner") != cleaner_hash()
+    if stale:
+        logger.info("The cleaning code changed since the previous run; cleaning every product again")
+    return {record["key"]: ("" if stale else record["hash"], record.get("output"))
+            for record in manifest.get("products", [])}
+
+class PreviousOutput:
+    """Cleaned products of the previous run, read from its output only as unchanged products need them.
+
+    The output is opened on the first request and streamed forward; products
+    passed on the way are held until asked for, which only happens when the
+    source products were reordered.
+    """
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self._products: Optional[Iterator[Any]] = None
+        self._position = 0
+        self._passed: Dict[int, Any] = {}
+
+    def get(self, output_index: int) -> Optional[Dict[str, Any]]:
+        """The cleaned product at ``output_index``, or None when the output no longer has it."""
+        if output_index in self._passed:
+            return self._passed.pop(output_index)
+        if self._products is None:
+            self._products = iter_source_products(self.output_file)
+        try:
+            for product in self._products:
+                position = self._position
+                self._position += 1
+                if position == output_index:
+                    return product
+                self._passed[position] = product
+        except (OSError, ValueError, StreamingUnsupported) as e:
+            logger.warning(f"Cannot read the previous output {self.output_file}: {str(e)}")
+            self._products = iter(())
+        # The output was edited or replaced since the last run; the product is cleaned again
+        return None
+
+    def close(self) -> None:
+        """Close the previous output, e.g. before it is replaced."""
+        if self._products is not None and hasattr(self._products, "close"):
+            self._products.close()
+        self._passed.clear()
+
+def write_json(path: str, data: Any) -> None:
+    """Atomically write ``data`` as indented JSON."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def clean_batch(products: List[Any], pool: Optional[ProcessPoolExecutor]) -> List[Optional[Dict[str, Any]]]:
+    """Clean a batch of products, on the process pool when it is large enough."""
+    if pool is not None and len(products) >= MIN_PARALLEL_PRODUCTS:
+        return list(pool.map(clean_product, products, chunksize=64))
+    return [clean_product(product) for product in products]
+
+def clean_stream(products: Iterator[Any], previous: Dict[str, Tuple[str, Optional[int]]],
+                 pool: Optional[ProcessPoolExecutor],
+                 previous_output: Optional[PreviousOutput] = None) -> Dict[str, Any]:
+    """Clean a stream of source products, reusing unchanged products from the previous run.
+
+    In the delta, added and changed products come as ``{"key": ..., "product": ...}``
+    with the same ``"<name>#<occurrence>"`` keys as the removed ones.
+    """
+    cleaned_products = []
+    manifest_records = []
+    delta = {"added": [], "changed": [], "removed": []}
+    skipped_products = []
+    reused = 0
+    seen: Dict[str, int] = {}
+    keys_now = set()
+
+    def flush(batch: List[Tuple[str, str, Any]]) -> None:
+        results = clean_batch([product for _, _, product in batch], pool)
+        for (key, digest, product), cleaned in zip(batch, results):
+            record(key, digest, cleaned, product)
+            if cleaned is not None:
+                delta["changed" if key in previous else "added"].append({"key": key, "product": cleaned})
+        batch.clear()
+
+    def record(key: str, digest: str, cleaned: Optional[Dict[str, Any]], product: Any) -> None:
+        if cleaned:
+            manifest_records.append({"key": key, "hash": digest, "output": len(cleaned_products)})
+            cleaned_products.append(cleaned)
+        else:
+            manifest_records.append({"key": key, "hash": digest, "output": None})
+            name = product.get("Product Name") if isinstance(product, dict) else None
+            skipped_products.append(name or f"Product {len(manifest_records)}")
+
+    batch: List[Tuple[str, str, Any]] = []
+    for i, product in enumerate(products, 1):
+        key = product_key(product, seen)
+        keys_now.add(key)
+        digest = product_hash(product)
+        reusable = key in previous and previous[key][0] == digest
+        if reusable:
+            # Unchanged since the last run: keep its cleaned version
+            output_index = previous[key][1]
+            cleaned = None
+            if output_index is not None:
+                cleaned = previous_output.get(output_index) if previous_output is not None else None
+                reusable = cleaned is not None
+        if reusable:
+            if batch:
+                flush(batch)
+            record(key, digest, cleaned, product)
+            reused += 1
+        else:
+            batch.append((key, digest, product))
+            if len(batch) >= BATCH_SIZE:
+                flush(batch)
+        if i % 100 == 0:
+            logger.info(f"Processed {i} products")
+    if batch:
+        flush(batch)
+
+    delta["removed"] = sorted(key for key in previous if key not in keys_now)
+    return {
+        "products": cleaned_products,
+        "manifest": {"format": MANIFEST_FORMAT_VERSION, "cleaner": cleaner_hash(), "products": manifest_records},
+        "delta": delta,
+        "skipped": skipped_products,
+        "reused": reused,
+    }
+
+def clean_catalog(input_file: str, output_file: str, workers: Optional[int] = None, incremental: bool = True):
+    """Clean the entire product catalog.
+
+    Only products added or changed since the last run are cleaned, on a
+    process pool, and the changes are written to ``<output>.delta.json``
+    next to the full output.
+    """
+    try:
+        previous = load_manifest(output_file) if incremental else {}
+        if previous:
+            logger.info(f"Found manifest of {len(previous)} products from the previous run")
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+        previous_output = PreviousOutput(output_file)
+        try:
             try:
-                cleaned = clean_product(product)
-                if cleaned:
-                    cleaned_products.append(cleaned)
-                else:
-                    skipped_products.append(product.get("Product Name", f"Product {i}"))
-            except Exception as e:
-                logger.error(f"Error processing product {i}: {str(e)}")
-                skipped_products.append(product.get("Product Name", f"Product {i}"))
-            
-            if i % 100 == 0:
-                logger.info(f"Processed {i}/{total_products} products")
-        
+                result = clean_stream(iter_source_products(input_file), previous, pool, previous_output)
+            except StreamingUnsupported as e:
+                logger.info(f"Cannot stream {input_file} ({e.__class__.__name__}), loading it whole")
+                previous_output.close()
+                previous_output = PreviousOutput(output_file)
+                result = clean_stream(iter_source_products(input_file, stream=False), previous, pool, previous_output)
+        finally:
+            previous_output.close()
+            if pool is not None:
+                pool.shutdown()
+
         # Log statistics
-        logger.info(f"Successfully cleaned {len(cleaned_products)} products")
+        cleaned_products = result["products"]
+        delta = result["delta"]
+        logger.info(f"Successfully cleaned {len(cleaned_products)} products "
+                    f"({result['reused']} unchanged, {len(delta['added'])} added, "
+                    f"{len(delta['changed'])} changed, {len(delta['removed'])} removed)")
+        skipped_products = result["skipped"]
         if skipped_products:
             logger.warning(f"Skipped {len(skipped_products)} products: {', '.join(skipped_products[:10])}...")
-        
-        # Write the cleaned catalog to a new JSON file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_products, f, indent=2, ensure_ascii=False)
-        
+
+        # Write the cleaned catalog, then the delta and manifest describing it
+        write_json(output_file, cleaned_products)
+        write_json(output_file + DELTA_SUFFIX, delta)
+        write_json(output_file + MANIFEST_SUFFIX, result["manifest"])
+
         return True
     except Exception as e:
         logger.error(f"Error cleaning catalog: {str(e)}")
@@ -366,14 +572,20 @@ if __name__ == "__main__":
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
     # Define input and output file paths relative to the script directory
-    input_file = os.path.join(script_dir, "elcom_product_catalog_formatted_f1_copy.json")
-    output_file = os.path.join(script_dir, "elcom_product_catalog_cleaned.json")
+    parser = argparse.ArgumentParser(description="Clean the Elcom product catalog.")
+    parser.add_argument("--input", default=os.path.join(script_dir, "elcom_product_catalog_formatted_f1_copy.json"))
+    parser.add_argument("--output", default=os.path.join(script_dir, "elcom_product_catalog_cleaned.json"))
+    parser.add_argument("--workers", type=int, default=None, help="Cleaning processes (default: one per core)")
+    parser.add_argument("--full", action="store_true", help="Clean every product, ignoring the previous run")
+    args = parser.parse_args()
+    input_file = args.input
+    output_file = args.output
     
     print("Cleaning product catalog...")
     print(f"Input file: {input_file}")
     print(f"Output file: {output_file}")
     
-    if clean_catalog(input_file, output_file):
+    if clean_catalog(input_file, output_file, workers=args.workers, incremental=not args.full):
         logger.info("Catalog cleaning completed successfully")
     else:
-        logger.error("Catalog cleaning failed") 
\ No newline at end of file
+        logger.error("Catalog cleaning failed")
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import FloatingButton from './components/ChatWidget/FloatingButton';
 import ChatWindow from './components/ChatWidget/ChatWindow/ChatWindow';
-import { Message } from './types/chat';
+import { Message, RasaMessage } from './types/chat';
 import { sendMessage } from './services/chatService';
 import { AxiosError } from 'axios';
 import './App.css';
@@ -57,11 +57,11 @@ function App() {
       .join('\n\n---\n\n'); // Separate products with horizontal rule
   };
 
-  const handleSendMessage = useCallback(async (text: string) => {
-    // Add user message
+  const handleSendMessage = useCallback(async (text: string, displayText?: string) => {
+    // Add user message; buttons send a command but show what was clicked
     const userMessage: Message = {
       id: Date.now().toString(),
-      text,
+      text: displayText ?? text,
       sender: 'user',
       timestamp: Date.now()
     };
@@ -74,11 +74,14 @@ function App() {
       
       // Handle Rasa response format
       if (Array.isArray(response) && response.length > 0) {
+        // Compact answers list their products in a custom payload next to the text
+        const productList = response.find((m: RasaMessage) => m.custom?.type === 'product_list')?.custom;
         const botMessage: Message = {
           id: Date.now().toString(),
-          text: formatProductDetails(response),
+          text: formatProductDetails(response.filter((m: RasaMessage) => m.text)),
           sender: 'bot',
-          timestamp: Date.now()
+          timestamp: Date.now(),
+          productList
         };
         setMessages(prev => [...prev, botMessage]);
       } else {
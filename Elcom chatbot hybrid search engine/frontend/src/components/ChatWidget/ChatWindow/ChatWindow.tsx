@@ -7,7 +7,7 @@ import { Message } from '../../../types/chat';
 interface ChatWindowProps {
   messages: Message[];
   isLoading: boolean;
-  onSendMessage: (message: string) => void;
+  onSendMessage: (message: string, displayText?: string) => void;
   onClose: () => void;
 }
 
@@ -172,6 +172,7 @@ const ChatWindow: React.FC<ChatWindowProps> = ({
           ref={messageListRef}
           messages={messages}
           isLoading={isLoading}
+          onSendMessage={onSendMessage}
         />
         <ChatInput onSendMessage={onSendMessage} />
       </div>
@@ -2,12 +2,14 @@ import React from 'react';
 import { Message } from '../../../types/chat';
 import ReactMarkdown from 'react-markdown';
 import type { Components } from 'react-markdown';
+import ProductList from './ProductList';
 
 interface MessageBubbleProps {
   message: Message;
+  onSendMessage?: (message: string, displayText?: string) => void;
 }
 
-const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
+const MessageBubble: React.FC<MessageBubbleProps> = ({ message, onSendMessage }) => {
   const isUser = message.sender === 'user';
   const formattedTime = new Date(message.timestamp).toLocaleTimeString([], {
     hour: '2-digit',
@@ -103,6 +105,9 @@ const MessageBubble: React.FC<MessageBubbleProps> = ({ message }) => {
         }`}
       >
         {renderContent()}
+        {message.productList && (
+          <ProductList productList={message.productList} onSendMessage={onSendMessage} />
+        )}
       </div>
       <span className="text-xs text-gray-500 mt-1">{formattedTime}</span>
     </div>
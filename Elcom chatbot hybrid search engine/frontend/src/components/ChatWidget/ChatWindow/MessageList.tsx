@@ -6,10 +6,11 @@ import LoadingIndicator from './LoadingIndicator';
 interface MessageListProps {
   messages: Message[];
   isLoading?: boolean;
+  onSendMessage?: (message: string, displayText?: string) => void;
 }
 
 const MessageList = forwardRef<HTMLDivElement, MessageListProps>(
-  ({ messages, isLoading }, ref) => {
+  ({ messages, isLoading, onSendMessage }, ref) => {
     const messagesEndRef = useRef<HTMLDivElement>(null);
 
     const scrollToBottom = () => {
@@ -24,7 +25,7 @@ const MessageList = forwardRef<HTMLDivElement, MessageListProps>(
       <div ref={ref} className="flex-1 overflow-y-auto px-4 py-3 space-y-4">
         <div className="space-y-6">
           {messages.map((message) => (
-            <MessageBubble key={message.id + message.timestamp} message={message} />
+            <MessageBubble key={message.id + message.timestamp} message={message} onSendMessage={onSendMessage} />
           ))}
         </div>
         {isLoading && (
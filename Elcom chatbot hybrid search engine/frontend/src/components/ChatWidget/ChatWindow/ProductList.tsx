@@ -0,0 +1,79 @@
+import React, { useState } from 'react';
+import { ProductListPayload } from '../../../types/search';
+import { getProductDetails, showMoreMessage } from '../../../services/chatService';
+
+interface ProductListProps {
+  productList: ProductListPayload;
+  onSendMessage?: (message: string, displayText?: string) => void;
+}
+
+const ProductList: React.FC<ProductListProps> = ({ productList, onSendMessage }) => {
+  // Product cards are only fetched when their details are opened
+  const [cards, setCards] = useState<Record<number, string>>({});
+  const [openId, setOpenId] = useState<number | null>(null);
+  const [loadingId, setLoadingId] = useState<number | null>(null);
+
+  const toggleDetails = async (id: number) => {
+    if (openId === id) {
+      setOpenId(null);
+      return;
+    }
+    setOpenId(id);
+    if (cards[id] !== undefined) {
+      return;
+    }
+
+    setLoadingId(id);
+    try {
+      const details = await getProductDetails(id, productList.catalog_version);
+      setCards(prev => ({
+        ...prev,
+        [id]: details ? details.card : 'These results are out of date. Please search again.'
+      }));
+    } catch (error) {
+      console.error('Error fetching product details:', error);
+      setOpenId(null);
+    } finally {
+      setLoadingId(null);
+    }
+  };
+
+  const remaining = productList.total - productList.offset - productList.products.length;
+
+  return (
+    <div className="mt-3 space-y-2">
+      {productList.products.map((product, index) => (
+        <div key={product.id} className="border border-gray-200 rounded-md bg-white">
+          <button
+            type="button"
+            onClick={() => toggleDetails(product.id)}
+            className="w-full text-left px-3 py-2 hover:bg-gray-50"
+          >
+            <div className="font-semibold text-gray-900">
+              {productList.offset + index + 1}. {product.name}
+            </div>
+            {product.ratings.length > 0 && (
+              <div className="text-sm text-gray-600">{product.ratings.join(' · ')}</div>
+            )}
+          </button>
+          {openId === product.id && (
+            <div className="px-3 py-2 text-sm text-gray-700 whitespace-pre-line border-t border-gray-100">
+              {loadingId === product.id ? 'Loading details...' : cards[product.id]}
+            </div>
+          )}
+        </div>
+      ))}
+      {productList.next_cursor && onSendMessage && (
+        <button
+          type="button"
+          onClick={() => onSendMessage(showMoreMessage(productList.next_cursor as string), 'Show more')}
+          className="text-sm font-medium text-blue-600 hover:underline"
+        >
+          Show more ({remaining} left)
+        </button>
+      )}
+    </div>
+  );
+};
+
+export default ProductList;
@@ -1,11 +1,21 @@
 import axios, { AxiosError } from 'axios';
+import { RasaMessage } from '../types/chat';
+import {
+  CompletionResponse,
+  PartNumberCompletion,
+  Product,
+  ProductDetailResponse,
+  ProductResponse,
+  SearchResponse,
+} from '../types/search';
 
 const RASA_ENDPOINT = 'http://localhost:5005/webhooks/rest/webhook';
+const SEARCH_ENDPOINT = 'http://localhost:8000';
 
-export const sendMessage = async (message: string) => {
+export const sendMessage = async (message: string): Promise<RasaMessage[]> => {
   try {
     console.log('Sending message to Rasa:', message);
-    const response = await axios.post(RASA_ENDPOINT, {
+    const response = await axios.post<RasaMessage[]>(RASA_ENDPOINT, {
       sender: 'user',
       message: message
     }, {
@@ -39,4 +49,53 @@ export const sendMessage = async (message: string) => {
     
     throw axiosError;
   }
-};
\ No newline at end of file
+};
+
+// Direct lookups against the search service, e.g. for type-ahead, without the Rasa NLU round trip
+export const searchProducts = async (query: string, limit = 5, signal?: AbortSignal): Promise<Product[]> => {
+  const response = await axios.get<SearchResponse>(`${SEARCH_ENDPOINT}/search`, {
+    params: { q: query, limit },
+    signal,
+  });
+  return response.data.results;
+};
+
+// Part numbers starting with what the user has typed so far
+export const completePartNumbers = async (prefix: string, limit = 10, signal?: AbortSignal): Promise<PartNumberCompletion[]> => {
+  const response = await axios.get<CompletionResponse>(`${SEARCH_ENDPOINT}/complete`, {
+    params: { q: prefix, limit },
+    signal,
+  });
+  return response.data.completions;
+};
+
+export const getProduct = async (name: string): Promise<Product | null> => {
+  try {
+    const response = await axios.get<ProductResponse>(`${SEARCH_ENDPOINT}/product/${encodeURIComponent(name)}`);
+    return response.data.products[0] ?? null;
+  } catch (error) {
+    if ((error as AxiosError).response?.status === 404) {
+      return null;
+    }
+    throw error;
+  }
+};
+
+// Rasa message asking for the page of a product list at `cursor`, bypassing NLU
+export const showMoreMessage = (cursor: string): string => `/show_more${JSON.stringify({ cursor })}`;
+
+// Full details of one product of a compact product list; null once the catalog has changed
+export const getProductDetails = async (id: number, catalogVersion?: string): Promise<ProductDetailResponse | null> => {
+  try {
+    const response = await axios.get<ProductDetailResponse>(`${SEARCH_ENDPOINT}/products/${id}`, {
+      params: { catalog_version: catalogVersion },
+    });
+    return response.data;
+  } catch (error) {
+    const status = (error as AxiosError).response?.status;
+    if (status === 404 || status === 409) {
+      return null;
+    }
+    throw error;
+  }
+};
@@ -1,8 +1,18 @@
+import { ProductListPayload } from './search';
+
 export interface Message {
   id: string;
   text: string;
   sender: 'user' | 'bot';
   timestamp: number;
+  productList?: ProductListPayload;
+}
+
+// One message of the Rasa REST channel's response
+export interface RasaMessage {
+  recipient_id?: string;
+  text?: string;
+  custom?: ProductListPayload;
 }
 
 export interface ChatState {
@@ -0,0 +1,67 @@
+export interface Product {
+  product_name: string;
+  description?: string;
+  rated_voltage?: string;
+  rated_current?: string;
+  mounting_type?: string;
+  operating_temperature?: string;
+  reference_standard?: string;
+  category?: string;
+  compliance?: {
+    standards?: string[];
+    on_request?: boolean;
+  };
+  other_features?: Record<string, string[] | string>;
+}
+
+// Facet -> value -> number of results with it, e.g. facets.mounting.panel
+export type FacetCounts = Record<string, Record<string, number>>;
+
+export interface SearchResponse {
+  query: string;
+  catalog_version: string;
+  total: number;
+  results: Product[];
+  facets: FacetCounts;
+  // Pass back as `cursor` for the next page; null on the last one
+  next_cursor: string | null;
+}
+
+export interface ProductSummary {
+  id: number;
+  name: string;
+  ratings: string[];
+}
+
+// Compact ranked list sent by the chatbot instead of full product cards
+export interface ProductListPayload {
+  type: 'product_list';
+  catalog_version: string;
+  total: number;
+  offset: number;
+  products: ProductSummary[];
+  next_cursor: string | null;
+}
+
+export interface ProductDetailResponse {
+  catalog_version: string;
+  id: number;
+  product: Product;
+  card: string;
+}
+
+export interface PartNumberCompletion {
+  code: string;
+  products: string[];
+}
+
+export interface CompletionResponse {
+  query: string;
+  catalog_version: string;
+  completions: PartNumberCompletion[];
+}
+
+export interface ProductResponse {
+  catalog_version: string;
+  products: Product[];
+}
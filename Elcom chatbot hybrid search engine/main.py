@@ -1,9 +1,15 @@
-import json
-from rapidfuzz import fuzz, process
 import re
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Pattern
 import logging
 
+import numpy as np
+
+from actions.catalog import Catalog, get_catalog
+from actions.facet_index import FACET_IP_RATING, FACET_MOUNTING
+from actions.product_index import weighted_fuzzy_scores
+from actions.spec_parser import SPEC_CURRENT, SPEC_IP_RATING, SPEC_VOLTAGE, parse_specs, preferred_mounting
+from actions.spelling import SPELLING_VARIATIONS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,29 +18,17 @@ logger = logging.getLogger(__name__)
 FUZZY_MATCH_THRESHOLD = 60  # Lowered to improve partial match success
 MIN_RELEVANCE_SCORE = 0.3  # Minimum score for a result to be considered relevant
 MAX_RESULTS = 5
+# Weight of the fuzzy match on each product field, and rapidfuzz worker threads (-1 = all cores)
+FUZZY_FIELD_WEIGHTS = {"name": 2.0, "description": 1.5, "search_field": 1.0}
+FUZZY_WORKERS = -1
+# Filters answered with the facet index instead of scanning product fields
+FACET_FILTERS = {"mounting_type": FACET_MOUNTING, "other_features": FACET_IP_RATING}
 
-# Load product data from JSON
-with open("elcom_product_catalog_cleaned.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# Clean null entries
-products = [p for p in data if p.get("product_name")]
-
-# Common misspellings and variations
-SPELLING_VARIATIONS = {
-    "connector": ["conector", "conecter", "connecter"],
-    "industrial": ["industrail", "industriel"],
-    "voltage": ["volt", "volts"],
-    "current": ["amp", "amps", "ampere"],
-    "panel": ["pannel"],
-    "mount": ["mounted", "mounting"],
-    "solar": ["soler", "solr"],
-    "electric": ["electic", "elektric"],
-    "vehicle": ["vehical", "vehicel"],
-    "nema": ["nema", "nema"],
-    "twist": ["twisted", "twisting"],
-    "lock": ["locked", "locking"]
-}
+# Misspelling -> correct word, first listed correction wins
+VARIATION_CORRECTIONS: Dict[str, str] = {}
+for _correct, _variations in SPELLING_VARIATIONS.items():
+    for _variation in _variations:
+        VARIATION_CORRECTIONS.setdefault(_variation, _correct)
 
 def normalize(text: str) -> str:
     """Enhanced text normalization with spelling correction."""
@@ -45,90 +39,65 @@ def normalize(text: str) -> str:
     text = re.sub(r"[^a-zA-Z0-9\s]", "", text.lower()).strip()
     
     # Replace common misspellings
-    words = text.split()
-    corrected_words = []
-    for word in words:
-        # Check for spelling variations
-        for correct, variations in SPELLING_VARIATIONS.items():
-            if word in variations:
-                word = correct
-                break
-        corrected_words.append(word)
-    
-    return " ".join(corrected_words)
+    return " ".join(VARIATION_CORRECTIONS.get(word, word) for word in text.split())
+
+# Fuzzy matched fields of the current catalog, normalized once for batched scoring
+_product_fields: Dict[str, Any] = {"version": None, "fields": None}
+
+def get_product_fields(catalog: Catalog) -> Dict[str, List[str]]:
+    """Return the normalized product fields of ``catalog``, computing them on first use."""
+    if _product_fields["version"] != catalog.version:
+        products = catalog.products
+        _product_fields["fields"] = {
+            "name": [normalize(p.get("product_name", "")) for p in products],
+            "description": [normalize(p.get("description", "")) for p in products],
+            "search_field": [normalize(p.get("search_field", "")) for p in products],
+        }
+        _product_fields["version"] = catalog.version
+    return _product_fields["fields"]
 
 def extract_filters(query: str) -> Dict[str, str]:
     """Extract filters from the query with improved pattern matching."""
     filters = {}
-    query = query.lower()
-    
-    # Voltage patterns
-    voltage_patterns = [
-        (r"(\d+)\s*v(?:olt)?s?", "rated_voltage"),
-        (r"(\d+)\s*v(?:olt)?s?\s*ac", "rated_voltage"),
-        (r"(\d+)\s*v(?:olt)?s?\s*dc", "rated_voltage")
-    ]
-    
-    # Current patterns
-    current_patterns = [
-        (r"(\d+)\s*a(?:mp)?s?", "rated_current"),
-        (r"(\d+)\s*a(?:mp)?s?\s*ac", "rated_current"),
-        (r"(\d+)\s*a(?:mp)?s?\s*dc", "rated_current")
-    ]
-    
-    # Mounting type patterns
-    mounting_patterns = [
-        (r"panel\s*mount", "mounting_type"),
-        (r"chassis\s*mount", "mounting_type"),
-        (r"pcb\s*mount", "mounting_type"),
-        (r"screw\s*mount", "mounting_type")
-    ]
+    specs = parse_specs(query)
     
-    # IP rating patterns
-    ip_patterns = [
-        (r"ip\s*(\d+)", "other_features"),
-        (r"protection\s*degree\s*ip\s*(\d+)", "other_features")
-    ]
+    for spec in specs:
+        if spec.kind == SPEC_VOLTAGE:
+            filters.setdefault("rated_voltage", spec.text)
+        elif spec.kind == SPEC_CURRENT:
+            filters.setdefault("rated_current", spec.text)
+        elif spec.kind == SPEC_IP_RATING:
+            filters.setdefault("other_features", spec.text)
     
-    # Combine all patterns
-    all_patterns = voltage_patterns + current_patterns + mounting_patterns + ip_patterns
-    
-    for pattern, field in all_patterns:
-        matches = re.finditer(pattern, query)
-        for match in matches:
-            value = match.group(1) if len(match.groups()) > 0 else match.group(0)
-            if field not in filters:
-                filters[field] = value
+    # Mounting type: the first listed type wins, wherever it appears in the query
+    mounting = preferred_mounting(specs)
+    if mounting:
+        filters["mounting_type"] = mounting.text
     
     return filters
 
-def calculate_relevance_score(product: Dict[str, Any], query: str, filters: Dict[str, str]) -> float:
-    """Enhanced relevance scoring with multiple factors."""
+def facet_value(field: str, value: str) -> str:
+    """Facet index value of an extract_filters value: "67" -> "ip67", "panel mount" -> "panel"."""
+    if field == "other_features":
+        return f"ip{value}"
+    return value.replace("mount", "").strip()
+
+def calculate_relevance_score(product: Dict[str, Any], fields: Dict[str, str], query: str, filters: Dict[str, str]) -> float:
+    """Exact and filter match part of the relevance score; fuzzy matches are batched."""
     try:
         score = 0.0
-        query = normalize(query)
-        
-        # Get normalized product fields
-        product_name = normalize(product.get("product_name", ""))
-        description = normalize(product.get("description", ""))
-        search_field = normalize(product.get("search_field", ""))
         
         # 1. Exact matches (highest priority)
-        if query in product_name:
+        if query in fields["name"]:
             score += 3.0
-        if query in description:
+        if query in fields["description"]:
             score += 2.0
         
-        # 2. Fuzzy matches
-        name_score = fuzz.token_sort_ratio(query, product_name) / 100
-        desc_score = fuzz.token_sort_ratio(query, description) / 100
-        search_score = fuzz.token_sort_ratio(query, search_field) / 100
-        
-        score += name_score * 2.0 + desc_score * 1.5 + search_score * 1.0
+        # 2. Fuzzy matches are scored in calculate_relevance_scores
         
-        # 3. Filter matches
+        # 3. Filter matches (facet filters are scored in calculate_relevance_scores)
         for field, value in filters.items():
-            if field in product:
+            if field in product and field not in FACET_FILTERS:
                 if isinstance(product[field], str):
                     if value.lower() in product[field].lower():
                         score += 1.5
@@ -144,21 +113,42 @@ def calculate_relevance_score(product: Dict[str, Any], query: str, filters: Dict
         logger.error(f"Error calculating relevance score: {str(e)}")
         return 0.0
 
+def calculate_relevance_scores(catalog: Catalog, query: str, filters: Dict[str, str]) -> np.ndarray:
+    """Relevance scores of every product with multiple factors."""
+    query = normalize(query)
+    product_fields = get_product_fields(catalog)
+    names, descriptions = product_fields["name"], product_fields["description"]
+    scores = np.fromiter(
+        (calculate_relevance_score(p, {"name": names[i], "description": descriptions[i]}, query, filters)
+         for i, p in enumerate(catalog.products)),
+        dtype=np.float64, count=len(catalog.products))
+    # One cdist call per field instead of three fuzz calls per product
+    scores += weighted_fuzzy_scores([query], product_fields, FUZZY_FIELD_WEIGHTS, workers=FUZZY_WORKERS)[0]
+    # Mounting type and IP rating filters: one facet bitset each
+    for field, facet in FACET_FILTERS.items():
+        if field in filters:
+            scores[catalog.facets.filter(np.arange(len(scores)), {facet: facet_value(field, filters[field])})] += 1.5
+    return scores
+
+def rank_by_fields(catalog: Catalog, query: str) -> List[int]:
+    """Ids of the best matching products of ``catalog``, best first."""
+    filters = extract_filters(query)
+    query = normalize(query)
+    scores = calculate_relevance_scores(catalog, query, filters)
+    
+    # Partial selection of the top results, keeping ties in catalog order
+    relevant = np.flatnonzero(scores >= MIN_RELEVANCE_SCORE)
+    if len(relevant) > MAX_RESULTS:
+        kth_score = -np.partition(-scores[relevant], MAX_RESULTS - 1)[MAX_RESULTS - 1]
+        relevant = relevant[scores[relevant] >= kth_score]
+    order = np.lexsort((relevant, -scores[relevant]))
+    return relevant[order[:MAX_RESULTS]].tolist()
+
 def search_by_fields(query: str) -> List[Dict[str, Any]]:
     """Enhanced search across multiple fields with improved filtering."""
     try:
-        query = normalize(query)
-        filters = extract_filters(query)
-        results = []
-        
-        for product in products:
-            score = calculate_relevance_score(product, query, filters)
-            if score >= MIN_RELEVANCE_SCORE:
-                results.append((score, product))
-        
-        # Sort by score and return top results
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [p for _, p in results[:MAX_RESULTS]]
+        catalog = get_catalog()
+        return [catalog.products[i] for i in rank_by_fields(catalog, query)]
     except Exception as e:
         logger.error(f"Error in search_by_fields: {str(e)}")
         return []
@@ -169,9 +159,14 @@ def handle_query(query: str) -> str:
         if not query or not isinstance(query, str):
             return "Please provide a valid search query."
         
-        results = search_by_fields(query)
+        catalog = get_catalog()
+        try:
+            ranked_ids = rank_by_fields(catalog, query)
+        except Exception as e:
+            logger.error(f"Error in search_by_fields: {str(e)}")
+            ranked_ids = []
         
-        if not results:
+        if not ranked_ids:
             return (
                 "I couldn't find any products matching your query. "
                 "Try being more specific with product names or key features like:\n"
@@ -181,17 +176,19 @@ def handle_query(query: str) -> str:
                 "- Protection degree (e.g., 'IP67')\n"
             )
         
-        # Format the results in a consistent way
-        if len(results) == 1:
-            return f"Sure! Here's what I found about **{results[0]['product_name']}**: " + format_product_info(results[0], query)
-        
-        # For multiple results, format each one with a separator
+        # Pre-rendered cards, highlighted in one pass each
+        cards = get_product_cards(catalog)
+        highlighter = compile_highlighter(query)
         formatted_results = []
-        for product in results:
+        for i in ranked_ids:
+            product = catalog.products[i]
+            card = cards[i] if cards[i] is not None else render_product_card(product)
             formatted_results.append(
                 f"Sure! Here's what I found about **{product['product_name']}**: " + 
-                format_product_info(product, query)
+                highlight_with(highlighter, card)
             )
+        
+        # For multiple results, format each one with a separator
         return "\n\n---\n\n".join(formatted_results)
         
     except Exception as e:
@@ -199,14 +196,42 @@ def handle_query(query: str) -> str:
         return "Sorry, I encountered an error while processing your query. Please try again."
 
 # Highlight query terms in text
+def compile_highlighter(query: str) -> Optional[Pattern]:
+    """One case-insensitive alternation of the query words, longest first."""
+    words = sorted(dict.fromkeys(query.lower().split()), key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")\b", re.IGNORECASE)
+
+def highlight_with(highlighter: Optional[Pattern], text: str) -> str:
+    return highlighter.sub(r"**\1**", text) if highlighter else text
+
 def highlight_matches(text, query):
-    for word in query.lower().split():
-        text = re.sub(fr"\b({re.escape(word)})\b", r"**\1**", text, flags=re.IGNORECASE)
-    return text
+    return highlight_with(compile_highlighter(query), text)
+
+# Rendered cards of the current catalog, built once per catalog version
+_product_cards: Dict[str, Any] = {"version": None, "cards": None}
+
+def get_product_cards(catalog: Catalog) -> List[Optional[str]]:
+    """Return the rendered card of every product of ``catalog``, rendering them on first use.
+
+    Products whose card cannot be rendered get ``None`` and are rendered,
+    and fail, when they are shown.
+    """
+    if _product_cards["version"] != catalog.version:
+        cards = []
+        for product in catalog.products:
+            try:
+                cards.append(render_product_card(product))
+            except Exception:
+                cards.append(None)
+        _product_cards["cards"] = cards
+        _product_cards["version"] = catalog.version
+    return _product_cards["cards"]
 
 # Format product response conversationally
-def format_product_info(product, query=None):
-    response = (
+def render_product_card(product):
+    return (
         f"Sure! Here's what I found about **{product['product_name']}**:\n"
         f"- It's described as: {product['description']}\n"
         f"- Rated Voltage: {product['rated_voltage']}\n"
@@ -217,6 +242,9 @@ def format_product_info(product, query=None):
         f"- Reference Standard: {product['reference_standard']}\n"
         f"- Extra Features: {product['other_features'] or 'Not specified'}\n"
     )
+
+def format_product_info(product, query=None):
+    response = render_product_card(product)
     return highlight_matches(response, query) if query else response
 
 # CLI with loop
@@ -0,0 +1,167 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+
+from actions import actions as engine
+from actions.catalog import Catalog, get_catalog
+from actions.metrics import registry
+from actions.result_set import decode_cursor, encode_cursor
+from actions.search_executor import SearchOverloaded
+
+# Service address, worker processes and idle keep-alive in seconds
+SERVICE_HOST = os.environ.get("ELCOM_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("ELCOM_SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.environ.get("ELCOM_SERVICE_WORKERS") or os.cpu_count() or 1)
+KEEP_ALIVE_TIMEOUT = int(os.environ.get("ELCOM_SERVICE_KEEP_ALIVE", "30"))
+# Comma-separated origins allowed to call the service from a browser
+CORS_ORIGINS = os.environ.get("ELCOM_SERVICE_CORS_ORIGINS", "http://localhost:3000").split(",")
+# Largest number of queries in one batch request, and of part number completions
+MAX_BATCH_SIZE = 100
+MAX_COMPLETIONS = 20
+# Result formats: whole products, or ids, names and key ratings to fetch details of on demand
+RESULT_FORMATS = "^(full|compact)$"
+# Searches of one request when the catalog keeps being reloaded under them
+MAX_SEARCH_ATTEMPTS = 3
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start the engine services and load the catalog before serving requests."""
+    # The admin server belongs to the actions server; with several service workers
+    # they would all race for its port
+    engine.init_services(admin_server=False)
+    # Load the catalog before the first request instead of during it
+    await asyncio.get_running_loop().run_in_executor(None, get_catalog)
+    yield
+
+app = FastAPI(title="Elcom Product Search", description="Direct product search without the Rasa NLU round trip.",
+              lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["GET", "POST"], allow_headers=["*"])
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=MAX_BATCH_SIZE)
+    limit: int = Field(engine.MAX_RESULTS, ge=1, le=engine.RESULT_SET_SIZE)
+
+def public_product(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Product fields returned by the API, without the internal search field."""
+    return {k: v for k, v in product.items() if k != "search_field"}
+
+def compact_product(catalog: Catalog, product_id: int) -> Dict[str, Any]:
+    """Id, name and key ratings of a product; the rest is fetched from /products/{id}."""
+    return dict(catalog.cards.summaries[product_id], id=product_id)
+
+def check_catalog_version(catalog: Catalog, catalog_version: Optional[str]) -> None:
+    """Reject product ids and cursors of a catalog that has since been reloaded."""
+    if catalog_version is not None and catalog_version != catalog.version:
+        raise HTTPException(status_code=409, detail="The catalog has changed; search again")
+
+async def run_search(fn: Callable, *args: Any) -> Tuple[Catalog, Any]:
+    """Run a ranking function on the shared search executor, mapping overload to HTTP 503.
+
+    A search that raced a catalog reload is run again, up to MAX_SEARCH_ATTEMPTS
+    times; its ids belong to a catalog that is gone, so they are never served.
+    """
+    for _ in range(MAX_SEARCH_ATTEMPTS):
+        try:
+            version, ranked, samples = await engine.search_executor.run(fn, *args)
+        except (asyncio.TimeoutError, SearchOverloaded):
+            raise HTTPException(status_code=503, detail="Search is busy, please retry")
+        registry.replay(samples)
+        catalog = get_catalog()
+        if catalog.version == version:
+            return catalog, ranked
+    raise HTTPException(status_code=503, detail="The catalog is being reloaded, please retry",
+                        headers={"Retry-After": "1"})
+
+@app.get("/search")
+async def search(q: str = Query(..., min_length=1), limit: int = Query(engine.MAX_RESULTS, ge=1, le=engine.RESULT_SET_SIZE),
+                 cursor: Optional[str] = None, response_format: Optional[str] = Query(None, pattern=RESULT_FORMATS),
+                 legacy_format: Optional[str] = Query(None, alias="format", pattern=RESULT_FORMATS, deprecated=True)):
+    """Search the catalog with the same engine as the chatbot, with facet counts of all the results.
+
+    Results come in pages of ``limit``; pass ``next_cursor`` back as ``cursor`` for the next one.
+    Facets count the whole result set, so they stay the same from page to page.
+    ``format`` is the former name of ``response_format``, still accepted for existing clients.
+    """
+    response_format = response_format or legacy_format or "full"
+    offset = 0
+    if cursor is not None:
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        cursor_version, offset = decoded
+    catalog, results = await run_search(engine.rank_query, q)
+    if cursor is not None:
+        check_catalog_version(catalog, cursor_version)
+    page = results.ids[offset:offset + limit]
+    end = offset + len(page)
+    return {
+        "query": q,
+        "catalog_version": catalog.version,
+        "total": len(results.ids),
+        "results": [compact_product(catalog, i) if response_format == "compact" else public_product(catalog.products[i])
+                    for i in page],
+        "facets": catalog.facets.counts(results.ids),
+        # Facets of the query no product has; the results are the closest matches without them
+        "unmatched_facets": dict(results.relaxed_facets),
+        "next_cursor": encode_cursor(catalog.version, end) if end < len(results.ids) else None,
+    }
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """Search many queries at once; uncached ones are fuzzy matched together in one pass."""
+    limit = request.limit
+    catalog, ranked = await run_search(engine.rank_queries, request.queries)
+    return {
+        "catalog_version": catalog.version,
+        "results": [
+            {"query": query, "results": [public_product(catalog.products[i]) for i in results.ids[:limit]],
+             "facets": catalog.facets.counts(results.ids), "unmatched_facets": dict(results.relaxed_facets)}
+            for query, results in zip(request.queries, ranked)
+        ],
+    }
+
+@app.get("/complete")
+async def complete(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=MAX_COMPLETIONS)):
+    """Part numbers starting with ``q``, for as-you-type completion."""
+    catalog = get_catalog()
+    return {
+        "query": q,
+        "catalog_version": catalog.version,
+        "completions": [
+            {"code": code, "products": [catalog.products[i]["product_name"] for i in product_ids]}
+            for code, product_ids in catalog.part_numbers.complete(q, limit)
+        ],
+    }
+
+@app.get("/products/{product_id}")
+async def product_details(product_id: int, catalog_version: Optional[str] = None):
+    """One product of a compact result list by id, with its rendered card."""
+    catalog = get_catalog()
+    check_catalog_version(catalog, catalog_version)
+    if not 0 <= product_id < len(catalog.products):
+        raise HTTPException(status_code=404, detail=f"No product with id {product_id}")
+    return {
+        "catalog_version": catalog.version,
+        "id": product_id,
+        "product": public_product(catalog.products[product_id]),
+        "card": catalog.cards.full[product_id],
+    }
+
+@app.get("/product/{name:path}")
+async def product(name: str):
+    """Look up products by name, ignoring case and punctuation."""
+    catalog = get_catalog()
+    products = catalog.products_named(name) or catalog.products_named(name, exact=False)
+    if not products:
+        raise HTTPException(status_code=404, detail=f"No product named {name!r}")
+    return {"catalog_version": catalog.version, "products": [public_product(p) for p in products]}
+
+if __name__ == "__main__":
+    uvicorn.run("search_service:app", host=SERVICE_HOST, port=SERVICE_PORT, workers=SERVICE_WORKERS,
+                timeout_keep_alive=KEEP_ALIVE_TIMEOUT, log_level="info")
@@ -0,0 +1,8 @@
+import os
+
+# Tests search the bundled catalog without writing a snapshot or a popularity database
+# next to it, or starting the catalog watcher and the admin server
+os.environ.setdefault("ELCOM_CATALOG_SNAPSHOT", "off")
+os.environ.setdefault("ELCOM_CATALOG_WATCH_INTERVAL", "0")
+os.environ.setdefault("ELCOM_POPULARITY_DB", "off")
+os.environ.setdefault("ELCOM_ADMIN_PORT", "off")
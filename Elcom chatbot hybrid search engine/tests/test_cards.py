@@ -0,0 +1,24 @@
+from actions.cards import ProductCards, format_compact_product_info, format_product_info
+
+PRODUCTS = [
+    {"product_name": "RS-16 Series", "description": "Rocker Switch, SPST", "rated_voltage": "250V AC",
+     "rated_current": "16A", "mounting_type": "N/A",
+     "other_features": {"Colour": ["Red", "nan", "['Black']"], "Actuator": "nan"}},
+    {"product_name": "FH-1 Series"},
+]
+
+def test_cards_are_rendered_once_per_product():
+    cards = ProductCards(PRODUCTS)
+    assert cards.full == [format_product_info(product) for product in PRODUCTS]
+    assert cards.compact == ["• RS-16 Series - Rocker Switch, SPST (250V AC, 16A)", "• FH-1 Series"]
+    assert cards.summaries == [{"name": "RS-16 Series", "ratings": ["250V AC", "16A"]},
+                               {"name": "FH-1 Series", "ratings": []}]
+
+def test_full_card_skips_missing_feature_values():
+    card = format_product_info(PRODUCTS[0])
+    assert card.startswith("RS-16 Series\n\nProduct Description:\nRocker Switch, SPST")
+    assert "• Colour: Red, Black" in card
+    assert "Actuator" not in card
+
+def test_compact_card_of_a_malformed_product():
+    assert format_compact_product_info({"description": "Fuse holder"}) == "• Unknown"
@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+from actions import catalog as catalog_module
+from actions.catalog import load_catalog
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def paths(tmp_path):
+    with open(os.path.join(PROJECT_DIR, catalog_module.DEFAULT_CATALOG_FILE), encoding="utf-8") as f:
+        products = json.load(f)[:40]
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(json.dumps(products), encoding="utf-8")
+    return str(catalog_path), str(tmp_path / "catalog.snapshot.pkl")
+
+def load(catalog_path, snapshot_path, caplog):
+    caplog.clear()
+    with caplog.at_level("INFO", logger="actions.catalog"):
+        return load_catalog(catalog_path, snapshot_path)
+
+def test_snapshot_is_reused(paths, caplog):
+    catalog_path, snapshot_path = paths
+    built = load(catalog_path, snapshot_path, caplog)
+    assert os.path.exists(snapshot_path)
+    loaded = load(catalog_path, snapshot_path, caplog)
+    assert "from snapshot" in caplog.text
+    assert loaded.version == built.version and len(loaded) == len(built)
+
+def test_snapshot_of_other_code_is_rebuilt(paths, caplog, monkeypatch):
+    catalog_path, snapshot_path = paths
+    load(catalog_path, snapshot_path, caplog)
+
+    monkeypatch.setattr(catalog_module, "code_fingerprint", lambda: "changed")
+    load(catalog_path, snapshot_path, caplog)
+    assert "built by other code" in caplog.text
+    assert "from snapshot" not in caplog.text
+    # The rebuilt snapshot carries the new fingerprint and is used from then on
+    load(catalog_path, snapshot_path, caplog)
+    assert "from snapshot" in caplog.text
+
+def test_code_fingerprint_is_stable():
+    assert catalog_module.code_fingerprint() == catalog_module.code_fingerprint()
+    assert len(catalog_module.code_fingerprint()) == 40
+
+@pytest.mark.parametrize("value, disabled", [
+    ("off", True), ("None", True), ("FALSE", True), ("0", True), (" off ", True),
+    (None, False), ("", False), ("5056", False), ("/tmp/offline.sqlite3", False),
+])
+def test_is_disabled(value, disabled):
+    assert catalog_module.is_disabled(value) is disabled
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import clean_product_catalog as cleaner
+
+PRODUCTS = [
+    {"Product Name": "RS-1601 Series", "Description": "Rocker switch, SPDT", "Rated Current": "5A/16A"},
+    {"Product Name": "RS-3-X Series", "Description": "Rocker switch, SPST/SPDT", "Rated Current": "6A/16A"},
+]
+
+@pytest.fixture
+def paths(tmp_path):
+    input_file = tmp_path / "catalog.json"
+    input_file.write_text(json.dumps(PRODUCTS), encoding="utf-8")
+    return str(input_file), str(tmp_path / "catalog_cleaned.json")
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def clean(input_file, output_file, caplog):
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        assert cleaner.clean_catalog(input_file, output_file, workers=1)
+    return read_json(output_file + cleaner.DELTA_SUFFIX)
+
+def test_unchanged_products_are_reused(paths, caplog):
+    input_file, output_file = paths
+    delta = clean(input_file, output_file, caplog)
+    assert [(e["key"], e["product"]["product_name"]) for e in delta["added"]] == [
+        ("RS-1601 Series#1", "RS-1601 Series"), ("RS-3-X Series#1", "RS-3-X Series")]
+    first_output = read_json(output_file)
+
+    delta = clean(input_file, output_file, caplog)
+    assert delta == {"added": [], "changed": [], "removed": []}
+    assert "2 unchanged" in caplog.text
+    assert read_json(output_file) == first_output
+
+def test_changed_source_product_is_cleaned_again(paths, caplog):
+    input_file, output_file = paths
+    clean(input_file, output_file, caplog)
+    changed = [dict(PRODUCTS[0], Description="Rocker switch, DPDT"), PRODUCTS[1]]
+    with open(input_file, "w", encoding="utf-8") as f:
+        json.dump(changed, f)
+
+    delta = clean(input_file, output_file, caplog)
+    assert [(e["key"], e["product"]["description"]) for e in delta["changed"]] == [
+        ("RS-1601 Series#1", "Rocker switch, DPDT")]
+    assert "1 unchanged" in caplog.text
+
+def test_cleaner_change_invalidates_the_manifest(paths, caplog, monkeypatch):
+    input_file, output_file = paths
+    clean(input_file, output_file, caplog)
+    manifest = read_json(output_file + cleaner.MANIFEST_SUFFIX)
+    assert manifest["cleaner"] == cleaner.cleaner_hash()
+
+    monkeypatch.setattr(cleaner, "cleaner_hash", lambda: "edited")
+    delta = clean(input_file, output_file, caplog)
+    assert len(delta["changed"]) == 2 and not delta["added"]
+    assert "0 unchanged" in caplog.text
+    assert read_json(output_file + cleaner.MANIFEST_SUFFIX)["cleaner"] == "edited"
+
+def test_reordered_and_removed_products(paths, caplog):
+    input_file, output_file = paths
+    clean(input_file, output_file, caplog)
+    first_output = read_json(output_file)
+    extra = {"Product Name": "RS-601 Series", "Description": "Rocker switch, SPDT", "Rated Current": "6A"}
+    with open(input_file, "w", encoding="utf-8") as f:
+        json.dump([PRODUCTS[1], extra], f)
+
+    delta = clean(input_file, output_file, caplog)
+    assert [e["key"] for e in delta["added"]] == ["RS-601 Series#1"]
+    assert delta["removed"] == ["RS-1601 Series#1"]
+    assert read_json(output_file)[0] == first_output[1]
+
+def test_edited_output_is_cleaned_again(paths, caplog):
+    input_file, output_file = paths
+    clean(input_file, output_file, caplog)
+    # Drop the last product from the output behind the manifest's back
+    first_product = read_json(output_file)[:1]
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(first_product, f)
+
+    delta = clean(input_file, output_file, caplog)
+    assert [e["key"] for e in delta["changed"]] == ["RS-3-X Series#1"]
+    assert len(read_json(output_file)) == 2
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from actions import dense_index
+from actions.dense_index import DenseIndex
+
+TEXTS = [
+    "rocker switch illuminated",
+    "toggle switch lever",
+    "ev charging connector type 2",
+    "solar pv connector mc4",
+    "industrial socket ip67",
+    "rocker switch illuminated",
+    "fuse holder panel mount",
+    "push button switch",
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return DenseIndex(TEXTS)
+
+def test_embeddings_are_unit_length(index):
+    assert index.vectors.shape[0] == len(TEXTS)
+    assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1, atol=1e-5)
+    assert np.isclose(np.linalg.norm(index.embed("rocker switch")), 1, atol=1e-5)
+
+def test_search_ranks_best_first(index):
+    ids, similarities = index.search(index.embed("charging connector"), 3)
+    assert ids[0] == 2 and len(ids) == 3
+    assert (np.diff(similarities) <= 0).all()
+    # Products with the same text tie and keep catalog order
+    ids, _ = index.search(index.embed("rocker switch illuminated"), 2)
+    assert ids == [0, 5]
+
+def test_search_within_products(index):
+    ids, _ = index.search(index.embed("charging connector"), 2, product_ids=np.array([0, 1, 3]))
+    assert ids == [3, 0]
+
+def test_ivf_search_with_every_cluster_is_exact(monkeypatch):
+    monkeypatch.setattr(dense_index, "IVF_MIN_PRODUCTS", 10)
+    texts = [f"{text} {size}" for text in TEXTS for size in ("small", "large", "6a", "16a", "250v", "ac")]
+    index = DenseIndex(texts)
+    assert index.centroids is not None
+    assert sorted(index.list_ids.tolist()) == list(range(len(texts)))
+    query = index.embed("illuminated rocker switch 16a")
+    exact_ids, exact_similarities = index.search(query, 5, product_ids=np.arange(len(texts)))
+    ids, similarities = index.search(query, 5, probes=len(index.centroids))
+    assert ids == exact_ids
+    assert np.allclose(similarities, exact_similarities)
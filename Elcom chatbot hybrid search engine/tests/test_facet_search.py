@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from actions import actions
+
+@pytest.fixture(scope="module")
+def catalog():
+    return actions.get_catalog()
+
+def search(catalog, query):
+    processed_query, attributes, _ = actions.prepare_query(catalog, query)
+    return actions.rank_products(catalog, processed_query, attributes), attributes
+
+@pytest.mark.parametrize("query", ["IP67 red 16A socket", "IP68 rocker switch", "panel mount fuse holder"])
+def test_results_have_the_requested_facets(catalog, query):
+    results, attributes = search(catalog, query)
+    constraints = actions.facet_constraints(attributes)
+    assert constraints and results.ids and not results.relaxed_facets
+    ids = np.asarray(results.ids, dtype=np.intp)
+    assert catalog.facets.filter(ids, constraints).tolist() == results.ids
+
+def test_facets_bound_the_candidates_before_pruning(catalog):
+    _, attributes = search(catalog, "IP67 red 16A socket")
+    product_ids, relaxed = actions.candidate_products(catalog, "ip67 red 16a socket", attributes)
+    universe = actions.facet_universe(catalog, attributes)
+    assert not relaxed and set(product_ids.tolist()) <= set(universe.tolist())
+
+def test_unmatched_facets_are_reported(catalog):
+    results, _ = search(catalog, "IP20 ev connector")
+    assert results.ids
+    assert results.relaxed_facets == (("ip_rating", "ip20"),)
+    response, _ = actions.render_results(catalog, results, "IP20 ev connector")
+    assert response.startswith("No product is listed with IP20")
+
+def test_hybrid_mode_finds_descriptive_queries(catalog):
+    query = "something to charge an electric car"
+    _, attributes, _ = actions.prepare_query(catalog, query, "hybrid")
+    assert attributes["search_mode"] == "hybrid"
+    assert actions.search_products(query, mode="hybrid")[0]["category"] == "ev_connector"
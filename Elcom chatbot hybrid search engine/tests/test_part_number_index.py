@@ -0,0 +1,53 @@
+import pytest
+
+from actions import actions
+from actions.part_number_index import PartNumberIndex, code_key
+
+PRODUCTS = [
+    {"product_name": "RS-1601 Series", "rated_current": "5A/16A"},
+    {"product_name": "RS-6/IRS-16 Series", "rated_current": "RS-6-5/ IRS-6-5 : 6A"},
+    {"product_name": "RS-16 Series", "rated_current": "16A"},
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return PartNumberIndex(PRODUCTS)
+
+def test_code_key_ignores_case_and_punctuation():
+    assert code_key("RS-1601") == code_key("rs 1601") == "rs1601"
+
+def test_lookup(index):
+    assert index.lookup("rs-1601") == [0]
+    assert index.lookup("IRS-16") == [1]
+    assert index.lookup("RS 6 5") == [1]
+    assert index.lookup("RS-99") == []
+
+def test_find_in_query_prefers_the_longest_code(index):
+    assert index.find_in_query("rs 1601 rocker switch") == ["rs1601"]
+    assert index.find_in_query("rs 16 or irs 16") == ["rs16", "irs16"]
+    assert index.find_in_query("rocker switch 16a") == []
+
+def test_complete(index):
+    assert index.complete("RS-16") == [("RS-16", [2]), ("RS-1601", [0])]
+    assert index.complete("RS-16", limit=1) == [("RS-16", [2])]
+    assert index.complete("XYZ") == []
+
+@pytest.fixture(scope="module")
+def catalog():
+    return actions.get_catalog()
+
+def rank(catalog, query):
+    processed_query, attributes, _ = actions.prepare_query(catalog, query)
+    return actions.rank_products(catalog, processed_query, attributes).ids
+
+def test_part_number_search(catalog):
+    rs1601 = catalog.part_numbers.lookup("RS-1601")
+    assert rs1601
+    assert rank(catalog, "RS-1601") == rs1601
+    # RS-1601 is rated 5A/16A
+    assert rank(catalog, "RS-1601 under 6A") == rs1601
+
+def test_part_number_search_with_conflicting_constraint_is_ranked(catalog):
+    rs1601 = catalog.part_numbers.lookup("RS-1601")
+    ranked_ids = rank(catalog, "RS-1601 over 20A")
+    assert ranked_ids and not set(ranked_ids) & set(rs1601)
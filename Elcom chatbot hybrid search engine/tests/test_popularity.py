@@ -0,0 +1,49 @@
+from actions.popularity import PopularityTracker
+
+def test_top_follows_counts():
+    tracker = PopularityTracker(top_k=2)
+    for name in ["a", "b", "b", "c", "c", "c", "a", "a", "a"]:
+        tracker.record(name)
+    assert tracker.top() == [("a", 4), ("c", 3)]
+    # Reading the top must not lose entries
+    assert tracker.top() == [("a", 4), ("c", 3)]
+
+def test_stale_entries_are_compacted():
+    tracker = PopularityTracker(top_k=1)
+    for _ in range(1000):
+        tracker.record("a")
+    assert len(tracker._heap) <= 4
+    assert tracker.top() == [("a", 1000)]
+
+def test_flush_shares_counts_between_processes(tmp_path):
+    db_path = str(tmp_path / "popularity.sqlite3")
+    first = PopularityTracker(db_path, flush_interval=60)
+    second = PopularityTracker(db_path, flush_interval=60)
+    try:
+        first.record("a")
+        second.record("a")
+        second.record("b")
+        first.flush()
+        second.flush()
+        assert second.top() == [("a", 2), ("b", 1)]
+        assert PopularityTracker(db_path).top() == [("a", 2), ("b", 1)]
+    finally:
+        first.close()
+        second.close()
+
+def test_flush_sees_other_processes_top_products(tmp_path):
+    db_path = str(tmp_path / "popularity.sqlite3")
+    first = PopularityTracker(db_path, top_k=2, flush_interval=60)
+    second = PopularityTracker(db_path, top_k=2, flush_interval=60)
+    try:
+        first.record("x")
+        first.flush()
+        for _ in range(10):
+            second.record("y")
+        second.flush()
+        # Nothing pending here, the flush only reads what other processes wrote
+        first.flush()
+        assert first.top() == [("y", 10), ("x", 1)]
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from actions.product_index import ProductIndex
+
+PRODUCTS = [
+    {"product_name": "RS-16 Rocker Switch", "description": "Rocker switch, SPST", "category": "switch"},
+    {"product_name": "TS-2 Toggle Switch", "description": "Toggle switch, DPDT", "category": "switch"},
+    {"product_name": "FH-1 Fuse Holder", "description": "Panel mount fuse holder", "category": "accessory"},
+    {"product_name": "RS-20 Rocker Switch", "description": "Illuminated rocker switch rocker", "category": "switch"},
+    {"product_name": "IP67 Socket", "description": "Industrial socket", "category": "industrial_connector"},
+    {"product_name": "PB-1 Push Button", "description": "Push button", "category": "switch"},
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return ProductIndex([dict(product, search_field=f"{product['product_name']} {product['description']}")
+                         for product in PRODUCTS])
+
+def test_candidates_fall_back_below_min_candidates(index):
+    assert index.candidates("fuse holder", min_candidates=1) == [2]
+    assert index.candidates("fuse holder", min_candidates=2) is None
+    assert index.candidates("xyz", min_candidates=1) is None
+
+def test_candidates_keep_the_best_in_catalog_order(index):
+    assert index.candidates("rocker switch", min_candidates=1) == [0, 1, 3, 4]
+    assert index.candidates("rocker switch", min_candidates=1, max_candidates=2) == [0, 3]
+
+def test_candidates_restrictions(index):
+    assert index.candidates("rocker switch", min_candidates=1, shard="switch") == [0, 1, 3]
+    assert index.candidates("rocker switch", min_candidates=1, product_ids=np.array([1, 2])) == [1]
+    # Too few left after the restriction: fall back
+    assert index.candidates("rocker switch", min_candidates=2, product_ids=np.array([1, 2])) is None
+
+def test_bm25_candidates_keep_the_best_in_catalog_order(index):
+    scores = index.bm25.scores("rocker switch")
+    assert scores[3] > scores[0] > scores[1] > 0 and not scores[[2, 4, 5]].any()
+    assert index.bm25_candidates("rocker switch", min_candidates=1) == [0, 1, 3]
+    assert index.bm25_candidates("rocker switch", min_candidates=1, max_candidates=2) == [0, 3]
+    assert index.bm25_candidates("rocker switch", min_candidates=4) is None
+
+def test_bm25_candidates_fill_up_with_the_category(index):
+    # Products of the category come right after the ones sharing a query term
+    assert index.bm25_candidates("rocker switch", "switch", min_candidates=1, max_candidates=4) == [0, 1, 3, 5]
+    assert index.bm25_candidates("rocker switch", "switch", min_candidates=1, max_candidates=3) == [0, 1, 3]
+    assert index.bm25_candidates("socket", "switch", min_candidates=1, max_candidates=1) == [4]
+
+def test_bm25_candidates_restricted_to_products(index):
+    assert index.bm25_candidates("rocker switch", "switch", min_candidates=1,
+                                 product_ids=np.array([1, 2, 5])) == [1, 5]
+    assert index.bm25_candidates("rocker switch", min_candidates=1, product_ids=np.array([2, 4])) is None
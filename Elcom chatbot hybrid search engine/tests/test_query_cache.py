@@ -0,0 +1,26 @@
+from actions.query_cache import QueryCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 1, "evictions": 1, "expirations": 0}
+
+def test_entries_expire():
+    cache = QueryCache(ttl=-1)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.stats()["expirations"] == 1
+
+def test_disabled_and_cleared_cache():
+    disabled = QueryCache(max_size=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+    cache = QueryCache()
+    cache.put("a", 1)
+    cache.clear()
+    assert cache.get("a") is None
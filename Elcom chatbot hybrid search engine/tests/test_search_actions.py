@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+
+import pytest
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions
+from actions.catalog import DEFAULT_CATALOG_FILE, load_catalog
+from actions.result_set import RESULT_SET_SLOT, RankedResults, encode_cursor, from_slot, to_slot
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def tracker(text, intent, result_set=None, entities=()):
+    slots = {RESULT_SET_SLOT: to_slot(result_set) if result_set else None}
+    message = {"text": text, "intent": {"name": intent}, "entities": list(entities)}
+    return Tracker("test", slots, message, [], False, None, {}, "")
+
+def run_action(text, intent, result_set=None, entities=()):
+    dispatcher = CollectingDispatcher()
+    events = asyncio.run(actions.ActionSearchProduct().run(dispatcher, tracker(text, intent, result_set, entities), {}))
+    return dispatcher.messages, events
+
+@pytest.fixture(scope="module")
+def catalog():
+    asyncio.run(actions.start_services())
+    return actions.get_catalog()
+
+@pytest.mark.parametrize("text, intent", [("show more", "show_more"), ("only the panel mount ones", "refine_search")])
+def test_action_reads_the_catalog_once(catalog, monkeypatch, text, intent):
+    _, _, result_set = actions.answer_query("rocker switch", catalog)
+    calls = []
+
+    def get_catalog():
+        calls.append(1)
+        return catalog
+
+    monkeypatch.setattr(actions, "get_catalog", get_catalog)
+    monkeypatch.setattr(actions, "RESPONSE_FORMAT", "compact")
+    messages, events = run_action(text, intent, result_set)
+    assert len(calls) == 1
+    assert messages and events
+
+@pytest.fixture(scope="module")
+def small_catalog(tmp_path_factory):
+    # The switches of the catalog: enough for several pages and a few refinements
+    with open(os.path.join(PROJECT_DIR, DEFAULT_CATALOG_FILE), encoding="utf-8") as f:
+        products = [p for p in json.load(f)
+                    if "switch" in f"{p.get('product_name', '')} {p.get('description', '')}".lower()]
+    catalog_path = tmp_path_factory.mktemp("catalog") / "catalog.json"
+    catalog_path.write_text(json.dumps(products), encoding="utf-8")
+    return load_catalog(str(catalog_path), use_snapshot=False)
+
+@pytest.fixture
+def use_small_catalog(catalog, small_catalog, monkeypatch):
+    monkeypatch.setattr(actions, "get_catalog", lambda: small_catalog)
+    return small_catalog
+
+def search(catalog, query):
+    _, _, result_set = actions.answer_query(query, catalog)
+    return result_set
+
+def slot_of(events):
+    assert len(events) == 1 and events[0]["name"] == RESULT_SET_SLOT
+    return from_slot(events[0]["value"])
+
+def test_refine_keeps_a_reranked_subset(small_catalog):
+    previous = search(small_catalog, "rocker switch").results
+    refined = actions.refine_results(small_catalog, previous, "which are 16A")
+    assert 0 < len(refined.ids) < len(previous.ids)
+    assert set(refined.ids) <= set(previous.ids)
+    assert refined.scores == sorted(refined.scores, reverse=True)
+
+def test_refine_without_matches_keeps_the_previous_results(small_catalog):
+    previous = search(small_catalog, "rocker switch")
+    assert not actions.refine_results(small_catalog, previous.results, "IP68 ones").ids
+    response, top_product, result_set = actions.refine_and_render(small_catalog, previous, "IP68 ones")
+    assert response.startswith(f"None of the {len(previous.results.ids)} products")
+    assert top_product is None and result_set is None
+
+def test_empty_refinement_leaves_the_slot_alone(use_small_catalog):
+    previous = search(use_small_catalog, "rocker switch")
+    messages, events = run_action("IP68 ones", "refine_search", previous)
+    assert messages[0]["text"].startswith("None of the")
+    assert events == []
+
+def test_next_page_advances_to_the_end(small_catalog):
+    result_set = search(small_catalog, "rocker switch")
+    total = len(result_set.results.ids)
+    assert result_set.offset == actions.MAX_RESULTS < total
+    pages = []
+    while result_set.offset < total:
+        response, result_set = actions.next_page(small_catalog, result_set)
+        pages.append(response)
+    assert result_set.offset == total
+    assert len(pages) == -(-(total - actions.MAX_RESULTS) // actions.MAX_RESULTS)
+    response, past_end = actions.next_page(small_catalog, result_set)
+    assert response.startswith(f"That's all {total} matching products")
+    assert past_end.offset == total
+
+def test_stale_result_set_is_searched_again(use_small_catalog):
+    previous = search(use_small_catalog, "rocker switch")
+    stale = previous._replace(results=RankedResults([10 ** 6], [1.0]), catalog_version="stale")
+    _, events = run_action("show more", "show_more", stale)
+    result_set = slot_of(events)
+    assert result_set.catalog_version == use_small_catalog.version
+    assert result_set.results.ids == previous.results.ids
+    assert result_set.offset == previous.offset + actions.MAX_RESULTS
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", encode_cursor("other version", 0)])
+def test_unusable_cursor_pages_from_the_slot(use_small_catalog, cursor):
+    previous = search(use_small_catalog, "rocker switch")
+    _, events = run_action("show more", "show_more", previous, [{"entity": "cursor", "value": cursor}])
+    assert slot_of(events).offset == previous.offset + actions.MAX_RESULTS
+
+def test_cursor_selects_the_page(use_small_catalog):
+    previous = search(use_small_catalog, "rocker switch")
+    cursor = encode_cursor(use_small_catalog.version, 0)
+    _, events = run_action("show more", "show_more", previous, [{"entity": "cursor", "value": cursor}])
+    assert slot_of(events).offset == actions.MAX_RESULTS
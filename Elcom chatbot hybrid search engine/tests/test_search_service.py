@@ -0,0 +1,44 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import search_service
+from actions.result_set import decode_cursor, encode_cursor
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(search_service.app) as client:
+        yield client
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("716e8be7", 15)) == ("716e8be7", 15)
+    # Versions are opaque and may contain the separator
+    assert decode_cursor(encode_cursor("v1:2", 0)) == ("v1:2", 0)
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "!!!", encode_cursor("v1", 5)[:-2] + "~~"])
+def test_malformed_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+def test_pages_follow_the_cursor(client):
+    first = client.get("/search", params={"q": "rocker switch", "limit": 3}).json()
+    assert first["total"] > 3 and first["next_cursor"]
+    second = client.get("/search", params={"q": "rocker switch", "limit": 3, "cursor": first["next_cursor"]}).json()
+    names = [p["product_name"] for p in first["results"] + second["results"]]
+    assert len(names) == 6 and len(set(names)) == 6
+    assert second["facets"] == first["facets"]
+
+def test_bad_cursor_is_rejected(client):
+    response = client.get("/search", params={"q": "rocker switch", "cursor": "not a cursor"})
+    assert response.status_code == 400
+
+def test_cursor_of_another_catalog_is_stale(client):
+    response = client.get("/search", params={"q": "rocker switch", "cursor": encode_cursor("old", 5)})
+    assert response.status_code == 409
+
+@pytest.mark.parametrize("param", ["response_format", "format"])
+def test_compact_response_format(client, param):
+    results = client.get("/search", params={"q": "rocker switch", param: "compact"}).json()["results"]
+    assert results and set(results[0]) == {"id", "name", "ratings"}
+
+def test_unknown_response_format_is_rejected(client):
+    response = client.get("/search", params={"q": "rocker switch", "response_format": "xml"})
+    assert response.status_code == 422
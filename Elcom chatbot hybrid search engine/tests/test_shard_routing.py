@@ -0,0 +1,38 @@
+import pytest
+
+from actions import actions
+from actions.shard_index import ROUTING_CONFIDENCE
+
+@pytest.fixture(scope="module")
+def catalog():
+    return actions.get_catalog()
+
+def search(catalog, query):
+    processed_query, attributes, _ = actions.prepare_query(catalog, query)
+    return actions.rank_products(catalog, processed_query, attributes), attributes
+
+@pytest.mark.parametrize("query", ["rocker switch", "toggle switch", "push button switch"])
+def test_confident_query_stays_in_its_shard(catalog, query):
+    processed_query, attributes, _ = actions.prepare_query(catalog, query)
+    shard, confidence = catalog.shards.route(processed_query, attributes["category"])
+    assert shard == "switch" and confidence >= ROUTING_CONFIDENCE
+
+    results, attributes = search(catalog, query)
+    assert attributes["shard"] == "switch"
+    assert results.ids and set(results.ids) <= set(catalog.shards["switch"].ids.tolist())
+
+@pytest.mark.parametrize("query", ["switch socket", "panel mount fuse holder", "ev charging connector"])
+def test_low_confidence_query_searches_the_whole_catalog(catalog, monkeypatch, query):
+    processed_query, attributes, _ = actions.prepare_query(catalog, query)
+    shard, confidence = catalog.shards.route(processed_query, attributes["category"])
+    assert shard is None and 0 < confidence < ROUTING_CONFIDENCE
+
+    routed, attributes = search(catalog, query)
+    assert "shard" not in attributes
+    monkeypatch.setattr(actions, "SHARD_ROUTING", False)
+    unsharded, _ = search(catalog, query)
+    assert routed.ids and routed.ids == unsharded.ids
+    assert routed.scores == pytest.approx(unsharded.scores)
+
+def test_query_without_category_fans_out(catalog):
+    assert catalog.shards.route("waterproof enclosure") == (None, 0.0)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from actions.spec_index import (KIND_AC, KIND_AC_DC, KIND_DC, Rating, SpecIndex, parse_current_ratings,
+                                parse_voltage_ratings)
+
+RATINGS = [
+    [Rating(6.0), Rating(16.0)],
+    [Rating(250.0, KIND_AC)],
+    [],
+    [Rating(12.0, KIND_DC)],
+    [Rating(16.0)],
+    [Rating(24.0, KIND_AC_DC)],
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return SpecIndex(RATINGS)
+
+@pytest.mark.parametrize("operator, value, expected", [
+    ("lt", 16, [0, 3]),
+    ("le", 16, [0, 3, 4]),
+    ("gt", 16, [1, 5]),
+    ("ge", 16, [0, 1, 4, 5]),
+    ("eq", 16, [0, 4]),
+    ("eq", 15, []),
+    ("lt", 1, []),
+    ("gt", 1, [0, 1, 3, 4, 5]),
+])
+def test_matching_ranges(index, operator, value, expected):
+    assert index.matching(operator, value).tolist() == expected
+
+def test_matching_by_kind(index):
+    # Untagged and AC/DC ratings match either kind
+    assert index.matching("ge", 10, KIND_DC).tolist() == [0, 3, 4, 5]
+    assert index.matching("ge", 10, KIND_AC).tolist() == [0, 1, 4, 5]
+
+def test_unknown_operator(index):
+    with pytest.raises(ValueError):
+        index.matching("ne", 16)
+
+def test_nearest_distance(index):
+    assert index.nearest_distance(10).tolist() == [4.0, 240.0, np.inf, 2.0, 6.0, 14.0]
+    assert index.has_rating.tolist() == [True, True, False, True, True, True]
+
+def test_empty_index():
+    index = SpecIndex([[], []])
+    assert index.matching("ge", 0).tolist() == []
+    assert index.nearest_distance(5).tolist() == [np.inf, np.inf]
+
+def test_parse_ratings():
+    assert parse_voltage_ratings("120V / 250V AC") == [Rating(120.0, KIND_AC), Rating(250.0, KIND_AC)]
+    assert parse_voltage_ratings("120/250VAC") == [Rating(120.0, KIND_AC), Rating(250.0, KIND_AC)]
+    assert parse_voltage_ratings("1KV DC") == [Rating(1000.0, KIND_DC)]
+    assert parse_current_ratings("500mA") == [Rating(0.5)]
+    assert parse_current_ratings("RS-6-5/ IRS-6-5 : 6A, RS-16/IRS-16 : 16A") == [Rating(6.0), Rating(16.0)]
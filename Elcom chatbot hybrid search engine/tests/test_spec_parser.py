@@ -0,0 +1,33 @@
+import pytest
+
+from actions.spec_parser import (SPEC_CURRENT, SPEC_IP_RATING, SPEC_MOUNTING, SPEC_VOLTAGE, first_specs,
+                                 parse_specs)
+
+@pytest.mark.parametrize("query, kind, value", [
+    ("6.3A fuse", SPEC_CURRENT, 6.3),
+    ("2.5A", SPEC_CURRENT, 2.5),
+    ("16a rocker switch", SPEC_CURRENT, 16.0),
+    ("2 amps", SPEC_CURRENT, 2.0),
+    ("500mA", SPEC_CURRENT, 0.5),
+    ("250 V", SPEC_VOLTAGE, 250.0),
+    ("1.5kV", SPEC_VOLTAGE, 1500.0),
+])
+def test_ratings(query, kind, value):
+    specs = parse_specs(query)
+    assert [(spec.kind, spec.value) for spec in specs] == [(kind, value)]
+
+@pytest.mark.parametrize("query", ["x10a", "i need 2 a switch", "rs 1601 series"])
+def test_no_rating(query):
+    assert not [spec for spec in parse_specs(query) if spec.kind in (SPEC_CURRENT, SPEC_VOLTAGE)]
+
+def test_operator_and_supply():
+    spec = first_specs("up to 1.5kV AC please")[SPEC_VOLTAGE]
+    assert (spec.value, spec.operator, spec.supply) == (1500.0, "le", "ac")
+
+def test_punctuation_is_a_separator():
+    specs = first_specs("IP-67 panel-mount socket")
+    assert specs[SPEC_IP_RATING].value == 67
+    assert specs[SPEC_MOUNTING].value == "panel"
+
+def test_first_listed_mounting_wins():
+    assert first_specs("chassis mount or panel mount")[SPEC_MOUNTING].value == "panel"
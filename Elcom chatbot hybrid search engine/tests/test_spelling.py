@@ -0,0 +1,40 @@
+import pickle
+
+import pytest
+
+from actions.spelling import SpellingCorrector, count_words
+
+@pytest.fixture(scope="module")
+def corrector():
+    return SpellingCorrector.from_sources(
+        ["rocker switch", "industrial connector"],
+        count_words(["rocker switch illuminated", "illuminated rocker", "toggle 16a"]))
+
+@pytest.mark.parametrize("word, corrected", [
+    # Transpositions, deletions and insertions within the allowed distance
+    ("rokcer", "rocker"),
+    ("rockre", "rocker"),
+    ("swich", "switch"),
+    ("illuminatd", "illuminated"),
+    # Listed variations are always rewritten
+    ("industrail", "industrial"),
+    ("conector", "connector"),
+    # Known, short, non-alphabetic and unknown words are kept
+    ("toggle", "toggle"),
+    ("tgle", "tgle"),
+    ("16a", "16a"),
+    ("xyzzyq", "xyzzyq"),
+])
+def test_correct(corrector, word, corrected):
+    assert corrector.correct(word) == corrected
+
+def test_count_words_skips_short_and_numeric_words():
+    assert count_words(["rocker switch 16a", "a rocker"]) == {"rocker": 2, "switch": 1}
+
+def test_more_frequent_word_wins():
+    corrector = SpellingCorrector({"plug": 5, "plum": 1})
+    assert corrector.correct("plun") == "plug"
+
+def test_pickle_drops_the_memo(corrector):
+    corrector.correct("swich")
+    assert pickle.loads(pickle.dumps(corrector))._memo == {}
@@ -0,0 +1,37 @@
+import pytest
+
+from actions.phrase_matcher import AhoCorasick, VocabularyMatcher, vocabulary_matcher
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "hers", "his"])
+    assert list(automaton.find_all("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+    assert list(automaton.find_all("")) == []
+
+@pytest.mark.parametrize("text, category", [
+    ("rocker switch relay", "switch"),
+    ("relay switch", "switch"),
+    ("fuse holder", "accessory"),
+    ("circuit breaker", "breaker"),
+    ("power supply unit", "power"),
+    # Keywords match anywhere in a description
+    ("mountain", "accessory"),
+    ("solid state", None),
+])
+def test_categorize_uses_category_priority(text, category):
+    assert vocabulary_matcher.categorize(text) == category
+
+@pytest.mark.parametrize("query, category, attributes", [
+    ("relay switch", "relay", {}),
+    ("toggle switch panel mount", "switch", {"rocker": True, "panel": True, "mount": True}),
+    ("ev charging cable", "ev_connector", {}),
+    ("industrial socket 16a", "industrial_connector", {}),
+    ("mountain", None, {}),
+])
+def test_tag_query(query, category, attributes):
+    assert vocabulary_matcher.tag_query(query) == (category, attributes)
+
+def test_hints_win_over_keywords():
+    matcher = VocabularyMatcher({"switch": ["switch"], "relay": ["relay"]}, {},
+                                [("relay", ["coil"]), ("switch", ["coil"])])
+    assert matcher.tag_query("switch with coil") == ("relay", {})
+    assert matcher.tag_query("switch relay") == ("switch", {})